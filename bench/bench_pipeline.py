@@ -0,0 +1,250 @@
+"""
+字幕处理流程的性能测试
+
+两个入口的 add_styles_to_subtitles 都调用 srtformat，因此分阶段计时针对 srtformat（core）：
+读取（read）、编码检测（detection）、解码（decode）、格式检测（format）、分组（grouping）、
+添加样式并写出（write）；cli/main.py 和 gui/gui_version.py 只测完整流程（end_to_end）。
+每个阶段给出 cues/s 和 MB/s，完整流程额外用 tracemalloc 统计内存峰值。
+结果以 JSON 输出，便于在不同提交之间比较。
+
+用法：python bench/bench_pipeline.py --sizes 1000,100000 --output result.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.normpath(os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from corpus import ENCODINGS, KINDS, generate_corpus, parse_list, parse_sizes  # noqa: E402
+import srtformat  # noqa: E402
+from srtformat import encoding as subtitle_encoding, engine, parser as subtitle_parser  # noqa: E402
+from srtformat.templates import compile_template_styles  # noqa: E402
+
+# 测试使用的样式，与 templates.json 中的默认模板相同
+STYLE_TEMPLATE = {
+    "chinese_font": "寒蝉端黑体 Compact",
+    "english_font": "寒蝉端黑体 Compact",
+    "chinese_font_size": "18",
+    "english_font_size": "12",
+    "chinese_font_color": "#C8C8C8",
+    "english_font_color": "#0F94CB",
+    "chinese_bold": True,
+    "english_bold": False,
+    "chinese_italic": False,
+    "english_italic": False,
+    "chinese_blur": False,
+    "english_blur": False,
+    "shadow_opacity": "0",
+}
+# add_styles_to_subtitles 的位置参数顺序
+STYLE_ARGS = tuple(STYLE_TEMPLATE[field] for field in (
+    "chinese_font", "english_font", "chinese_font_size", "english_font_size", "chinese_font_color",
+    "english_font_color", "chinese_bold", "english_bold", "chinese_italic", "english_italic",
+    "chinese_blur", "english_blur", "shadow_opacity"))
+CLI_STYLE_ARGS = STYLE_ARGS[:4]
+
+
+def load_module(name, relative_path):
+    """ 按路径导入脚本，依赖缺失时返回 (None, 错误信息) """
+    path = os.path.join(ROOT_DIR, relative_path)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    return module, None
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def peak_memory(func, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def consume(iterable):
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+def read_bytes(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def core_stages(path, output_file):
+    """ srtformat 各阶段的计时函数，按流程顺序排列 """
+    is_ass = engine.is_ass_file(path)
+    chinese_style, english_style = compile_template_styles(STYLE_TEMPLATE)
+    state = {}
+
+    def read():
+        state["raw"] = read_bytes(path)
+
+    def detection():
+        return subtitle_encoding.detect_encoding(state["raw"])
+
+    def decode():
+        state["text"], error = subtitle_encoding.decode_subtitle_bytes(state["raw"])
+        if error:
+            raise ValueError(error)
+
+    def detect_format():
+        if is_ass:
+            state["format"] = "ass"
+            return
+        state["format"], decided_by, head = subtitle_parser.sniff_subtitle_format(
+            subtitle_encoding.iter_text_lines(state["text"]))
+        state["format_detection"] = {"format": state["format"], "decided_by": decided_by, "lines_read": len(head)}
+
+    def grouping():
+        state["cues"] = list(engine.parse_text(state["text"], state["format"]))
+
+    def write():
+        srtformat.write_styled(output_file, srtformat.iter_styled_cues(state["cues"], chinese_style, english_style))
+
+    def end_to_end():
+        srtformat.style_file(path, output_file, chinese_style, english_style)
+
+    return [("read", read), ("detection", detection), ("decode", decode), ("format", detect_format),
+            ("grouping", grouping), ("write", write)], end_to_end, state
+
+
+def gui_stages(gui, path, output_file):
+    """ gui/gui_version.py 只测完整流程 """
+    def end_to_end():
+        result = gui.add_styles_to_subtitles(path, output_file, *STYLE_ARGS)
+        if result != output_file:
+            raise ValueError(result)
+
+    return [], end_to_end, {}
+
+
+def cli_stages(cli, path, output_file):
+    """ cli/main.py 只测完整流程 """
+    def end_to_end():
+        cli.add_styles_to_subtitles(path, output_file, *CLI_STYLE_ARGS)
+
+    return [], end_to_end, {}
+
+
+def throughput(seconds, cue_count, byte_count):
+    return {
+        "seconds": round(seconds, 6),
+        "cues_per_s": round(cue_count / seconds, 1) if seconds else None,
+        "mb_per_s": round(byte_count / seconds / 1e6, 3) if seconds else None,
+    }
+
+
+def bench_file(implementation, module, kind, encoding, cue_count, path, output_file, repeat, measure_memory):
+    byte_count = os.path.getsize(path)
+    record = {"implementation": implementation, "kind": kind, "encoding": encoding,
+              "cues": cue_count, "bytes": byte_count, "stages": {}}
+    try:
+        if implementation == "core":
+            stages, end_to_end, state = core_stages(path, output_file)
+        elif implementation == "gui":
+            stages, end_to_end, state = gui_stages(module, path, output_file)
+        else:
+            stages, end_to_end, state = cli_stages(module, path, output_file)
+        for name, func in stages:
+            best = min(timed(func)[0] for _ in range(repeat))
+            record["stages"][name] = throughput(best, cue_count, byte_count)
+        if "format_detection" in state:
+            record["format_detection"] = state["format_detection"]
+        state.clear()
+
+        best = min(timed(end_to_end)[0] for _ in range(repeat))
+        record["end_to_end"] = throughput(best, cue_count, byte_count)
+        if measure_memory:
+            record["peak_memory_bytes"] = peak_memory(end_to_end)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="字幕处理流程的分阶段性能测试")
+    parser.add_argument("--kinds", type=parse_list, default=list(KINDS), help="字幕类型，逗号分隔")
+    parser.add_argument("--encodings", type=parse_list, default=list(ENCODINGS), help="编码，逗号分隔")
+    parser.add_argument("--sizes", type=parse_sizes, default=[1000, 10000], help="字幕条数，逗号分隔，最大可到 1000000")
+    parser.add_argument("--implementations", type=parse_list, default=["core", "cli", "gui"],
+                        help="要测试的实现（core、cli、gui），逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段重复次数，取最快的一次")
+    parser.add_argument("--no-memory", action="store_true", help="不统计内存峰值（tracemalloc 会显著拖慢运行）")
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "srtformat-bench"),
+                        help="合成字幕文件的缓存目录")
+    parser.add_argument("--output", help="JSON 结果输出文件，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    modules = {"core": srtformat} if "core" in args.implementations else {}
+    skipped = {}
+    for implementation, relative_path in (("cli", os.path.join("cli", "main.py")),
+                                          ("gui", os.path.join("gui", "gui_version.py"))):
+        if implementation not in args.implementations:
+            continue
+        module, error = load_module(f"bench_{implementation}", relative_path)
+        if module is None:
+            skipped[implementation] = error
+            print(f"跳过 {implementation}：{error}", file=sys.stderr)
+        else:
+            modules[implementation] = module
+
+    corpus = generate_corpus(args.corpus_dir, args.kinds, args.encodings, args.sizes)
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for kind, encoding, cue_count, path in corpus:
+            for implementation, module in modules.items():
+                output_file = os.path.join(output_dir, f"{implementation}_{os.path.basename(path)}.srt")
+                record = bench_file(implementation, module, kind, encoding, cue_count, path, output_file,
+                                    args.repeat, not args.no_memory)
+                results.append(record)
+                summary = record.get("error") or f"{record['end_to_end']['cues_per_s']} cues/s"
+                print(f"{implementation:4s} {os.path.basename(path)}: {summary}", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "skipped": skipped,
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+生成用于性能测试的合成字幕文件
+
+支持三种内容：标准双语 SRT（standard）、时间戳重复的分离格式 SRT（separated）、ASS（ass），
+以及 utf-8、utf-8-sig、gbk、big5、utf-16 五种编码。文件边生成边写入，1M 条字幕也不会占用大量内存。
+
+用法：python bench/corpus.py --kinds standard,ass --encodings utf-8,gbk --sizes 1000,100000 --out ./corpus
+"""
+import argparse
+import os
+import random
+
+KINDS = ("standard", "separated", "ass")
+ENCODINGS = ("utf-8", "utf-8-sig", "gbk", "big5", "utf-16")
+
+# 只使用 GBK 和 Big5 都能编码的字符
+CHINESE_WORDS = ["你好", "世界", "今天", "天氣", "很好", "我們", "走吧", "謝謝", "再見", "沒有", "問題", "時間",
+                 "朋友", "電影", "字幕", "晚上", "一起", "回家", "知道", "為什麼", "真的", "可以", "喜歡", "告訴"]
+ENGLISH_WORDS = ["hello", "world", "today", "weather", "we", "should", "go", "thanks", "see", "you", "no",
+                 "problem", "time", "friend", "movie", "night", "together", "home", "know", "why", "really"]
+
+ASS_HEADER = """[Script Info]
+Title: srtFormat benchmark
+ScriptType: v4.00+
+PlayResX: 1920
+PlayResY: 1080
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,20,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def srt_time(milliseconds):
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+def ass_time(milliseconds):
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}.{milliseconds // 10:02d}"
+
+
+def iter_cue_texts(cue_count, seed=0):
+    """ 生成 (开始毫秒, 结束毫秒, 中文行, 英文行) """
+    rng = random.Random(seed)
+    start = 0
+    for _ in range(cue_count):
+        start += rng.randint(200, 3000)
+        end = start + rng.randint(800, 4000)
+        chinese_line = "".join(rng.choices(CHINESE_WORDS, k=rng.randint(2, 8)))
+        english_line = " ".join(rng.choices(ENGLISH_WORDS, k=rng.randint(3, 10))).capitalize()
+        yield start, end, chinese_line, english_line
+
+
+def iter_corpus_lines(kind, cue_count, seed=0):
+    """ 按行生成指定类型的字幕内容 """
+    if kind == "ass":
+        yield ASS_HEADER
+        for start, end, chinese_line, english_line in iter_cue_texts(cue_count, seed):
+            yield f"Dialogue: 0,{ass_time(start)},{ass_time(end)},Default,,0,0,0,,{{\\fs20}}{chinese_line}\\N{english_line}\n"
+    elif kind == "separated":
+        subtitle_num = 0
+        for start, end, chinese_line, english_line in iter_cue_texts(cue_count, seed):
+            timestamp = f"{srt_time(start)} --> {srt_time(end)}"
+            subtitle_num += 1
+            yield f"{subtitle_num}\n{timestamp}\n{chinese_line}\n\n"
+            subtitle_num += 1
+            yield f"{subtitle_num}\n{timestamp}\n{english_line}\n\n"
+    elif kind == "standard":
+        subtitle_num = 0
+        for start, end, chinese_line, english_line in iter_cue_texts(cue_count, seed):
+            subtitle_num += 1
+            yield f"{subtitle_num}\n{srt_time(start)} --> {srt_time(end)}\n{chinese_line}\n{english_line}\n\n"
+    else:
+        raise ValueError(f"未知的字幕类型：{kind}")
+
+
+def corpus_file_name(kind, encoding, cue_count):
+    extension = ".ass" if kind == "ass" else ".srt"
+    return f"{kind}_{encoding}_{cue_count}{extension}"
+
+
+def generate_corpus_file(directory, kind, encoding, cue_count, seed=0, overwrite=False):
+    """ 生成一个合成字幕文件并返回路径，文件已存在时直接复用 """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, corpus_file_name(kind, encoding, cue_count))
+    if os.path.exists(path) and not overwrite:
+        return path
+    temp_path = path + ".part"
+    with open(temp_path, "w", encoding=encoding, newline="\n") as file:
+        file.writelines(iter_corpus_lines(kind, cue_count, seed))
+    os.replace(temp_path, path)
+    return path
+
+
+def generate_corpus(directory, kinds=KINDS, encodings=ENCODINGS, sizes=(1000,), seed=0, overwrite=False):
+    """ 生成所有组合的合成字幕文件，返回 [(类型, 编码, 字幕条数, 路径)] """
+    corpus = []
+    for cue_count in sizes:
+        for kind in kinds:
+            for encoding in encodings:
+                path = generate_corpus_file(directory, kind, encoding, cue_count, seed, overwrite)
+                corpus.append((kind, encoding, cue_count, path))
+    return corpus
+
+
+def parse_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_sizes(value):
+    return [int(item) for item in parse_list(value)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成用于性能测试的合成字幕文件")
+    parser.add_argument("--kinds", type=parse_list, default=list(KINDS), help="字幕类型，逗号分隔")
+    parser.add_argument("--encodings", type=parse_list, default=list(ENCODINGS), help="编码，逗号分隔")
+    parser.add_argument("--sizes", type=parse_sizes, default=[1000], help="字幕条数，逗号分隔，如 1000,1000000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="输出目录")
+    parser.add_argument("--overwrite", action="store_true", help="重新生成已存在的文件")
+    args = parser.parse_args(argv)
+
+    for kind, encoding, cue_count, path in generate_corpus(args.out, args.kinds, args.encodings, args.sizes,
+                                                           args.seed, args.overwrite):
+        print(f"{path}\t{os.path.getsize(path)} 字节")
+
+
+if __name__ == "__main__":
+    main()
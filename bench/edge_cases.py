@@ -0,0 +1,117 @@
+"""
+等价性测试使用的边界情况字幕
+
+这些内容来自实际遇到过的字幕文件：条目之间缺少空行、最后一条没有换行、CRLF、BOM、GBK 和 UTF-16 编码、
+时间戳用点号、分离格式、HTML 标签、带 \\N 的 ASS 等。文件内容在这里按字节生成，不放进仓库，
+避免 git 的换行符转换或编辑器改变 BOM 和编码。
+
+用法：python bench/edge_cases.py --out ./edge_cases
+"""
+import argparse
+import codecs
+import os
+
+BILINGUAL_SRT = (
+    "1\n00:00:01,000 --> 00:00:02,500\n你好，世界\nHello, world\n\n"
+    "2\n00:00:03,000 --> 00:00:04,200\n今天天氣很好\nThe weather is nice today\n\n"
+    "3\n00:01:05,040 --> 00:01:07,960\n我們走吧\nLet's go\n\n"
+)
+
+
+def crlf(text):
+    return text.replace("\n", "\r\n")
+
+
+# (名称, 扩展名, 内容的字节串, 说明)
+EDGE_CASES = [
+    ("standard", ".srt", BILINGUAL_SRT.encode("utf-8"), "标准双语 SRT"),
+    ("crlf", ".srt", crlf(BILINGUAL_SRT).encode("utf-8"), "CRLF 换行"),
+    ("utf8_bom", ".srt", codecs.BOM_UTF8 + BILINGUAL_SRT.encode("utf-8"), "UTF-8 BOM"),
+    ("utf16_bom", ".srt", crlf(BILINGUAL_SRT).encode("utf-16"), "带 BOM 的 UTF-16（Windows 记事本另存为 Unicode）"),
+    ("utf16_no_bom", ".srt",
+     crlf("1\n00:00:01,000 --> 00:00:02,000\nHello\n\n2\n00:00:02,500 --> 00:00:03,000\nWorld\n\n").encode("utf-16-le"),
+     "没有 BOM、只有英文的 UTF-16（也是合法的 UTF-8）"),
+    ("gbk", ".srt", crlf(BILINGUAL_SRT.replace("天氣", "天气")).encode("gbk"), "GBK 编码，没有 BOM"),
+    ("cp1252", ".srt",
+     "1\n00:00:01,000 --> 00:00:02,000\nCafé au lait\n\n2\n00:00:02,500 --> 00:00:03,000\nNaïve “quotes”\n\n"
+     .encode("cp1252"), "只有英文的 Windows-1252 文件"),
+    ("missing_blank_lines", ".srt",
+     b"1\n00:00:01,000 --> 00:00:02,000\n\xe4\xb8\x80\nOne\n"
+     b"2\n00:00:02,000 --> 00:00:03,000\n\xe4\xba\x8c\nTwo\n"
+     b"3\n00:00:03,000 --> 00:00:04,000\n\xe4\xb8\x89\nThree\n", "条目之间缺少空行"),
+    ("no_trailing_newline", ".srt", BILINGUAL_SRT.rstrip("\n").encode("utf-8"), "最后一条没有换行"),
+    ("trailing_cues", ".srt",
+     (BILINGUAL_SRT + "4\n00:01:08,000 --> 00:01:09,000\n\n\n5\n00:01:10,000 --> 00:01:11,000\n   \n\n\n\n")
+     .encode("utf-8"), "末尾有没有文字的条目和多余的空行"),
+    ("extra_blank_lines", ".srt",
+     ("\n\n" + BILINGUAL_SRT.replace("\n\n", "\n\n\n\n")).encode("utf-8"), "开头和条目之间有多个空行"),
+    ("dot_timestamps", ".srt",
+     b"1\n00:00:01.000 --> 00:00:02.5\n\xe7\x82\xb9\xe5\x8f\xb7\nDots\n\n"
+     b"2\n0:00:03,00 --> 0:00:04,000\n\xe7\x9f\xad\nShort fields\n\n", "时间戳用点号或字段位数不全"),
+    ("no_milliseconds", ".srt",
+     "1\n00:00:01 --> 00:00:02\n没有毫秒\nNo milliseconds\n\n2\n00:00:03,000 --> 00:00:04\n一半\nHalf\n\n"
+     .encode("utf-8"), "时间戳省略了毫秒"),
+    ("separated", ".srt",
+     "1\n00:00:01,000 --> 00:00:02,000\n你好\n\n2\n00:00:01,000 --> 00:00:02,000\nHello\n\n"
+     "3\n00:00:03,000 --> 00:00:04,000\n再見\n\n4\n00:00:03,000 --> 00:00:04,000\nGoodbye\n\n".encode("utf-8"),
+     "分离格式：中文和英文是时间相同的两条"),
+    ("single_language", ".srt",
+     "1\n00:00:01,000 --> 00:00:02,000\n只有中文\n\n2\n00:00:02,000 --> 00:00:03,000\nEnglish only\n\n"
+     "3\n00:00:03,000 --> 00:00:04,000\n一\n二\nThree\n\n".encode("utf-8"), "只有一种语言或有三行的条目"),
+    ("html_tags", ".srt",
+     "1\n00:00:01,000 --> 00:00:02,000\n{\\an8}<i>斜体中文</i>\n<font color=\"#ffffff\">Tagged</font>\n\n"
+     .encode("utf-8"), "HTML 标签和 ASS 特效标签"),
+    ("ass_events", ".ass",
+     "[Script Info]\nScriptType: v4.00+\n\n[Events]\n"
+     "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+     "Dialogue: 0,0:00:01.50,0:00:03.00,Default,,0,0,0,,{\\fs20}你好，世界\\NHello, world\n"
+     "Comment: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,注释不输出\n"
+     "Dialogue: 0,0:00:04.00,0:00:05.00,Default,,0,0,0,,逗号, 在文字中\\nSoft break\\NThird\n"
+     "Dialogue: 0,1:02:03.07,1:02:04.00,Default,,0,0,0,,只有中文\n".encode("utf-8"),
+     "ASS：\\N 和 \\n 换行、Comment、文字中的逗号"),
+    ("ass_crlf_bom", ".ass",
+     codecs.BOM_UTF8 + crlf(
+         "[Script Info]\nScriptType: v4.00+\n\n[Events]\n"
+         "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+         "Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,中文\\NEnglish\n").encode("utf-8"),
+     "带 BOM 和 CRLF 的 ASS"),
+    ("ass_separated", ".ass",
+     "[Script Info]\nScriptType: v4.00+\n\n[Events]\n"
+     "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+     "Dialogue: 0,0:00:01.00,0:00:02.00,CN,,0,0,0,,你好\n"
+     "Dialogue: 0,0:00:03.00,0:00:04.00,CN,,0,0,0,,再見\n"
+     "Dialogue: 0,0:00:05.00,0:00:06.00,CN,,0,0,0,,只有中文\n"
+     "Dialogue: 0,0:00:01.00,0:00:02.00,EN,,0,0,0,,Hello\n"
+     "Dialogue: 0,0:00:03.00,0:00:04.00,EN,,0,0,0,,{\\i1}Goodbye\n".encode("utf-8"),
+     "双语 ASS：中文和英文是时间相同的两个事件，先全部中文再全部英文"),
+]
+
+
+def case_file_name(name, extension):
+    return f"{name}{extension}"
+
+
+def write_edge_cases(directory, names=None):
+    """ 把边界情况写入 directory，返回 [(名称, 路径, 说明), ...]；names 为 None 时写出全部 """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for name, extension, data, description in EDGE_CASES:
+        if names is not None and name not in names:
+            continue
+        path = os.path.join(directory, case_file_name(name, extension))
+        with open(path, "wb") as file:
+            file.write(data)
+        written.append((name, path, description))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="写出等价性测试使用的边界情况字幕")
+    parser.add_argument("--out", required=True, help="输出目录")
+    args = parser.parse_args(argv)
+    for name, path, description in write_edge_cases(args.out):
+        print(f"{path}\t{description}")
+
+
+if __name__ == "__main__":
+    main()
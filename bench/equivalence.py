@@ -0,0 +1,481 @@
+"""
+差分等价性测试：用 edge_cases.py 中的边界情况字幕运行每种实现，逐字节和 bench/golden 中的标准输出比较
+
+优化解析和添加样式的代码时，很容易在边界情况上悄悄改变输出。这里对每个模板、每种输出方式分别保存一份标准输出：
+keep 为空行也输出换行符（命令行版本），drop 为空行不输出（GUI 版本），ass 为原生 ASS 输出。
+参加比较的实现：
+engine    srtformat.style_file
+mapped    srtformat.style_file 强制使用内存映射扫描（大文件的路径）
+pipeline  异步流水线在执行器中调用的 render_file
+cli       cli/main.py 的 style_subtitles（只有 keep）
+gui       gui/gui_version.py 的 add_styles_to_subtitles（只有 drop）
+新的实现用 --engine 名称=模块:函数 加入比较，函数的参数与 style_file 相同
+(输入文件, 输出文件, 中文样式前缀, 英文样式前缀, keep_empty_breaks)。
+
+输出不同时给出第一个不同的字节位置、前后的字节和按行的差异；有任何不同或出错时以状态码 1 退出，可以放在 CI 中。
+
+标准输出不由被测的代码生成，来自基线版本（git 中优化之前的版本，默认为第一个提交）：keep 方式来自基线的 cli/main.py
+（只依赖标准库，它固定的样式前缀换成模板的前缀后比较），drop 方式来自基线的 gui/gui_version.py（需要 chardet，
+ASS 字幕还需要 pysubs2；tkinter 和 tkinterdnd2 导入时用空模块代替，不需要安装，也不需要显示器）。
+--update-golden 运行基线版本并写入它的输出，--check-baseline 只比较不写入。有意与基线不同的字幕按输出方式列在
+BASELINE_CHANGES 中并注明原因，它们和 ass 方式（基线中没有原生 ASS 输出）的标准输出一样是人工检查过的：
+--update-golden 只为新增的边界情况生成缺少的文件，不会覆盖已有的文件；要有意改变它们，先删除对应的文件，重新生成后检查差异再提交。
+
+用法：python bench/equivalence.py [--engine fast=mymodule:style_file] [--update-golden | --check-baseline] [--json]
+"""
+import argparse
+import difflib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.normpath(os.path.join(BENCH_DIR, ".."))
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from bench_pipeline import STYLE_TEMPLATE, load_module  # noqa: E402
+from edge_cases import EDGE_CASES, write_edge_cases  # noqa: E402
+from srtformat import engine, style_file  # noqa: E402
+from srtformat.templates import compile_template_styles  # noqa: E402
+
+# 生成标准输出的模板；模板名用作 golden 下的目录名
+TEMPLATES = {
+    "default": STYLE_TEMPLATE,
+    "styled": dict(STYLE_TEMPLATE, chinese_font="楷体", english_font="Arial", english_font_size="10",
+                   english_bold=True, chinese_italic=True, english_blur=True, shadow_opacity="128"),
+}
+
+# 输出方式 -> (输出文件扩展名, keep_empty_breaks)
+MODES = {
+    "keep": (".srt", True),
+    "drop": (".srt", False),
+    "ass": (".ass", False),
+}
+
+# 输出方式 -> 基线版本中的实现；基线版本默认为第一个提交，用 --baseline-rev 指定其他版本
+BASELINE_MODULES = {
+    "keep": "cli/main.py",
+    "drop": "gui/gui_version.py",
+}
+# 基线的 GUI 版本导入了这些图形界面模块，比较时不创建窗口，导入时用空模块代替，没有显示器或没有安装时也能运行
+HEADLESS_MODULES = ("tkinter", "tkinter.filedialog", "tkinter.messagebox", "tkinterdnd2")
+# 基线的命令行版本中固定的中英文样式前缀（只有字体和字号可以改变）
+BASELINE_CLI_STYLES = (r"{{\fn{font}\fs{font_size}\1c&HC8C8C8&}}", r"{{\fn{font}\fs{font_size}\1c&H0F94CB&\b0}}")
+
+# 每种输出方式中与基线版本的输出有意不同的字幕和原因，这些标准输出不按基线生成
+BASELINE_CHANGES = {
+    "keep": {
+        "utf16_bom": "按 BOM 识别 UTF-16，基线的命令行版本只按 UTF-8 读取，出错",
+        "utf16_no_bom": "不把没有 BOM 的 UTF-16 当作 UTF-8，基线的命令行版本按 UTF-8 读取，每个字符后面多出 \\x00",
+        "gbk": "自动识别 GBK 编码，基线的命令行版本只按 UTF-8 读取，出错",
+        "cp1252": "自动识别 cp1252 编码，基线的命令行版本只按 UTF-8 读取，出错",
+        "dot_timestamps": "时间轴统一输出为 SRT 格式（逗号、两位数字和三位毫秒），基线原样输出",
+        "no_milliseconds": "省略的毫秒补为 ,000，基线原样输出",
+        "separated": "中文和英文分成两条、时间相同的字幕合并为一条，基线的命令行版本逐条输出",
+        "single_language": "只有英文的行使用英文样式；三行的条目保留第三行，基线只输出前两行",
+        "ass_events": "支持 ASS 输入，基线的命令行版本只读取 SRT，输出为空",
+        "ass_crlf_bom": "支持 ASS 输入，基线的命令行版本只读取 SRT，输出为空",
+        "ass_separated": "支持 ASS 输入，基线的命令行版本只读取 SRT，输出为空",
+    },
+    "drop": {
+        "cp1252": "只有英文的行按内容使用英文样式，基线总是把每条的第一行当作中文",
+        "single_language": "只有英文的行使用英文样式；三行的条目保留第三行，基线只输出前两行",
+        "dot_timestamps": "时间轴统一输出为 SRT 格式（逗号、两位数字和三位毫秒），基线原样输出",
+        "no_milliseconds": "省略的毫秒补为 ,000，基线原样输出",
+        "ass_events": "ASS 中三行的事件保留第三行，基线转换为 SRT 后只输出前两行",
+    },
+}
+
+# 不按基线生成的文件（ass 方式和 BASELINE_CHANGES 中的字幕）由这个实现生成一次（只在文件缺少时），检查后提交
+REFERENCE_ENGINE = "engine"
+
+# 差异报告中第一个不同字节前后显示的字节数和最多显示的差异行数
+DIFF_CONTEXT_BYTES = 24
+DIFF_MAX_LINES = 20
+
+
+def run_style_file(input_file, output_file, chinese_style, english_style, keep_empty_breaks):
+    style_file(input_file, output_file, chinese_style, english_style, keep_empty_breaks=keep_empty_breaks,
+               newline="\n")
+
+
+def run_mapped(input_file, output_file, chinese_style, english_style, keep_empty_breaks):
+    # 把内存映射扫描的阈值临时改为 0，小文件也走大文件的路径
+    threshold = engine.MAPPED_SCAN_SIZE
+    engine.MAPPED_SCAN_SIZE = 0
+    try:
+        run_style_file(input_file, output_file, chinese_style, english_style, keep_empty_breaks)
+    finally:
+        engine.MAPPED_SCAN_SIZE = threshold
+
+
+def run_render_file(input_file, output_file, chinese_style, english_style, keep_empty_breaks):
+    from srtformat.pipeline import read_input, render_file
+    from srtformat.writer import write_bytes
+
+    styles = [(engine.output_format_for(output_file), chinese_style, english_style)]
+    write_bytes(output_file, render_file(input_file, read_input(input_file), styles, keep_empty_breaks,
+                                         newline="\n")[0], fsync=False)
+
+
+def cli_runner(cli):
+    def run(input_file, output_file, chinese_style, english_style, keep_empty_breaks):
+        cli.style_subtitles(input_file, output_file, chinese_style, english_style)
+    return run
+
+
+def gui_runner(gui):
+    # GUI 版本按模板的各个字段生成样式前缀，多接收一个模板参数
+    def run(input_file, output_file, chinese_style, english_style, keep_empty_breaks, template):
+        result = gui.add_styles_to_subtitles(input_file, output_file, *[template[field] for field in (
+            "chinese_font", "english_font", "chinese_font_size", "english_font_size", "chinese_font_color",
+            "english_font_color", "chinese_bold", "english_bold", "chinese_italic", "english_italic",
+            "chinese_blur", "english_blur", "shadow_opacity")])
+        if result != output_file:
+            raise RuntimeError(result)
+    return run
+
+
+def baseline_cli_runner(cli):
+    # 基线的命令行版本只接收字体和字号，样式前缀是固定的：把输出中的固定前缀换成模板的样式前缀，
+    # 其他内容（空行的 {\r}、时间轴、编号）原样比较。两个模板的颜色都与基线相同
+    def run(input_file, output_file, chinese_style, english_style, keep_empty_breaks, template):
+        cli.add_styles_to_subtitles(input_file, output_file, template["chinese_font"], template["english_font"],
+                                    template["chinese_font_size"], template["english_font_size"])
+        with open(output_file, "rb") as file:
+            data = file.read()
+        fonts = ((template["chinese_font"], template["chinese_font_size"], chinese_style),
+                 (template["english_font"], template["english_font_size"], english_style))
+        for fixed_style, (font, font_size, style) in zip(BASELINE_CLI_STYLES, fonts):
+            data = data.replace(fixed_style.format(font=font, font_size=font_size).encode("utf-8"),
+                                style.encode("utf-8"))
+        with open(output_file, "wb") as file:
+            file.write(data)
+    return run
+
+
+class _HeadlessStub(type):
+    # 代替图形界面模块中的任何名称：属性也是这个类，可以作为基类，基线的窗口类可以定义但不会创建
+    def __getattr__(cls, name):
+        return cls
+
+
+class _Headless(metaclass=_HeadlessStub):
+    pass
+
+
+def _headless_module(name):
+    module = types.ModuleType(name)
+    module.__getattr__ = lambda attribute: _Headless
+    return module
+
+
+def _load_baseline_module(revision, mode, relative_path):
+    # 取出基线版本的一个文件并导入，GUI 版本导入时用空模块代替图形界面模块，返回 (模块, 错误信息)
+    try:
+        source = subprocess.check_output(["git", "show", f"{revision}:{relative_path}"], cwd=ROOT_DIR,
+                                         stderr=subprocess.PIPE)
+    except (OSError, subprocess.CalledProcessError) as e:
+        return None, f"无法从 git 取出基线版本的 {relative_path}：{e}"
+    directory = tempfile.mkdtemp(prefix="srtformat-baseline-")
+    path = os.path.join(directory, os.path.basename(relative_path))
+    with open(path, "wb") as file:
+        file.write(source)
+    saved = {name: sys.modules.get(name) for name in HEADLESS_MODULES}
+    sys.modules.update((name, _headless_module(name)) for name in HEADLESS_MODULES)
+    try:
+        module, error = load_module(f"equivalence_baseline_{mode}", path)
+    finally:
+        for name, previous in saved.items():
+            if previous is None:
+                del sys.modules[name]
+            else:
+                sys.modules[name] = previous
+    if module is None:
+        return None, f"无法导入基线版本 {revision} 的 {relative_path}：{error}"
+    return module, None
+
+
+def load_baseline(revision=None):
+    """
+    从 git 取出基线版本的 cli/main.py 和 gui/gui_version.py 并导入，返回 ({输出方式: 运行函数}, {输出方式: 错误信息})
+    revision 为 None 时使用第一个提交；运行函数的参数与 gui 相同（多接收一个模板参数）
+    """
+    try:
+        if revision is None:
+            revision = subprocess.check_output(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=ROOT_DIR,
+                                               text=True, stderr=subprocess.PIPE).split()[-1]
+    except (OSError, IndexError, subprocess.CalledProcessError) as e:
+        return {}, {mode: f"无法从 git 找到第一个提交：{e}" for mode in BASELINE_MODULES}
+    runners = {}
+    errors = {}
+    for mode, relative_path in BASELINE_MODULES.items():
+        module, error = _load_baseline_module(revision, mode, relative_path)
+        if module is None:
+            errors[mode] = error
+        else:
+            runners[mode] = baseline_cli_runner(module) if mode == "keep" else gui_runner(module)
+    return runners, errors
+
+
+def load_engines(names, candidates=()):
+    """
+    返回 ({名称: (函数, 支持的输出方式, 是否使用系统换行符, 是否需要模板)}, {跳过的名称: 原因})
+    cli 和 gui 按 bench_pipeline 的方式导入，依赖缺失时跳过
+    """
+    engines = {}
+    skipped = {}
+    for name in names:
+        if name == "engine":
+            engines[name] = (run_style_file, tuple(MODES), False, False)
+        elif name == "mapped":
+            engines[name] = (run_mapped, tuple(MODES), False, False)
+        elif name == "pipeline":
+            engines[name] = (run_render_file, tuple(MODES), False, False)
+        elif name in ("cli", "gui"):
+            relative_path = os.path.join("cli", "main.py") if name == "cli" else os.path.join("gui", "gui_version.py")
+            module, error = load_module(f"equivalence_{name}", relative_path)
+            if module is None:
+                skipped[name] = error
+            elif name == "cli":
+                engines[name] = (cli_runner(module), ("keep",), True, False)
+            else:
+                engines[name] = (gui_runner(module), ("drop",), True, True)
+        else:
+            skipped[name] = "未知的实现"
+    for candidate in candidates:
+        name, separator, target = candidate.partition("=")
+        module_name, _, function_name = target.partition(":")
+        if not separator or not module_name or not function_name:
+            raise SystemExit(f"--engine 的格式应为 名称=模块:函数：{candidate}")
+        try:
+            engines[name] = (getattr(importlib.import_module(module_name), function_name), tuple(MODES), False, False)
+        except (ImportError, AttributeError) as e:
+            skipped[name] = f"{type(e).__name__}: {e}"
+    return engines, skipped
+
+
+def golden_path(template_name, case_name, mode):
+    return os.path.join(GOLDEN_DIR, template_name, f"{case_name}.{mode}{MODES[mode][0]}")
+
+
+def read_golden(path):
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def describe_line(line):
+    # 按 UTF-8 显示一行，换行符、BOM 和不能解码的字节转义后显示
+    return repr(line.decode("utf-8", "backslashreplace"))
+
+
+def byte_diff(expected, actual):
+    """ 描述两个字节串的差异：第一个不同的位置（字节偏移和行号）、前后的字节和按行的差异 """
+    offset = next((index for index, (left, right) in enumerate(zip(expected, actual)) if left != right),
+                  min(len(expected), len(actual)))
+    start = max(0, offset - DIFF_CONTEXT_BYTES)
+    end = offset + DIFF_CONTEXT_BYTES
+    diff_lines = list(difflib.unified_diff(
+        [describe_line(line) for line in expected.splitlines(keepends=True)],
+        [describe_line(line) for line in actual.splitlines(keepends=True)],
+        "golden", "actual", lineterm="", n=1))
+    return {
+        "offset": offset,
+        "line": expected.count(b"\n", 0, offset) + 1,
+        "expected_bytes": len(expected),
+        "actual_bytes": len(actual),
+        "expected": repr(expected[start:end]),
+        "actual": repr(actual[start:end]),
+        "diff": diff_lines[:DIFF_MAX_LINES] + (["..."] if len(diff_lines) > DIFF_MAX_LINES else []),
+    }
+
+
+def run_engine(runner, input_file, output_file, styles, keep_empty_breaks, native_newline, extra_args=()):
+    """ 运行一种实现，返回 (输出的字节串, 错误信息) """
+    try:
+        runner(input_file, output_file, *styles, keep_empty_breaks, *extra_args)
+        with open(output_file, "rb") as file:
+            data = file.read()
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}".strip()
+    finally:
+        if os.path.exists(output_file):
+            os.remove(output_file)
+    if native_newline and os.linesep != "\n":
+        # cli 和 gui 按系统换行符写出，标准输出统一为 LF
+        data = data.replace(os.linesep.encode("ascii"), b"\n")
+    return data, None
+
+
+def write_golden(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def compare(engines, case_names=None, template_names=None, modes=None, update_golden=False, keep_dir=None,
+            baseline=None):
+    """
+    运行所有组合，返回结果列表，每项为一个 (模板, 字幕, 输出方式, 实现) 组合
+    :param baseline: load_baseline 返回的 {输出方式: 运行函数}；给出时基线版本在这些输出方式中作为名为 baseline 的实现
+                     参加比较，update_golden 时这些输出方式的标准输出按它的输出写入（BASELINE_CHANGES 中的字幕除外）
+    """
+    baseline = baseline or {}
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        cases = write_edge_cases(os.path.join(work_dir, "input"), case_names)
+        for template_name in template_names or TEMPLATES:
+            template = TEMPLATES[template_name]
+            styles = compile_template_styles(template)
+            for case_name, input_file, _ in cases:
+                for mode in modes or MODES:
+                    extension, keep_empty_breaks = MODES[mode]
+                    path = golden_path(template_name, case_name, mode)
+                    golden = read_golden(path)
+                    outputs = {}
+                    if mode in baseline:
+                        baseline_file = os.path.join(work_dir, f"baseline{extension}")
+                        outputs["baseline"] = run_engine(baseline[mode], input_file, baseline_file, styles,
+                                                         keep_empty_breaks, True, (template,))
+                    for engine_name, (runner, supported_modes, native_newline, takes_template) in engines.items():
+                        if mode not in supported_modes:
+                            continue
+                        output_file = os.path.join(work_dir, f"{engine_name}{extension}")
+                        outputs[engine_name] = run_engine(runner, input_file, output_file, styles, keep_empty_breaks,
+                                                          native_newline, (template,) if takes_template else ())
+
+                    from_baseline = mode in BASELINE_MODULES and case_name not in BASELINE_CHANGES[mode]
+                    updated = False
+                    if update_golden and from_baseline:
+                        # 只按基线版本的输出更新，基线不能运行时保持原样
+                        data = outputs.get("baseline", (None,))[0]
+                        if data is not None and data != golden:
+                            golden = data
+                            updated = True
+                            write_golden(path, golden)
+                    elif update_golden and golden is None and outputs.get(REFERENCE_ENGINE, (None,))[0] is not None:
+                        # 基线中没有的标准输出只在缺少时生成一次，已有的文件不会被被测的代码覆盖
+                        golden = outputs[REFERENCE_ENGINE][0]
+                        updated = True
+                        write_golden(path, golden)
+
+                    for engine_name, (data, error) in outputs.items():
+                        record = {"template": template_name, "case": case_name, "mode": mode,
+                                  "engine": engine_name, "golden": os.path.relpath(path, ROOT_DIR)}
+                        if updated:
+                            record["updated"] = True
+                        if engine_name == "baseline" and not from_baseline:
+                            # 有意不同的字幕，基线的输出（或基线不能处理时的错误）只用于报告
+                            record["status"] = "changed"
+                            record["reason"] = BASELINE_CHANGES[mode][case_name]
+                        elif error:
+                            record["status"] = "error"
+                            record["error"] = error
+                        elif golden is None:
+                            record["status"] = "no-golden"
+                        elif data == golden:
+                            record["status"] = "ok"
+                        else:
+                            record["status"] = "diff"
+                            record["diff"] = byte_diff(golden, data)
+                            if keep_dir:
+                                actual_path = os.path.join(keep_dir, template_name,
+                                                           f"{case_name}.{mode}.{engine_name}{extension}")
+                                os.makedirs(os.path.dirname(actual_path), exist_ok=True)
+                                with open(actual_path, "wb") as file:
+                                    file.write(data)
+                                record["actual"] = actual_path
+                        results.append(record)
+    return results
+
+
+def print_report(results, skipped):
+    for name, reason in skipped.items():
+        print(f"跳过 {name}：{reason}")
+    updated = sorted({record["golden"] for record in results if record.get("updated")})
+    for path in updated:
+        print(f"已更新标准输出 {path}，请检查差异后提交")
+    for record in results:
+        if record["status"] == "ok":
+            continue
+        label = f"{record['template']}/{record['case']}.{record['mode']} [{record['engine']}]"
+        if record["status"] == "changed":
+            print(f"有意改变 {label}：{record['reason']}")
+        elif record["status"] == "error":
+            print(f"出错 {label}：{record['error']}")
+        elif record["status"] == "no-golden":
+            print(f"缺少标准输出 {label}：{record['golden']}")
+        else:
+            diff = record["diff"]
+            print(f"不同 {label}：第 {diff['line']} 行，偏移 {diff['offset']}，"
+                  f"字节数 {diff['expected_bytes']} -> {diff['actual_bytes']}")
+            print(f"    golden: {diff['expected']}")
+            print(f"    actual: {diff['actual']}")
+            for line in diff["diff"]:
+                print(f"    {line}")
+            if "actual" in record:
+                print(f"    实际输出已保存到 {record['actual']}")
+    counts = {}
+    for record in results:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    print(f"共 {len(results)} 项：相同 {counts.get('ok', 0)}，不同 {counts.get('diff', 0)}，"
+          f"出错 {counts.get('error', 0)}，缺少标准输出 {counts.get('no-golden', 0)}，"
+          f"与基线有意不同 {counts.get('changed', 0)}")
+
+
+def parse_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="用边界情况字幕比较各实现的输出和标准输出")
+    parser.add_argument("--engines", type=parse_list, default=["engine", "mapped", "pipeline", "cli", "gui"],
+                        help="参加比较的实现，逗号分隔")
+    parser.add_argument("--engine", dest="candidates", metavar="NAME=MODULE:FUNCTION", action="append", default=[],
+                        help="加入比较的新实现，函数的参数与 style_file 相同；可以多次指定")
+    parser.add_argument("--cases", type=parse_list, default=None,
+                        help="只比较这些字幕，逗号分隔，可用：" + ", ".join(name for name, _, _, _ in EDGE_CASES))
+    parser.add_argument("--templates", type=parse_list, default=None, help="只比较这些模板：" + ", ".join(TEMPLATES))
+    parser.add_argument("--modes", type=parse_list, default=None, help="只比较这些输出方式：" + ", ".join(MODES))
+    golden = parser.add_mutually_exclusive_group()
+    golden.add_argument("--update-golden", action="store_true",
+                        help=f"按基线版本的输出重新生成 {', '.join(BASELINE_MODULES)} 方式的标准输出；其他缺少的标准输出按 "
+                             f"{REFERENCE_ENGINE} 的输出生成，已有的文件不会覆盖")
+    golden.add_argument("--check-baseline", action="store_true", help="运行基线版本，检查标准输出与它的输出是否相同")
+    parser.add_argument("--baseline-rev", metavar="REV", default=None, help="基线版本，默认为 git 中的第一个提交")
+    parser.add_argument("--keep", metavar="DIR", help="把和标准输出不同的实际输出保存到这个目录")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    engines, skipped = load_engines(args.engines, args.candidates)
+    baseline = None
+    if args.update_golden or args.check_baseline:
+        baseline, errors = load_baseline(args.baseline_rev)
+        errors = {mode: error for mode, error in errors.items() if mode in (args.modes or MODES)}
+        for mode, error in errors.items():
+            skipped[f"baseline ({mode})"] = error
+            if args.check_baseline:
+                print(error, file=sys.stderr)
+        if errors and args.check_baseline:
+            return 2
+    results = compare(engines, args.cases, args.templates, args.modes, args.update_golden, args.keep, baseline)
+    if args.json:
+        print(json.dumps({"skipped": skipped, "results": results}, ensure_ascii=False, indent=2))
+    else:
+        print_report(results, skipped)
+    failed = any(record["status"] in ("diff", "error") for record in results)
+    missing = any(record["status"] == "no-golden" for record in results)
+    return 1 if failed or (missing and not args.update_golden) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+启动时间测试：用 python -X importtime 统计两个入口的导入耗时，并和 startup_budget.json 中的预算比较
+
+在钩子里按文件调用命令行版本时，解释器启动和导入模块占每次运行的很大一部分。每个场景在新的解释器中
+运行多次，取导入耗时（不含解释器自身启动时导入的模块）和总耗时的中位数；同时检查不应加载的模块，
+例如处理 UTF-8 的 SRT 时不应导入 chardet，只调用 add_styles_to_subtitles 时不应导入 Tk。
+超出预算或加载了不应加载的模块时以状态码 1 退出，可以放在 CI 中。
+
+用法：python bench/startup.py [--repeat 7] [--json] [--update]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.normpath(os.path.join(BENCH_DIR, ".."))
+BUDGET_PATH = os.path.join(BENCH_DIR, "startup_budget.json")
+
+# 更新预算时在测得的中位数上留出的余量
+BUDGET_HEADROOM = 1.5
+
+# 处理 UTF-8 标准 SRT 时都不应加载的模块
+HEAVY_MODULES = ["chardet", "pysubs2", "tkinter", "tkinterdnd2"]
+# 只处理单个文件时不需要进程池和监视模式
+CLI_LAZY_MODULES = HEAVY_MODULES + ["concurrent.futures", "multiprocessing", "srtformat.watch"]
+
+SAMPLE_SRT = "".join(
+    f"{index}\n00:00:{index:02d},000 --> 00:00:{index:02d},900\n中文字幕第{index}行\nEnglish line {index}\n\n"
+    for index in range(1, 51))
+
+
+def scenarios(work_dir):
+    """ 返回 [(名称, 命令行参数, 不应加载的模块), ...] """
+    sample = os.path.join(work_dir, "sample.srt")
+    with open(sample, "w", encoding="utf-8") as file:
+        file.write(SAMPLE_SRT)
+    output = os.path.join(work_dir, "styled.srt")
+
+    def import_code(directory, module):
+        return f"import sys; sys.path.insert(0, {directory!r}); import {module}"
+
+    return [
+        ("srtformat", ["-c", import_code(ROOT_DIR, "srtformat")], CLI_LAZY_MODULES),
+        ("gui-core", ["-c", import_code(os.path.join(ROOT_DIR, "gui"), "gui_version")], HEAVY_MODULES),
+        ("cli-import", ["-c", import_code(os.path.join(ROOT_DIR, "cli"), "main")], CLI_LAZY_MODULES),
+        ("cli-one-file", [os.path.join(ROOT_DIR, "cli", "main.py"), sample, "-q", "-o", output], CLI_LAZY_MODULES),
+    ]
+
+
+def parse_importtime(stderr):
+    """ 解析 -X importtime 的输出，返回 [(模块名, 缩进层级, 累计微秒), ...] """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # 格式为 "import time: 自身 | 累计 | 模块名"，模块名前每两个空格表示一层嵌套
+        _, cumulative, name = line.split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+    return entries
+
+
+def run_once(args):
+    """ 在新的解释器中运行一次，返回 (总耗时秒, 导入记录) """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, capture_output=True, text=True,
+                            cwd=ROOT_DIR)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"运行失败（{result.returncode}）：{' '.join(args)}\n{result.stderr[-2000:]}")
+    return elapsed, parse_importtime(result.stderr)
+
+
+def interpreter_modules():
+    """ 解释器启动时（site 等）就会导入的顶层模块，不计入各场景的导入耗时 """
+    _, entries = run_once(["-c", "pass"])
+    return {name for name, depth, _ in entries if depth == 0}
+
+
+def measure(name, args, forbidden, baseline, repeat):
+    import_times = []
+    wall_times = []
+    loaded = set()
+    for _ in range(repeat):
+        elapsed, entries = run_once(args)
+        wall_times.append(elapsed)
+        import_times.append(sum(cumulative for module, depth, cumulative in entries
+                                if depth == 0 and module not in baseline) / 1000)
+        loaded.update(module for module, _, _ in entries)
+    unexpected = sorted(module for module in forbidden
+                        if module in loaded or any(loaded_name.startswith(module + ".") for loaded_name in loaded))
+    return {
+        "scenario": name,
+        "import_ms": round(statistics.median(import_times), 2),
+        "wall_ms": round(statistics.median(wall_times) * 1000, 2),
+        "modules": len(loaded),
+        "unexpected_modules": unexpected,
+    }
+
+
+def load_budget(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="用 -X importtime 测试两个入口的启动时间，并检查预算")
+    parser.add_argument("--repeat", type=int, default=7, help="每个场景运行的次数，取中位数")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="预算文件")
+    parser.add_argument("--update", action="store_true",
+                        help=f"按这次测得的导入耗时乘以 {BUDGET_HEADROOM} 更新预算文件")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        baseline = interpreter_modules()
+        results = [measure(name, command, forbidden, baseline, args.repeat)
+                   for name, command, forbidden in scenarios(work_dir)]
+
+    budget = load_budget(args.budget)
+    failed = False
+    for result in results:
+        limit = budget.get(result["scenario"], {}).get("import_ms")
+        result["budget_ms"] = limit
+        result["ok"] = not result["unexpected_modules"] and (limit is None or result["import_ms"] <= limit)
+        failed = failed or not result["ok"]
+
+    if args.update:
+        budget = {result["scenario"]: {"import_ms": round(result["import_ms"] * BUDGET_HEADROOM, 1)}
+                  for result in results}
+        with open(args.budget, "w", encoding="utf-8") as file:
+            json.dump(budget, file, ensure_ascii=False, indent=4)
+            file.write("\n")
+
+    if args.json:
+        print(json.dumps({"python": sys.version.split()[0], "results": results}, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'场景':<14}{'导入 ms':>10}{'预算 ms':>10}{'总耗时 ms':>12}{'模块数':>8}  结果")
+        for result in results:
+            status = "OK" if result["ok"] else "超出预算"
+            if result["unexpected_modules"]:
+                status = "加载了 " + ", ".join(result["unexpected_modules"])
+            limit = "-" if result["budget_ms"] is None else f"{result['budget_ms']:.1f}"
+            print(f"{result['scenario']:<14}{result['import_ms']:>10.1f}{limit:>10}{result['wall_ms']:>12.1f}"
+                  f"{result['modules']:>8}  {status}")
+    return 1 if failed and not args.update else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+吞吐量回归测试：用 corpus.py 生成的合成字幕测量每种实现的 cues/s，并和 throughput_budget.json 中的下限比较
+
+与 equivalence.py 使用相同的实现（engine、mapped、pipeline、cli、gui 和 --engine 给出的新实现）。
+每个组合运行多次取最快的一次，低于下限时以状态码 1 退出，可以和 equivalence.py 一起放在 CI 中。
+下限与机器有关，换了运行环境后先用 --update 按当前结果重新生成（测得的吞吐量除以余量）。
+
+用法：python bench/throughput.py [--cues 20000] [--repeat 5] [--engine fast=mymodule:style_file] [--update]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import STYLE_TEMPLATE  # noqa: E402
+from corpus import generate_corpus_file, parse_list  # noqa: E402
+from equivalence import load_engines, run_engine  # noqa: E402
+from srtformat.templates import compile_template_styles  # noqa: E402
+
+BUDGET_PATH = os.path.join(BENCH_DIR, "throughput_budget.json")
+
+# 更新下限时把测得的吞吐量除以这个余量，避免机器负载的波动导致误报
+BUDGET_HEADROOM = 2.0
+
+# 测试的字幕类型和编码；mapped 只对标准格式有意义，其他类型会退回普通路径
+KINDS = ("standard", "separated", "ass")
+ENCODING = "utf-8"
+
+
+def measure(runner, input_file, output_file, styles, native_newline, extra_args, repeat):
+    """ 运行 repeat 次，返回最快一次的秒数；出错时抛出 RuntimeError """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, error = run_engine(runner, input_file, output_file, styles, True, native_newline, extra_args)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise RuntimeError(error)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def load_budget(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量各实现的吞吐量，并检查是否低于下限")
+    parser.add_argument("--engines", type=parse_list, default=["engine", "mapped", "pipeline"],
+                        help="要测试的实现，逗号分隔，可用 engine、mapped、pipeline、cli、gui")
+    parser.add_argument("--engine", dest="candidates", metavar="NAME=MODULE:FUNCTION", action="append", default=[],
+                        help="要测试的新实现，函数的参数与 style_file 相同；可以多次指定")
+    parser.add_argument("--kinds", type=parse_list, default=list(KINDS), help="字幕类型，逗号分隔")
+    parser.add_argument("--cues", type=int, default=20000, help="每个文件的字幕条数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个组合运行的次数，取最快的一次")
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "srtformat-bench"),
+                        help="合成字幕文件的缓存目录")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="下限文件")
+    parser.add_argument("--update", action="store_true",
+                        help=f"按这次测得的吞吐量除以 {BUDGET_HEADROOM} 更新下限文件")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    engines, skipped = load_engines(args.engines, args.candidates)
+    styles = compile_template_styles(STYLE_TEMPLATE)
+    budget = load_budget(args.budget)
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for kind in args.kinds:
+            input_file = generate_corpus_file(args.corpus_dir, kind, ENCODING, args.cues)
+            byte_count = os.path.getsize(input_file)
+            for engine_name, (runner, _, native_newline, takes_template) in engines.items():
+                if engine_name == "mapped" and kind != "standard":
+                    continue
+                scenario = f"{engine_name}/{kind}"
+                result = {"scenario": scenario, "cues": args.cues, "bytes": byte_count}
+                try:
+                    seconds = measure(runner, input_file, os.path.join(output_dir, "styled.srt"), styles,
+                                      native_newline, (STYLE_TEMPLATE,) if takes_template else (), args.repeat)
+                except RuntimeError as e:
+                    result.update(error=str(e), ok=False)
+                    results.append(result)
+                    continue
+                limit = budget.get(scenario, {}).get("cues_per_s")
+                cues_per_s = args.cues / seconds
+                result.update(seconds=round(seconds, 6), cues_per_s=round(cues_per_s, 1),
+                              mb_per_s=round(byte_count / seconds / 1e6, 3), budget_cues_per_s=limit,
+                              ok=limit is None or cues_per_s >= limit)
+                results.append(result)
+
+    if args.update:
+        budget = {result["scenario"]: {"cues_per_s": round(result["cues_per_s"] / BUDGET_HEADROOM)}
+                  for result in results if "error" not in result}
+        with open(args.budget, "w", encoding="utf-8") as file:
+            json.dump(budget, file, ensure_ascii=False, indent=4)
+            file.write("\n")
+
+    if args.json:
+        print(json.dumps({"skipped": skipped, "results": results}, ensure_ascii=False, indent=2))
+    else:
+        for name, reason in skipped.items():
+            print(f"跳过 {name}：{reason}")
+        print(f"{'场景':<22}{'cues/s':>12}{'下限':>12}{'MB/s':>10}  结果")
+        for result in results:
+            if "error" in result:
+                print(f"{result['scenario']:<22}{'-':>12}{'-':>12}{'-':>10}  出错：{result['error']}")
+                continue
+            limit = "-" if result["budget_cues_per_s"] is None else str(result["budget_cues_per_s"])
+            status = "OK" if result["ok"] else "低于下限"
+            print(f"{result['scenario']:<22}{result['cues_per_s']:>12.0f}{limit:>12}{result['mb_per_s']:>10.2f}"
+                  f"  {status}")
+    failed = any(not result["ok"] for result in results)
+    return 1 if failed and not args.update else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,88 +1,779 @@
+import argparse
+import glob
+import io
 import os
+import sys
 
+# 将项目根目录加入模块搜索路径，以便导入共享的 srtformat 包
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from srtformat import (
+    ARCHIVE_EXTENSIONS,
+    MANIFEST_NAME,
+    OUTPUT_ENCODINGS,
+    OUTPUT_FORMATS,
+    OUTPUT_NEWLINES,
+    SUBTITLE_EXTENSIONS,
+    Manifest,
+    SubtitleError,
+    build_output_file,
+    build_retime,
+    build_variant_outputs,
+    compile_template_styles,
+    expand_output_pattern,
+    format_profile_table,
+    get_file_priority,
+    get_registry,
+    is_archive_file,
+    is_subtitle_candidate,
+    iter_formatted_cues,
+    parse_merged_files,
+    retime_cues,
+    select_best_file,
+    select_language_pair,
+    strip_language_tag,
+    output_format_for,
+    style_bytes,
+    style_file,
+    style_file_variants,
+    style_hash,
+    style_merged_files,
+    validate_template,
+    variant_output_prefixes,
+    write_styled,
+)
 
-# 判断文件名中是否包含指定的标识符
-def get_file_priority(file_name):
-    file_name = file_name.lower()  # 转小写方便判断
-    # 定义优先级，越靠前优先级越高
-    if 'chseng' in file_name:
-        return 3
-    elif 'chs' in file_name:
-        return 2
-    elif 'ch' in file_name:
-        return 1
-    else:
-        return 0
+# 默认字体和大小
+DEFAULT_CHINESE_FONT = "寒蝉端黑体 Compact"
+DEFAULT_CHINESE_FONT_SIZE = "18"
+DEFAULT_ENGLISH_FONT_SIZE = "12"
+DEFAULT_CHINESE_COLOR = "#C8C8C8"
+DEFAULT_ENGLISH_COLOR = "#0F94CB"
 
-def add_styles_to_subtitles(input_file, output_file, chinese_font, english_font, chinese_font_size, english_font_size):
+# 进程池、监视模式和 json 在用到时才导入：钩子里按文件调用时，启动时间占每次运行的很大一部分
+# 用 python bench/startup.py 检查导入耗时是否超出预算
+
+# 输入和输出中表示标准输入、标准输出的路径
+STDIN_PATH = "-"
+STDOUT_PATH = "-"
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_INPUT = 3
+EXIT_INTERRUPTED = 130
+
+
+def build_styles(chinese_font, english_font, chinese_font_size, english_font_size):
     # 定义中文和英文的样式前缀
     chinese_style = r"{{\fn{font}\fs{font_size}\1c&HC8C8C8&}}".format(font=chinese_font, font_size=chinese_font_size)
     english_style = r"{{\fn{font}\fs{font_size}\1c&H0F94CB&\b0}}".format(font=english_font, font_size=english_font_size)
+    return chinese_style, english_style
 
-    # 定义换行符，中文使用这个，英文行不加换行符
-    chinese_line_break = r"{\r}"
-    english_line_break = ""
-
-    with open(input_file, 'r', encoding='UTF-8-sig') as file:  # 使用 UTF-8-sig 编码读取文件，以去除 BOM 头，避免干扰，否则会出现乱码
-        lines = file.readlines()
 
-    # 处理字幕并按编号分组
-    subtitle_groups = []
-    i = 0
-    while i < len(lines):
-        subtitle_num = lines[i].strip()  # 获取字幕编号
-        if not subtitle_num.isdigit():
-            i += 1
-            continue
-        i += 1
-        timestamp = lines[i].strip()  # 获取时间戳
-        i += 1
-        chinese_line = lines[i].strip() if i < len(lines) else ""  # 获取中文行
-        i += 1
-        english_line = lines[i].strip() if i < len(lines) else ""  # 获取英文行
-        i += 1
-
-        # 将每个字幕项分成四部分
-        subtitle_groups.append([subtitle_num, timestamp, chinese_line, english_line])
-
-    # 处理每个字幕项，添加样式
-    new_lines = []
-    for group in subtitle_groups:
-        subtitle_num, timestamp, chinese_line, english_line = group
-
-        # 添加字幕编号和时间戳
-        new_lines.append(f"{subtitle_num}")
-        new_lines.append(f"{timestamp}")
-
-        # 如果有中文行，添加中文样式
-        if chinese_line:
-            new_lines.append(f"{chinese_style}{chinese_line}{chinese_line_break}")
-        else:
-            new_lines.append(f"{chinese_line_break}")  # 如果没有中文行，添加换行符
-
-        # 如果有英文行，添加英文样式，并且不加换行符
-        if english_line:
-            new_lines.append(f"{english_style}{english_line}{english_line_break}")
-        else:
-            new_lines.append(f"{english_line_break}")  # 如果没有英文行，添加换行符
+def add_styles_to_subtitles(input_file, output_file, chinese_font, english_font, chinese_font_size, english_font_size):
+    chinese_style, english_style = build_styles(chinese_font, english_font, chinese_font_size, english_font_size)
+    style_subtitles(input_file, output_file, chinese_style, english_style)
 
-        # 每个字幕项之间要添加一个空行
-        new_lines.append('')  # 添加空行作为分隔
 
-    # 写入输出文件
-    with open(output_file, 'w', encoding='utf-8') as file:
-        file.writelines('\n'.join(new_lines) + '\n')
+def style_subtitles(input_file, output_file, chinese_style, english_style):
+    # 使用已生成的样式前缀处理字幕，批量处理时同一模板的样式前缀只生成一次
+    # 编码检测、格式检测（标准、分离、ASS）和流式写出都由 srtformat 完成；没有中文或英文行时输出换行符
+    style_file(input_file, output_file, chinese_style, english_style, keep_empty_breaks=True)
 
 
 def list_srt_files(directory):
-    # 获取指定目录下所有的 .srt 文件（不包括子目录）
+    # 获取指定目录下所有的 .srt、.ass 文件和 .zip 字幕包（不包括子目录）
     srt_files = []
     for file_name in os.listdir(directory):
-        if file_name.endswith(".srt") and os.path.isfile(os.path.join(directory, file_name)):
+        if (file_name.lower().endswith(SUBTITLE_EXTENSIONS + ARCHIVE_EXTENSIONS)
+                and os.path.isfile(os.path.join(directory, file_name))):
             srt_files.append(file_name)
     return srt_files
 
-def main():
+def walk_srt_files(root, skip_prefixes=()):
+    # 递归遍历目录树，按文件夹生成 (文件夹路径, 该文件夹下的字幕文件列表)
+    for directory, _, file_names in os.walk(root):
+        srt_files = [name for name in file_names if is_subtitle_candidate(name, skip_prefixes)]
+        if srt_files:
+            yield directory, sorted(srt_files)
+
+
+def style_job(input_file, outputs, profile=False, output_options=None):
+    # 在工作进程中处理单个文件，outputs 为 [(输出文件, 中文样式前缀, 英文样式前缀), ...]，只解析一次
+    # 返回 (输入文件, 输出文件列表, 错误信息, 各阶段的统计)，profile 为 False 时统计为 None
+    output_files = [output_file for output_file, _, _ in outputs]
+    profiles = []
+    profile_callback = (lambda file_profile: profiles.append(file_profile.as_dict())) if profile else None
+    try:
+        style_file_variants(input_file, outputs, keep_empty_breaks=True, profile_callback=profile_callback,
+                            **(output_options or {}))
+        error = None
+    except Exception as e:
+        error = str(e)
+    return input_file, output_files, error, profiles[0] if profiles else None
+
+
+class Console:
+    # 命令行的输出方式：text 输出每个文件的结果和汇总，quiet 只输出错误，json 每个文件输出一行 JSON
+    # 错误总是写到标准错误；样式输出写到标准输出时，其他信息也改写到标准错误
+    def __init__(self, mode="text", stream=None):
+        self.mode = mode
+        self.stream = stream or sys.stdout
+
+    def info(self, message):
+        if self.mode == "text":
+            print(message, file=self.stream, flush=True)
+
+    def error(self, message):
+        if self.mode != "json":
+            print(message, file=sys.stderr, flush=True)
+
+    def usage_error(self, message):
+        # 参数错误在任何模式下都输出到标准错误
+        print(message, file=sys.stderr, flush=True)
+
+    def print_json(self, value, indent=None):
+        import json
+        print(json.dumps(value, ensure_ascii=False, indent=indent), file=self.stream, flush=True)
+
+    def result(self, input_file, output_files, error=None, status=None, profile=None):
+        if self.mode == "json":
+            record = {"input": input_file, "outputs": output_files, "status": status or ("error" if error else "ok")}
+            if error:
+                record["error"] = error
+            if profile is not None:
+                record["profile"] = profile
+            self.print_json(record)
+        elif error:
+            self.error(f"[失败] {input_file}：{error}")
+        elif status != "unchanged":
+            self.info(f"[完成] {input_file} -> {', '.join(output_files)}")
+
+    def summary(self, processed, failures, unchanged=None):
+        if self.mode == "json":
+            record = {"summary": {"processed": processed, "succeeded": processed - failures, "failed": failures}}
+            if unchanged is not None:
+                record["summary"]["unchanged"] = unchanged
+            self.print_json(record)
+            return
+        summary = f"共处理 {processed} 个文件，成功 {processed - failures} 个，失败 {failures} 个"
+        if unchanged is not None:
+            summary += f"，未变化跳过 {unchanged} 个"
+        self.info(summary + "。")
+
+    def profiles(self, profiles, profile_format):
+        # 输出各文件每个阶段的耗时（毫秒）、字节数和字幕条数；json 模式下已包含在每个文件的记录中
+        if not profiles or self.mode == "json":
+            return
+        if profile_format == "json":
+            self.print_json(profiles, indent=1)
+        elif self.mode == "text":
+            print(format_profile_table(profiles), file=self.stream)
+
+    def pipeline_report(self, report):
+        # 输出流水线的吞吐量统计
+        if self.mode == "json":
+            self.print_json({"pipeline": report.as_dict()})
+        else:
+            self.info(f"[吞吐量] {report.summary()}")
+
+
+def run_jobs(jobs, console, workers=None, manifest=None, styles_hash=None, profile_format=None,
+             output_options=None, pipeline_options=None):
+    # 处理 [(输入文件, [(输出文件, 中文样式前缀, 英文样式前缀), ...]), ...]，返回失败的文件数
+    # 多个文件时用进程池并行处理，只有一个文件或 workers 为 1 时在当前进程中处理，避免启动进程池的开销
+    # 给出 pipeline_options 时改用异步流水线，读取、添加样式和写出同时进行，最后输出吞吐量统计
+    failures = 0
+    profiles = []
+
+    def handle(input_file, output_files, error, file_profile, recorded=False):
+        nonlocal failures
+        if file_profile is not None:
+            profiles.append(file_profile)
+        console.result(input_file, output_files, error, profile=file_profile)
+        if error:
+            failures += 1
+            if manifest is not None:
+                manifest.forget(input_file)
+        elif manifest is not None and not recorded:
+            manifest.record(input_file, output_files, styles_hash)
+
+    profile = profile_format is not None
+    try:
+        if pipeline_options is not None:
+            from srtformat.pipeline import process_files
+            # 记录清单要读取整个输入文件计算哈希，放在流水线的读写线程中进行，不阻塞事件循环
+            after_write = None
+            if manifest is not None:
+                def after_write(input_file, output_files):
+                    manifest.record(input_file, output_files, styles_hash)
+            report = process_files(jobs, style_workers=workers, keep_empty_breaks=True,
+                                   on_result=lambda input_file, output_files, error:
+                                   handle(input_file, output_files, error, None, recorded=True),
+                                   after_write=after_write, **(output_options or {}), **pipeline_options)
+            console.pipeline_report(report)
+        elif len(jobs) == 1 or workers == 1:
+            for input_file, outputs in jobs:
+                handle(*style_job(input_file, outputs, profile, output_options))
+        elif jobs:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(style_job, input_file, outputs, profile, output_options)
+                           for input_file, outputs in jobs]
+                for future in as_completed(futures):
+                    handle(*future.result())
+    finally:
+        # 中途退出时也保存已完成的文件，下次只处理剩下的
+        if manifest is not None:
+            manifest.save()
+    console.profiles(sorted(profiles, key=lambda file_profile: file_profile["file"]), profile_format)
+    return failures
+
+
+def run_batch(root, variants, workers=None, manifest=None, profile_format=None, console=None, output_options=None,
+              pipeline_options=None, extension=".srt"):
+    # 批量处理目录树：每个文件夹选出优先级最高的字幕，用进程池并行添加样式，返回退出码
+    # extension 为 ".ass" 时输出原生 ASS 文件
+    # variants 为 [(模板名, 中文字体, 英文字体, 中文样式前缀, 英文样式前缀), ...]，每个文件只解析一次，按每个模板各写出一个文件
+    # 跳过之前运行生成的输出文件，避免重复处理；给出清单时跳过输入文件和样式都没有变化的文件
+    # profile_format 为 "table" 或 "json" 时，最后按文件输出各阶段的统计
+    console = console or Console()
+    names_and_fonts = [variant[:3] for variant in variants]
+    skip_prefixes = variant_output_prefixes(names_and_fonts)
+    styles_hash = style_hash(*[variant[3:] for variant in variants], "keep_empty_breaks", hashable_options(output_options))
+    jobs = []
+    unchanged = 0
+    for directory, srt_files in walk_srt_files(root, skip_prefixes):
+        selected_file = select_best_file(srt_files)
+        input_file = os.path.join(directory, selected_file)
+        output_files = build_variant_outputs(directory, selected_file, names_and_fonts, extension)
+        if manifest is not None and manifest.is_current(input_file, output_files, styles_hash):
+            unchanged += 1
+            console.result(input_file, output_files, status="unchanged")
+            continue
+        jobs.append((input_file, [(output_file,) + variant[3:] for output_file, variant in zip(output_files, variants)]))
+
+    if not jobs and not unchanged:
+        console.error(f"在路径 '{root}' 下没有找到任何字幕文件（.srt 或 .ass）。")
+        return EXIT_NO_INPUT
+
+    failures = run_jobs(jobs, console, workers, manifest, styles_hash, profile_format, output_options,
+                        pipeline_options)
+    console.summary(len(jobs), failures, unchanged if manifest is not None else None)
+    return EXIT_FAILED if failures else EXIT_OK
+
+
+def resolve_inputs(paths, skip_prefixes=()):
+    # 把命令行中的输入展开为字幕文件列表：文件（包括 .zip 字幕包）直接使用，文件夹选出优先级最高的字幕，其他按通配符（支持 **）展开
+    # "-" 表示标准输入，原样保留；返回 (文件列表, 没有匹配到任何文件的输入)
+    files = []
+    missing = []
+    for path in paths:
+        if path == STDIN_PATH or os.path.isfile(path):
+            files.append(path)
+        elif os.path.isdir(path):
+            srt_files = sorted(name for name in os.listdir(path)
+                               if is_subtitle_candidate(name, skip_prefixes) and os.path.isfile(os.path.join(path, name)))
+            if srt_files:
+                files.append(os.path.join(path, select_best_file(srt_files)))
+            else:
+                missing.append(path)
+        else:
+            matches = sorted(match for match in glob.glob(path, recursive=True)
+                             if os.path.isfile(match) and (is_subtitle_candidate(os.path.basename(match), skip_prefixes)
+                                                           or is_archive_file(os.path.basename(match), skip_prefixes)))
+            if matches:
+                files.extend(matches)
+            else:
+                missing.append(path)
+    # 同一个文件被多个参数匹配到时只处理一次
+    return list(dict.fromkeys(files)), missing
+
+
+def build_job_outputs(input_file, variants, output_pattern=None, extension=".srt"):
+    # 单个输入文件每个模板的输出文件：没有给出输出路径模板时与批量模式相同
+    # 给出输出路径模板时按模板中的扩展名决定输出格式，extension 不起作用
+    directory, file_name = os.path.split(input_file)
+    if output_pattern is None:
+        return build_variant_outputs(directory, file_name, [variant[:3] for variant in variants], extension)
+    return [expand_output_pattern(output_pattern, input_file, chinese_font, english_font, name)
+            for name, chinese_font, english_font, _, _ in variants]
+
+
+def hashable_options(output_options):
+    # 计算样式哈希用的输出选项：时间调整换成字典，调整方式变化时增量处理会重新生成输出
+    output_options = dict(output_options or {})
+    if output_options.get("retime") is not None:
+        output_options["retime"] = output_options["retime"].as_dict()
+    return output_options
+
+
+def open_stdout(output_options):
+    # 按输出编码和换行符包装标准输出，用完后调用 detach()，不关闭标准输出本身
+    return io.TextIOWrapper(sys.stdout.buffer, encoding=output_options["output_encoding"],
+                            newline=output_options["newline"], write_through=False)
+
+
+def run_stream(input_file, output_file, variant, console, output_options, output_format="srt"):
+    # 从标准输入或文件读取，结果写到标准输出或文件，不使用进程池；返回退出码
+    # 写到标准输出时按 output_format 输出，写到文件时按文件的扩展名决定
+    _, _, _, chinese_style, english_style = variant
+    label = "<stdin>" if input_file == STDIN_PATH else input_file
+    try:
+        if input_file == STDIN_PATH:
+            raw_data = sys.stdin.buffer.read()
+        else:
+            with open(input_file, 'rb') as file:
+                raw_data = file.read()
+        subtitle_format = "ass" if input_file.lower().endswith(".ass") else None
+        styled = style_bytes(raw_data, chinese_style, english_style, subtitle_format, keep_empty_breaks=True,
+                             file_path=None if input_file == STDIN_PATH else input_file,
+                             retime=output_options.get("retime"),
+                             pair_tolerance=output_options.get("pair_tolerance", 0),
+                             output_format=output_format if output_file == STDOUT_PATH else output_format_for(output_file))
+        if output_file == STDOUT_PATH:
+            stdout = open_stdout(output_options)
+            try:
+                stdout.writelines(styled)
+                stdout.flush()
+            finally:
+                stdout.detach()
+        else:
+            write_styled(output_file, styled, output_options["output_encoding"], output_options["newline"])
+    except BrokenPipeError:
+        # 下游提前关闭了管道（如 | head），不再输出任何内容
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return EXIT_FAILED
+    except (SubtitleError, OSError) as e:
+        console.result(label, [output_file], str(e))
+        return EXIT_FAILED
+    console.result(label, [output_file])
+    return EXIT_OK
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="为 .srt 字幕文件添加中英文字体样式。不带参数运行时进入交互模式。",
+        epilog="退出码：0 全部成功，1 有文件处理失败，2 参数错误，3 没有找到字幕文件，130 被中断。")
+    parser.add_argument("inputs", nargs="*", metavar="PATH",
+                        help="要处理的字幕文件、文件夹（选择优先级最高的字幕）或通配符（如 'library/**/*.srt'），"
+                             "- 表示从标准输入读取")
+    parser.add_argument("-o", "--output", metavar="PATTERN",
+                        help="输出路径模板，可用 {dir} {name} {ext} {prefix} {chinese_font} {english_font} {template}，"
+                             "默认为 {dir}/{prefix}{name}.srt；- 表示写到标准输出（只能有一个输入）")
+    parser.add_argument("--merge", metavar="PATH", nargs="+",
+                        help="合并单语的中文和英文字幕后添加样式：给出中文文件和英文文件，"
+                             "或一个文件夹（按 .chs、.eng 等语言标记自动选择）")
+    parser.add_argument("--merge-tolerance", type=int, default=0, metavar="MS",
+                        help="合并时两条字幕之间允许的间隔（毫秒），默认为 0，即时间必须重叠")
+    parser.add_argument("--pair-tolerance", type=int, default=0, metavar="MS",
+                        help="分离格式（中文和英文是时间相同的两条）的开始和结束时间允许的误差（毫秒），"
+                             "格式检测和配对都使用它，默认为 0，即时间必须相同")
+    parser.add_argument("--batch", metavar="DIR", help="递归处理目录树，每个文件夹选择优先级最高的字幕文件")
+    parser.add_argument("--watch", metavar="DIR", nargs="+",
+                        help="监视文件夹（包括子文件夹），新的字幕文件写完后自动添加样式，按 Ctrl+C 退出")
+    parser.add_argument("--settle", type=float, default=None,
+                        help="监视模式下文件夹多少秒没有变化后才处理，默认为 2 秒")
+    parser.add_argument("--poll-interval", type=float, default=None,
+                        help="监视模式下定期扫描的间隔（秒），不能使用 inotify 时生效，默认为 1 秒")
+    parser.add_argument("--polling", action="store_true", help="监视模式下不使用 inotify，总是定期扫描")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="并行进程数，默认为 CPU 核心数；监视模式下为工作线程数，默认为 2")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"增量处理：跳过输入文件和样式都没有变化的文件，记录保存在根目录下的 {MANIFEST_NAME}")
+    parser.add_argument("--manifest", metavar="PATH", help="增量处理清单文件的路径，指定时自动启用增量处理")
+    parser.add_argument("--template", metavar="NAME", action="append",
+                        help="使用 templates.json 中的模板，忽略下面的字体和样式参数；可以多次指定，"
+                             "或用 all 表示所有模板，每个文件只解析一次，按每个模板各输出一个文件")
+    parser.add_argument("--profile", nargs="?", const="table", choices=("table", "json"),
+                        help="统计每个文件各阶段（读取、chardet、解码、格式检测、解析、样式、写出）的耗时、字节数和字幕条数，"
+                             "批量模式结束时输出表格或 JSON，监视模式下每个文件输出一行")
+    output_mode = parser.add_mutually_exclusive_group()
+    output_mode.add_argument("-q", "--quiet", action="store_true", help="只输出错误信息")
+    output_mode.add_argument("--json", action="store_true", help="每个文件输出一行 JSON 结果，最后输出一行汇总")
+    retime = parser.add_argument_group("调整时间", "在添加样式的同一遍中调整时间，依次进行同步点校正、帧率转换和平移")
+    retime.add_argument("--shift", metavar="TIME", help="整体平移，如 1500、-00:00:01,500（毫秒或 时:分:秒,毫秒）")
+    retime.add_argument("--fps", metavar="FROM:TO", help="帧率转换，如 23.976:25")
+    retime.add_argument("--sync", metavar="SRC=DST", action="append",
+                        help="同步点，需要给出两次，如 --sync 00:00:05,000=00:00:06,200 --sync #812=01:40:03,000，"
+                             "#812 表示第 812 条字幕的开始时间")
+    pipeline = parser.add_argument_group("流水线", "处理网络挂载的字幕库时，读取、添加样式和写出同时进行")
+    pipeline.add_argument("--pipeline", action="store_true",
+                          help="使用异步流水线处理输入文件和 --batch，-j 为添加样式的进程数，最后输出吞吐量统计")
+    pipeline.add_argument("--read-concurrency", type=int, default=None, metavar="N", help="同时读取的文件数，默认为 8")
+    pipeline.add_argument("--write-concurrency", type=int, default=None, metavar="N", help="同时写出的文件数，默认为 4")
+    pipeline.add_argument("--queue-size", type=int, default=None, metavar="N",
+                          help="阶段之间的队列长度，决定内存中最多缓存的文件数，默认为 16")
+    pipeline.add_argument("--style-executor", choices=("process", "thread"), default="process",
+                          help="添加样式使用进程池还是线程池")
+    parser.add_argument("--output-encoding", choices=OUTPUT_ENCODINGS, default="utf-8",
+                        help="输出文件的编码，utf-8-sig 会写入 BOM")
+    parser.add_argument("--newline", choices=tuple(OUTPUT_NEWLINES), default="native", help="输出文件的换行符")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="srt",
+                        help="输出格式：srt 在每行前加样式标签；ass 输出原生 ASS 文件，样式只定义一次，文件更小；"
+                             "-o 给出输出路径时按其中的扩展名决定")
+
+    style = parser.add_argument_group("样式", "没有使用 --template 时生效")
+    style.add_argument("--chinese-font", default=DEFAULT_CHINESE_FONT, help="中文字体名称")
+    style.add_argument("--english-font", default=None, help="英文字体名称，默认与中文相同")
+    style.add_argument("--chinese-font-size", default=DEFAULT_CHINESE_FONT_SIZE, help="中文字体大小")
+    style.add_argument("--english-font-size", default=DEFAULT_ENGLISH_FONT_SIZE, help="英文字体大小")
+    style.add_argument("--chinese-color", metavar="#RRGGBB", help=f"中文颜色，默认为 {DEFAULT_CHINESE_COLOR}")
+    style.add_argument("--english-color", metavar="#RRGGBB", help=f"英文颜色，默认为 {DEFAULT_ENGLISH_COLOR}")
+    style.add_argument("--chinese-bold", action=argparse.BooleanOptionalAction, default=None, help="中文加粗（默认）")
+    style.add_argument("--english-bold", action=argparse.BooleanOptionalAction, default=None, help="英文加粗")
+    style.add_argument("--chinese-italic", action=argparse.BooleanOptionalAction, default=None, help="中文斜体")
+    style.add_argument("--english-italic", action=argparse.BooleanOptionalAction, default=None, help="英文斜体")
+    style.add_argument("--chinese-blur", action=argparse.BooleanOptionalAction, default=None, help="中文边缘模糊")
+    style.add_argument("--english-blur", action=argparse.BooleanOptionalAction, default=None, help="英文边缘模糊")
+    style.add_argument("--shadow-opacity", metavar="0-255", help="阴影不透明度")
+    return parser.parse_args(argv)
+
+
+def build_option_styles(args):
+    # 按命令行参数生成 (中文字体, 英文字体, 中文样式前缀, 英文样式前缀)，返回 (结果, 错误信息)
+    # 只给出字体和大小时与之前的输出完全相同；给出颜色、加粗等参数时按 GUI 的规则生成完整的样式
+    chinese_font = args.chinese_font
+    english_font = args.english_font or args.chinese_font
+    extra = (args.chinese_color, args.english_color, args.chinese_bold, args.english_bold, args.chinese_italic,
+             args.english_italic, args.chinese_blur, args.english_blur, args.shadow_opacity)
+    if all(value is None for value in extra):
+        return (chinese_font, english_font) + build_styles(chinese_font, english_font, args.chinese_font_size,
+                                                           args.english_font_size), None
+
+    template = {
+        "chinese_font": chinese_font,
+        "english_font": english_font,
+        "chinese_font_size": args.chinese_font_size,
+        "english_font_size": args.english_font_size,
+        "chinese_font_color": args.chinese_color or DEFAULT_CHINESE_COLOR,
+        "english_font_color": args.english_color or DEFAULT_ENGLISH_COLOR,
+        "chinese_bold": True if args.chinese_bold is None else args.chinese_bold,
+        "english_bold": bool(args.english_bold),
+        "chinese_italic": bool(args.chinese_italic),
+        "english_italic": bool(args.english_italic),
+        "chinese_blur": bool(args.chinese_blur),
+        "english_blur": bool(args.english_blur),
+        "shadow_opacity": args.shadow_opacity or "0",
+    }
+    errors = validate_template(template)
+    if errors:
+        return None, "；".join(errors)
+    return (chinese_font, english_font) + compile_template_styles(template), None
+
+
+def build_pipeline_options(args):
+    # 流水线的并发数和队列长度，没有使用 --pipeline 时为 None；返回 (参数, 错误信息)
+    limits = {"read_concurrency": args.read_concurrency, "write_concurrency": args.write_concurrency,
+              "queue_size": args.queue_size}
+    if not args.pipeline:
+        if any(value is not None for value in limits.values()):
+            return None, "--read-concurrency、--write-concurrency 和 --queue-size 需要和 --pipeline 一起使用。"
+        return None, None
+    if args.watch or args.merge:
+        return None, "监视模式和 --merge 不能使用 --pipeline。"
+    if args.profile:
+        return None, "--pipeline 输出的是整体的吞吐量统计，不能和 --profile 一起使用。"
+    for name, value in limits.items():
+        if value is not None and value < 1:
+            return None, f"--{name.replace('_', '-')} 必须大于 0。"
+    options = {name: value for name, value in limits.items() if value is not None}
+    options["style_executor"] = args.style_executor
+    return options, None
+
+
+def load_template_variants(names):
+    # 读取 templates.json 中的模板，names 中的 all 表示所有模板
+    # 返回 ([(模板名, 中文字体, 英文字体, 中文样式前缀, 英文样式前缀), ...], 错误信息)
+    registry = get_registry()
+    if "all" in names:
+        names = registry.names()
+        if not names:
+            return None, "templates.json 中没有可用的模板。"
+    variants = []
+    for name in dict.fromkeys(names):
+        template = registry.get(name)
+        if template is None:
+            return None, f"找不到模板：{name}"
+        variants.append((name, template["chinese_font"], template["english_font"]) + registry.styles(name))
+    return variants, None
+
+
+def run_watch(roots, chinese_font, english_font, chinese_style, english_style, workers=None, manifest=None,
+              settle=None, poll_interval=None, use_inotify=None, profile_format=None, console=None,
+              output_options=None, extension=".srt"):
+    # 监视文件夹，新的字幕文件写完后自动添加样式，按 Ctrl+C 退出；settle 和 poll_interval 为 None 时使用默认值
+    from srtformat.watch import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE_SECONDS, FolderWatcher
+
+    console = console or Console()
+    output_options = output_options or {}
+    settle = DEFAULT_SETTLE_SECONDS if settle is None else settle
+    poll_interval = DEFAULT_POLL_INTERVAL if poll_interval is None else poll_interval
+
+    def log_profile(file_profile):
+        if profile_format == "json" or console.mode == "json":
+            console.print_json(file_profile.as_dict())
+        else:
+            console.info(f"[耗时] {file_profile.input_file}：{file_profile.summary()}")
+
+    def process(input_file, output_file):
+        style_file(input_file, output_file, chinese_style, english_style, keep_empty_breaks=True,
+                   profile_callback=log_profile if profile_format else None, **output_options)
+
+    watcher = FolderWatcher(roots, chinese_font, english_font, process, workers=workers or 2, settle=settle,
+                            poll_interval=poll_interval, use_inotify=use_inotify, manifest=manifest,
+                            styles_hash=style_hash(chinese_style, english_style, "keep_empty_breaks",
+                                                   hashable_options(output_options)),
+                            log=console.info, extension=extension)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        console.info("已停止监视。")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.batch is None and not args.watch and not args.inputs and not args.merge:
+        interactive_main()
+        return EXIT_OK
+
+    to_stdout = args.output == STDOUT_PATH or (args.output is None and STDIN_PATH in args.inputs)
+    # 样式输出写到标准输出时，进度和结果改写到标准错误，不混入字幕内容
+    console = Console("json" if args.json else "quiet" if args.quiet else "text",
+                      sys.stderr if to_stdout else sys.stdout)
+    modes = sum((args.batch is not None, bool(args.watch), bool(args.inputs), bool(args.merge)))
+    if modes > 1:
+        console.usage_error("输入文件、--merge、--batch 和 --watch 只能使用其中一种。")
+        return EXIT_USAGE
+    roots = args.watch or ([args.batch] if args.batch is not None else [])
+    if not all(os.path.isdir(root) for root in roots):
+        console.usage_error("输入的路径无效，请检查后再试。")
+        return EXIT_USAGE
+    if args.output is not None and not args.inputs and not args.merge:
+        console.usage_error("-o/--output 只能和输入文件一起使用，--batch 和 --watch 的输出总是保存在输入文件旁边。")
+        return EXIT_USAGE
+
+    if args.template:
+        variants, error = load_template_variants(args.template)
+    else:
+        option_styles, error = build_option_styles(args)
+        variants = [("",) + option_styles] if option_styles else None
+    if error:
+        console.usage_error(error)
+        return EXIT_USAGE
+    output_options = {"output_encoding": args.output_encoding, "newline": OUTPUT_NEWLINES[args.newline]}
+    retime, error = build_retime(args.shift, args.fps, args.sync)
+    if error:
+        console.usage_error(error)
+        return EXIT_USAGE
+    if retime is not None:
+        output_options["retime"] = retime
+    if args.pair_tolerance < 0:
+        console.usage_error("--pair-tolerance 不能小于 0。")
+        return EXIT_USAGE
+    if args.pair_tolerance:
+        if args.merge:
+            console.usage_error("--pair-tolerance 不能和 --merge 一起使用，合并时请用 --merge-tolerance。")
+            return EXIT_USAGE
+        output_options["pair_tolerance"] = args.pair_tolerance
+    pipeline_options, error = build_pipeline_options(args)
+    if error:
+        console.usage_error(error)
+        return EXIT_USAGE
+
+    manifest = None
+    if args.incremental or args.manifest:
+        if not roots:
+            console.usage_error("增量处理只能用于 --batch 和 --watch。")
+            return EXIT_USAGE
+        manifest = Manifest(args.manifest or os.path.join(roots[0], MANIFEST_NAME))
+
+    try:
+        if args.watch:
+            if len(variants) > 1:
+                console.usage_error("监视模式只能使用一个模板。")
+                return EXIT_USAGE
+            _, chinese_font, english_font, chinese_style, english_style = variants[0]
+            run_watch(args.watch, chinese_font, english_font, chinese_style, english_style, workers=args.workers,
+                      manifest=manifest, settle=args.settle, poll_interval=args.poll_interval,
+                      use_inotify=False if args.polling else None, profile_format=args.profile, console=console,
+                      output_options=output_options, extension="." + args.format)
+            return EXIT_OK
+        if args.batch is not None:
+            return run_batch(args.batch, variants, workers=args.workers, manifest=manifest,
+                             profile_format=args.profile, console=console, output_options=output_options,
+                             pipeline_options=pipeline_options, extension="." + args.format)
+        if args.merge:
+            return run_merge(args, variants, console, output_options)
+        return run_inputs(args, variants, console, output_options, pipeline_options)
+    except KeyboardInterrupt:
+        console.error("已中断。")
+        return EXIT_INTERRUPTED
+
+
+def resolve_merge_inputs(paths):
+    # --merge 的参数：中文文件和英文文件，或一个文件夹；返回 (中文文件, 英文文件, 错误信息)
+    if len(paths) == 2:
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if missing:
+            return None, None, f"没有找到字幕文件：{', '.join(missing)}"
+        return paths[0], paths[1], None
+    if len(paths) == 1 and os.path.isdir(paths[0]):
+        srt_files = sorted(name for name in os.listdir(paths[0]) if is_subtitle_candidate(name)
+                           and os.path.isfile(os.path.join(paths[0], name)))
+        pair = select_language_pair(srt_files)
+        if pair is None:
+            return None, None, f"在路径 '{paths[0]}' 下没有找到成对的中文和英文字幕（如 .chs.srt 和 .eng.srt）。"
+        return os.path.join(paths[0], pair[0]), os.path.join(paths[0], pair[1]), None
+    return None, None, "--merge 需要给出中文文件和英文文件，或者一个文件夹。"
+
+
+def run_merge(args, variants, console, output_options):
+    # 合并单语的中文和英文字幕并添加样式，输出文件名按去掉语言标记的中文文件名生成；返回退出码
+    chinese_file, english_file, error = resolve_merge_inputs(args.merge)
+    if error:
+        console.error(error)
+        return EXIT_NO_INPUT
+    label = f"{chinese_file} + {english_file}"
+    if args.merge_tolerance < 0:
+        console.usage_error("--merge-tolerance 不能小于 0。")
+        return EXIT_USAGE
+
+    if args.output == STDOUT_PATH:
+        if len(variants) > 1:
+            console.usage_error("写到标准输出时只能有一个模板。")
+            return EXIT_USAGE
+        _, _, _, chinese_style, english_style = variants[0]
+        try:
+            cues = retime_cues(parse_merged_files(chinese_file, english_file, args.merge_tolerance),
+                               output_options.get("retime"))
+            styled = iter_formatted_cues(cues, chinese_style, english_style, args.format, keep_empty_breaks=True)
+            stdout = open_stdout(output_options)
+            try:
+                stdout.writelines(styled)
+                stdout.flush()
+            finally:
+                stdout.detach()
+        except BrokenPipeError:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return EXIT_FAILED
+        except SubtitleError as e:
+            console.result(label, [STDOUT_PATH], str(e))
+            return EXIT_FAILED
+        console.result(label, [STDOUT_PATH])
+        return EXIT_OK
+
+    merged_name = os.path.join(os.path.dirname(chinese_file), strip_language_tag(os.path.basename(chinese_file)))
+    try:
+        output_files = build_job_outputs(merged_name, variants, args.output, "." + args.format)
+    except (KeyError, IndexError, ValueError) as e:
+        console.usage_error(f"输出路径模板无效：{args.output}（{e}）")
+        return EXIT_USAGE
+    profiles = []
+    profile_callback = (lambda file_profile: profiles.append(file_profile.as_dict())) if args.profile else None
+    error = None
+    try:
+        style_merged_files(chinese_file, english_file,
+                           [(output_file,) + variant[3:] for output_file, variant in zip(output_files, variants)],
+                           args.merge_tolerance, keep_empty_breaks=True, profile_callback=profile_callback,
+                           **output_options)
+    except SubtitleError as e:
+        error = str(e)
+    console.result(label, output_files, error, profile=profiles[0] if profiles else None)
+    console.profiles(profiles, args.profile)
+    return EXIT_FAILED if error else EXIT_OK
+
+
+def run_archives(archives, args, variants, console, output_options):
+    # 直接处理 zip 字幕包，不解压到磁盘：每一集选出一个字幕，并行添加样式后写到新的 zip 或文件夹；返回 (处理的文件数, 失败数)
+    # 没有给出 -o 时在字幕包旁边生成新的 zip；-o 按输出路径模板展开，以 .zip 结尾时写到新的 zip，否则写到文件夹
+    from srtformat.archive import style_archive
+
+    processed = failures = 0
+    _, chinese_font, english_font, _, _ = variants[0]
+    for archive_path in archives:
+        output_path = None
+        if args.output is not None:
+            try:
+                output_path = expand_output_pattern(args.output, archive_path, chinese_font, english_font, variants[0][0])
+            except (KeyError, IndexError, ValueError) as e:
+                console.usage_error(f"输出路径模板无效：{args.output}（{e}）")
+                return processed, failures + 1
+
+        def report(member_name, output_files, error):
+            nonlocal processed, failures
+            processed += 1
+            failures += 1 if error else 0
+            console.result(f"{archive_path}:{member_name}", output_files, error)
+
+        try:
+            results = style_archive(archive_path, variants, output_path, workers=args.workers, keep_empty_breaks=True,
+                                    output_format=args.format, on_result=report, **output_options)
+        except SubtitleError as e:
+            console.result(archive_path, [], str(e))
+            processed += 1
+            failures += 1
+            continue
+        if not results:
+            console.error(f"压缩包 '{archive_path}' 中没有找到字幕文件（.srt 或 .ass）。")
+    return processed, failures
+
+
+def run_inputs(args, variants, console, output_options, pipeline_options=None):
+    # 处理命令行中给出的文件、文件夹和通配符，返回退出码
+    skip_prefixes = variant_output_prefixes([variant[:3] for variant in variants])
+    input_files, missing = resolve_inputs(args.inputs, skip_prefixes)
+    for path in missing:
+        console.error(f"没有找到字幕文件：{path}")
+    archives = [path for path in input_files if path != STDIN_PATH and is_archive_file(os.path.basename(path))]
+    input_files = [path for path in input_files if path not in archives]
+    if not input_files and not archives:
+        return EXIT_NO_INPUT
+    if archives and (STDIN_PATH in input_files or args.output == STDOUT_PATH):
+        console.usage_error("字幕包不能和标准输入、标准输出一起使用。")
+        return EXIT_USAGE
+    archive_count = archive_failures = 0
+    if archives:
+        archive_count, archive_failures = run_archives(archives, args, variants, console, output_options)
+    if not input_files:
+        if archive_count > 1:
+            console.summary(archive_count, archive_failures)
+        return EXIT_FAILED if archive_failures or missing else EXIT_OK if archive_count else EXIT_NO_INPUT
+
+    uses_stdin = STDIN_PATH in input_files
+    if (uses_stdin or args.output == STDOUT_PATH) and (len(input_files) > 1 or len(variants) > 1):
+        console.usage_error("从标准输入读取或写到标准输出时只能有一个输入文件和一个模板。")
+        return EXIT_USAGE
+    if uses_stdin or args.output == STDOUT_PATH:
+        output_file = args.output or STDOUT_PATH
+        if output_file != STDOUT_PATH:
+            # 只有从标准输入读取时才会写到文件，输出路径模板按文件名 stdin.srt 展开
+            output_file = expand_output_pattern(output_file, "stdin.srt", *variants[0][1:3], variants[0][0])
+        status = run_stream(input_files[0], output_file, variants[0], console, output_options, args.format)
+        return status if status else EXIT_FAILED if missing else EXIT_OK
+
+    jobs = []
+    try:
+        for input_file in input_files:
+            output_files = build_job_outputs(input_file, variants, args.output, "." + args.format)
+            jobs.append((input_file, [(output_file,) + variant[3:]
+                                      for output_file, variant in zip(output_files, variants)]))
+    except (KeyError, IndexError, ValueError) as e:
+        console.usage_error(f"输出路径模板无效：{args.output}（{e}）")
+        return EXIT_USAGE
+    all_outputs = [output_file for _, outputs in jobs for output_file, _, _ in outputs]
+    if len(set(all_outputs)) < len(all_outputs):
+        console.usage_error("多个输出文件的路径相同，请在输出路径模板中加入 {name} 或 {template}。")
+        return EXIT_USAGE
+
+    failures = run_jobs(jobs, console, args.workers, profile_format=args.profile, output_options=output_options,
+                        pipeline_options=pipeline_options) + archive_failures
+    if len(jobs) + archive_count > 1:
+        console.summary(len(jobs) + archive_count, failures)
+    return EXIT_FAILED if failures or missing else EXIT_OK
+
+
+def interactive_main():
     # 获取用户输入的文件夹路径
     directory = input("请输入文件夹路径：").strip()
 
@@ -91,12 +782,12 @@ def main():
         print("输入的路径无效，请检查后再试。")
         return
 
-    # 获取该路径下所有的 .srt 文件
+    # 获取该路径下所有的字幕文件
     srt_files = list_srt_files(directory)
 
-    # 如果没有找到 .srt 文件，提示并退出
+    # 如果没有找到字幕文件，提示并退出
     if not srt_files:
-        print(f"在路径 '{directory}' 下没有找到任何 .srt 文件。")
+        print(f"在路径 '{directory}' 下没有找到任何字幕文件（.srt、.ass 或 .zip）。")
         return
 
     # 获取每个文件的优先级
@@ -108,8 +799,8 @@ def main():
     # 获取最有可能的文件
     most_likely_file = file_priorities[0][0] if file_priorities else None
 
-    # 列出所有找到的 .srt 文件，并标上序号
-    print(f"在路径 '{directory}' 下找到以下 .srt 文件：")
+    # 列出所有找到的字幕文件，并标上序号
+    print(f"在路径 '{directory}' 下找到以下字幕文件：")
     for idx, (file, _) in enumerate(file_priorities, start=1):
         # 如果是最有可能的文件，标上提醒
         if file == most_likely_file:
@@ -137,21 +828,42 @@ def main():
 
     # 获取用户选择的文件
     input_file = os.path.join(directory, selected_file)
+    is_archive = is_archive_file(selected_file)
 
     chinese_font = input("请输入中文字体名称（留空则为“寒蝉端黑体 Compact”）：").strip()
     english_font = input("请输入英文字体名称（留空为与中文相同）：").strip()
     chinese_font_size = input("请输入中文字体大小（留空则为 18）：").strip()
     english_font_size = input("请输入英文字体大小（留空则为 12）：").strip()
     if not chinese_font:
-        chinese_font = "寒蝉端黑体 Compact"
+        chinese_font = DEFAULT_CHINESE_FONT
     if not english_font:
         english_font = chinese_font
     if not chinese_font_size:
-        chinese_font_size = "18"
+        chinese_font_size = DEFAULT_CHINESE_FONT_SIZE
     if not english_font_size:
-        english_font_size = "12"
+        english_font_size = DEFAULT_ENGLISH_FONT_SIZE
+    if is_archive:
+        # 字幕包中每一集选出一个字幕，结果写到同一目录下的新 zip
+        from srtformat.archive import style_archive
+        chinese_style, english_style = build_styles(chinese_font, english_font, chinese_font_size, english_font_size)
+        output_file = build_output_file(directory, selected_file, chinese_font, english_font, ".zip")
+        try:
+            results = style_archive(input_file, [("", chinese_font, english_font, chinese_style, english_style)],
+                                    output_file, keep_empty_breaks=True)
+        except SubtitleError as e:
+            print(f"处理失败：{str(e).strip()}")
+            return
+        if not results:
+            print("压缩包中没有找到字幕文件（.srt 或 .ass）。")
+            return
+        for member_name, _, error in results:
+            print(f"[{'失败' if error else '完成'}] {member_name}{'：' + error if error else ''}")
+        if any(error is None for _, _, error in results):
+            print(f"处理完成，输出文件保存在：{output_file}")
+        return
+
     # 设置输出文件路径（在同一目录下）
-    output_file = os.path.join(directory, f"{chinese_font}_{english_font}_{selected_file}" if not chinese_font == english_font else f"{chinese_font}_{selected_file}")
+    output_file = build_output_file(directory, selected_file, chinese_font, english_font)
 
     # 调用处理函数
     add_styles_to_subtitles(input_file, output_file, chinese_font, english_font, chinese_font_size, english_font_size)
@@ -159,4 +871,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,532 @@
+"""
+字幕处理工具的图形界面，只在启动 GUI 时由 gui_version.py 导入
+
+Tk、tkinterdnd2 等只有界面需要的模块都在这里导入，只调用 add_styles_to_subtitles 的程序不需要加载它们。
+"""
+import importlib
+import importlib.util
+import os
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from tkinterdnd2 import TkinterDnD, DND_FILES
+import queue
+import sys
+import threading
+
+from gui_version import CANCELLED_MESSAGE, add_styles_to_archive, add_styles_to_subtitles
+from srtformat import ARCHIVE_EXTENSIONS, SUBTITLE_EXTENSIONS, get_registry
+
+
+def pysubs2_installed():
+    # 只查找模块而不导入，pysubs2 在处理需要它的 ASS 文件时才加载
+    return importlib.util.find_spec("pysubs2") is not None
+
+# 主线程检查后台任务结果的间隔（毫秒）
+WORKER_POLL_MS = 100
+
+class SubtitleProcessorApp(TkinterDnD.Tk):
+    def __init__(self):
+        super().__init__()
+
+        self.title(" 字幕处理工具 ")
+        self.geometry("500x800")  # 增加窗口高度以容纳更多内容
+
+        # 禁止窗口自动调整大小
+        self.pack_propagate(False)
+
+        # 初始化模板数据
+        self.registry = get_registry()  # 共享的模板注册表，只在文件变化时重新加载
+        self.templates = []  # 确保初始化
+        self.load_templates()  # 加载模板
+
+        # 后台任务状态，界面只在主线程中更新
+        self.worker = None
+        self.worker_queue = queue.Queue()
+        self.worker_done = None
+        self.cancel_event = threading.Event()
+
+        # 创建 UI 组件
+        self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # 检查 pysubs2 是否已安装
+        if not pysubs2_installed():
+            self.status_label.config(text=" 提示 : 未安装 pysubs2 库，ASS 字幕将使用内置解析器处理。如遇非标准 ASS 文件，请运行 : pip install pysubs2", fg="orange")
+
+        # 强制更新布局
+        self.update_idletasks()
+
+    def create_widgets(self):
+        # SRT 文件路径输入框和拖拽区域
+        self.srt_file_label = tk.Label(self, text=" 拖入字幕文件 (SRT、ASS 或 ZIP 字幕包)：")
+        self.srt_file_label.pack(pady=5)
+
+        srt_file_frame = tk.Frame(self)
+        srt_file_frame.pack(pady=5)
+
+        self.srt_file_entry = tk.Entry(srt_file_frame, width=50)
+        self.srt_file_entry.pack(side=tk.LEFT, padx=5)
+
+        self.browse_button = tk.Button(srt_file_frame, text=" 浏览 ", command=self.browse_file)
+        self.browse_button.pack(side=tk.LEFT, padx=5)
+
+        self.srt_file_entry.drop_target_register(DND_FILES)
+        self.srt_file_entry.dnd_bind('<<Drop>>', self.on_file_drop)
+
+        # 选择模板
+        self.template_label = tk.Label(self, text=" 选择模板：")
+        self.template_label.pack(pady=5)
+
+        self.template_combobox = tk.StringVar()
+        self.template_combobox.set(" 选择模板 ")  # 设置默认值
+        self.template_menu = tk.OptionMenu(self, self.template_combobox, *self.templates)
+        self.template_menu.pack(pady=5)
+        self.template_combobox.trace("w", self.update_fields_from_template)
+
+        # 添加模板和删除模板按钮放在同一排
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=10)
+
+        self.save_template_button = tk.Button(button_frame, text=" 添加当前数据为模板 ", command=self.save_template)
+        self.save_template_button.pack(side=tk.LEFT, padx=5)
+
+        self.delete_template_button = tk.Button(button_frame, text=" 删除当前模板 ", command=self.delete_template)
+        self.delete_template_button.pack(side=tk.LEFT, padx=5)
+
+        # 字体和大小设置
+        chinese_font_frame = tk.Frame(self)
+        chinese_font_frame.pack(pady=5)
+        self.chinese_font_label = tk.Label(chinese_font_frame, text=" 中文字体：")
+        self.chinese_font_label.pack(side=tk.LEFT)
+        self.chinese_font_entry = tk.Entry(chinese_font_frame, width=50)
+        self.chinese_font_entry.insert(0, " 寒蝉端黑体 Compact")  # 默认值
+        self.chinese_font_entry.pack(side=tk.LEFT)
+
+        english_font_frame = tk.Frame(self)
+        english_font_frame.pack(pady=5)
+        self.english_font_label = tk.Label(english_font_frame, text=" 英文字体：")
+        self.english_font_label.pack(side=tk.LEFT)
+        self.english_font_entry = tk.Entry(english_font_frame, width=50)
+        self.english_font_entry.insert(0, " 寒蝉端黑体 Compact")  # 默认值
+        self.english_font_entry.pack(side=tk.LEFT)
+
+        chinese_font_size_frame = tk.Frame(self)
+        chinese_font_size_frame.pack(pady=5)
+        self.chinese_font_size_label = tk.Label(chinese_font_size_frame, text=" 中文字体大小：")
+        self.chinese_font_size_label.pack(side=tk.LEFT)
+        self.chinese_font_size_entry = tk.Entry(chinese_font_size_frame, width=50)
+        self.chinese_font_size_entry.insert(0, "18")  # 默认值
+        self.chinese_font_size_entry.pack(side=tk.LEFT)
+
+        english_font_size_frame = tk.Frame(self)
+        english_font_size_frame.pack(pady=5)
+        self.english_font_size_label = tk.Label(english_font_size_frame, text=" 英文字体大小：")
+        self.english_font_size_label.pack(side=tk.LEFT)
+        self.english_font_size_entry = tk.Entry(english_font_size_frame, width=50)
+        self.english_font_size_entry.insert(0, "12")  # 默认值
+        self.english_font_size_entry.pack(side=tk.LEFT)
+
+        # 新增参数
+        chinese_font_color_frame = tk.Frame(self)
+        chinese_font_color_frame.pack(pady=5)
+        self.chinese_font_color_label = tk.Label(chinese_font_color_frame, text=" 中文字体颜色：")
+        self.chinese_font_color_label.pack(side=tk.LEFT)
+        self.chinese_font_color_entry = tk.Entry(chinese_font_color_frame, width=50)
+        self.chinese_font_color_entry.insert(0, "#C8C8C8")  # 默认值
+        self.chinese_font_color_entry.pack(side=tk.LEFT)
+
+        english_font_color_frame = tk.Frame(self)
+        english_font_color_frame.pack(pady=5)
+        self.english_font_color_label = tk.Label(english_font_color_frame, text=" 英文字体颜色：")
+        self.english_font_color_label.pack(side=tk.LEFT)
+        self.english_font_color_entry = tk.Entry(english_font_color_frame, width=50)
+        self.english_font_color_entry.insert(0, "#0F94CB")  # 默认值
+        self.english_font_color_entry.pack(side=tk.LEFT)
+
+        # Checkboxes frame
+        checkboxes_frame = tk.Frame(self)
+        checkboxes_frame.pack(pady=5)
+
+        self.chinese_bold_var = tk.BooleanVar(value=True)
+        self.chinese_bold_check = tk.Checkbutton(checkboxes_frame, text=" 中文字体加粗 ", variable=self.chinese_bold_var)
+        self.chinese_bold_check.grid(row=0, column=0, padx=5, pady=5)
+
+        self.english_bold_var = tk.BooleanVar(value=False)
+        self.english_bold_check = tk.Checkbutton(checkboxes_frame, text=" 英文字体加粗 ", variable=self.english_bold_var)
+        self.english_bold_check.grid(row=0, column=1, padx=5, pady=5)
+
+        self.chinese_italic_var = tk.BooleanVar(value=False)
+        self.chinese_italic_check = tk.Checkbutton(checkboxes_frame, text=" 中文字体斜体 ",
+                                                   variable=self.chinese_italic_var)
+        self.chinese_italic_check.grid(row=1, column=0, padx=5, pady=5)
+
+        self.english_italic_var = tk.BooleanVar(value=False)
+        self.english_italic_check = tk.Checkbutton(checkboxes_frame, text=" 英文字体斜体 ",
+                                                   variable=self.english_italic_var)
+        self.english_italic_check.grid(row=1, column=1, padx=5, pady=5)
+
+        self.chinese_blur_var = tk.BooleanVar(value=False)
+        self.chinese_blur_check = tk.Checkbutton(checkboxes_frame, text=" 中文字体柔化 ", variable=self.chinese_blur_var)
+        self.chinese_blur_check.grid(row=2, column=0, padx=5, pady=5)
+
+        self.english_blur_var = tk.BooleanVar(value=False)
+        self.english_blur_check = tk.Checkbutton(checkboxes_frame, text=" 英文字体柔化 ", variable=self.english_blur_var)
+        self.english_blur_check.grid(row=2, column=1, padx=5, pady=5)
+
+        shadow_opacity_frame = tk.Frame(self)
+        shadow_opacity_frame.pack(pady=5)
+        self.shadow_opacity_label = tk.Label(shadow_opacity_frame, text=" 阴影透明度：")
+        self.shadow_opacity_label.pack(side=tk.LEFT)
+        self.shadow_opacity_entry = tk.Entry(shadow_opacity_frame, width=50)
+        self.shadow_opacity_entry.insert(0, "0")  # 默认值
+        self.shadow_opacity_entry.pack(side=tk.LEFT)
+
+        # 分离格式的中文和英文时间允许的误差
+        pair_tolerance_frame = tk.Frame(self)
+        pair_tolerance_frame.pack(pady=5)
+        self.pair_tolerance_label = tk.Label(pair_tolerance_frame, text=" 配对误差（毫秒）：")
+        self.pair_tolerance_label.pack(side=tk.LEFT)
+        self.pair_tolerance_entry = tk.Entry(pair_tolerance_frame, width=50)
+        self.pair_tolerance_entry.insert(0, "0")  # 默认值，时间必须相同
+        self.pair_tolerance_entry.pack(side=tk.LEFT)
+
+        # 处理和取消按钮
+        process_frame = tk.Frame(self)
+        process_frame.pack(pady=(20, 5))
+
+        self.process_button = tk.Button(process_frame, text=" 处理字幕 ", command=self.process_subtitles)
+        self.process_button.pack(side=tk.LEFT, padx=5)
+
+        self.cancel_button = tk.Button(process_frame, text=" 取消 ", command=self.cancel_processing, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        # 进度条
+        self.progress_bar = ttk.Progressbar(self, length=400, mode="determinate")
+        self.progress_bar.pack(pady=5)
+
+        # 安装 pysubs2 按钮（如果未安装）
+        if not pysubs2_installed():
+            self.install_pysubs2_button = tk.Button(self, text=" 安装 pysubs2 库 ", command=self.install_pysubs2)
+            self.install_pysubs2_button.pack(pady=5)
+
+        # 状态栏
+        self.status_label = tk.Label(self, text=" 请选择字幕文件并点击处理 ", fg="blue", wraplength=580, justify="left")
+        self.status_label.pack(pady=10)
+
+        # 输出格式：勾选后输出原生 ASS 文件，样式只定义一次
+        self.output_ass_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self, text=" 输出 ASS 文件 ", variable=self.output_ass_var).pack()
+
+        # 耗时详情：勾选后在状态栏下方显示每个阶段的耗时
+        self.show_profile_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self, text=" 显示耗时详情 ", variable=self.show_profile_var).pack()
+        self.profile_label = tk.Label(self, text="", fg="gray", wraplength=580, justify="left")
+        self.profile_label.pack(pady=(0, 10))
+
+    # 后台任务：耗时操作在工作线程中执行，结果通过队列传回，主线程用 after() 轮询
+    def start_worker(self, target, on_done, *args):
+        self.worker_queue = queue.Queue()
+        self.worker_done = on_done
+
+        def run():
+            try:
+                result = target(*args)
+            except Exception as e:
+                result = e
+            self.worker_queue.put(("done", result))
+
+        self.worker = threading.Thread(target=run, daemon=True)
+        self.worker.start()
+        self.after(WORKER_POLL_MS, self.poll_worker)
+
+    def report_progress(self, done, total):
+        """ 在工作线程中调用，只向队列写入进度 """
+        self.worker_queue.put(("progress", done, total))
+
+    def report_profile(self, profile):
+        """ 在工作线程中调用，只向队列写入耗时摘要 """
+        self.worker_queue.put(("profile", profile.summary()))
+
+    def poll_worker(self):
+        while True:
+            try:
+                message = self.worker_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "progress":
+                _, done, total = message
+                self.progress_bar.config(mode="determinate", maximum=total, value=done)
+                self.status_label.config(text=f" 处理中 ... {done}/{total}", fg="orange")
+            elif message[0] == "profile":
+                self.profile_label.config(text=message[1])
+            else:
+                self.worker = None
+                self.worker_done(message[1])
+                return
+        self.after(WORKER_POLL_MS, self.poll_worker)
+
+    def cancel_processing(self):
+        if self.worker is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_label.config(text=" 正在取消 ...", fg="orange")
+
+    def on_close(self):
+        self.cancel_event.set()
+        self.destroy()
+
+    # 添加安装 pysubs2 的方法
+    def install_pysubs2(self):
+        if self.worker is not None:
+            return
+        self.status_label.config(text=" 正在安装 pysubs2 库 ...", fg="orange")
+        self.install_pysubs2_button.config(state=tk.DISABLED)
+        self.progress_bar.config(mode="indeterminate")
+        self.progress_bar.start()
+
+        # 使用 subprocess 执行 pip install
+        import subprocess
+        python_exe = sys.executable
+        self.start_worker(subprocess.check_call, self.on_pysubs2_installed,
+                          [python_exe, "-m", "pip", "install", "pysubs2"])
+
+    def on_pysubs2_installed(self, result):
+        self.progress_bar.stop()
+        self.progress_bar.config(mode="determinate", value=0)
+        try:
+            if isinstance(result, Exception):
+                raise result
+
+            # 确认 pysubs2 已经可以导入，处理 ASS 文件时由 srtformat 按需导入
+            importlib.invalidate_caches()
+            if not pysubs2_installed():
+                raise ImportError(" 安装后仍找不到 pysubs2 ")
+            
+            self.status_label.config(text="pysubs2 库安装成功！现在可以处理非标准的 ASS 字幕文件了。", fg="green")
+            
+            # 如果存在安装按钮，移除它
+            if hasattr(self, 'install_pysubs2_button'):
+                self.install_pysubs2_button.destroy()
+                
+        except Exception as e:
+            self.install_pysubs2_button.config(state=tk.NORMAL)
+            self.status_label.config(text=f" 安装失败 : {str(e)}\n 请手动运行 : pip install pysubs2", fg="red")
+
+    def browse_file(self):
+        file_path = filedialog.askopenfilename(filetypes=[(" 字幕文件 ", "*.srt;*.ass;*.zip"), ("SRT 文件 ", "*.srt"), ("ASS 文件 ", "*.ass"),
+                                                          ("ZIP 字幕包 ", "*.zip")])
+        if file_path:
+            self.srt_file_entry.delete(0, tk.END)
+            self.srt_file_entry.insert(0, file_path)
+
+    def update_fields_from_template(self, *args):
+        selected_template = self.template_combobox.get()
+        if selected_template == " 选择模板 ":
+            return
+
+        template_data = self.registry.get(selected_template)
+        if template_data is not None:
+            self.chinese_font_entry.delete(0, tk.END)
+            self.chinese_font_entry.insert(0, template_data["chinese_font"])
+            self.english_font_entry.delete(0, tk.END)
+            self.english_font_entry.insert(0, template_data["english_font"])
+            self.chinese_font_size_entry.delete(0, tk.END)
+            self.chinese_font_size_entry.insert(0, template_data["chinese_font_size"])
+            self.english_font_size_entry.delete(0, tk.END)
+            self.english_font_size_entry.insert(0, template_data["english_font_size"])
+            self.chinese_font_color_entry.delete(0, tk.END)
+            self.chinese_font_color_entry.insert(0, template_data["chinese_font_color"])
+            self.english_font_color_entry.delete(0, tk.END)
+            self.english_font_color_entry.insert(0, template_data["english_font_color"])
+            self.chinese_bold_var.set(template_data["chinese_bold"])
+            self.english_bold_var.set(template_data["english_bold"])
+            self.chinese_italic_var.set(template_data["chinese_italic"])
+            self.english_italic_var.set(template_data["english_italic"])
+            self.chinese_blur_var.set(template_data["chinese_blur"])
+            self.english_blur_var.set(template_data["english_blur"])
+            self.shadow_opacity_entry.delete(0, tk.END)
+            self.shadow_opacity_entry.insert(0, template_data["shadow_opacity"])
+
+    def load_templates(self):
+        """ 加载模板配置 """
+        self.templates = [" 选择模板 "]  # 确保至少有一个默认选项
+        self.templates.extend(self.registry.names())
+
+    def load_templates_refresh(self):
+        # 清空并重新填充模板下拉选项
+        menu = self.template_menu['menu']
+        menu.delete(0, 'end')
+        
+        # 添加默认选项
+        menu.add_command(label=" 选择模板 ", command=lambda value=" 选择模板 ": self.template_combobox.set(value))
+        
+        # 添加其他模板选项
+        for template_name in self.registry.names():
+            menu.add_command(label=template_name, command=lambda value=template_name: self.template_combobox.set(value))
+
+    def save_template(self):
+        # 使用指定格式生成模板名称
+        template_name = f"{self.chinese_font_entry.get()}_{self.chinese_font_size_entry.get()}_" \
+                        f"{self.english_font_entry.get()}_{self.english_font_size_entry.get()}_" \
+                        f"{self.shadow_opacity_entry.get()}_" \
+                        f"{' 中文加粗 ' if self.chinese_bold_var.get() else ''}" \
+                        f"{' 英文加粗 ' if self.english_bold_var.get() else ''}" \
+                        f"{' 中文斜体 ' if self.chinese_italic_var.get() else ''}" \
+                        f"{' 英文斜体 ' if self.english_italic_var.get() else ''}" \
+                        f"{' 中文柔化 ' if self.chinese_blur_var.get() else ''}" \
+                        f"{' 英文柔化 ' if self.english_blur_var.get() else ''}_" \
+                        f"{self.chinese_font_color_entry.get()}_" \
+                        f"{self.english_font_color_entry.get()}"
+
+        # 创建一个包含所有模板数据的字典
+        template_data = {
+            "chinese_font": self.chinese_font_entry.get(),
+            "english_font": self.english_font_entry.get(),
+            "chinese_font_size": self.chinese_font_size_entry.get(),
+            "english_font_size": self.english_font_size_entry.get(),
+            "chinese_font_color": self.chinese_font_color_entry.get(),
+            "english_font_color": self.english_font_color_entry.get(),
+            "chinese_bold": self.chinese_bold_var.get(),
+            "english_bold": self.english_bold_var.get(),
+            "chinese_italic": self.chinese_italic_var.get(),
+            "english_italic": self.english_italic_var.get(),
+            "chinese_blur": self.chinese_blur_var.get(),
+            "english_blur": self.english_blur_var.get(),
+            "shadow_opacity": self.shadow_opacity_entry.get()
+        }
+
+        # 校验并保存模板
+        try:
+            self.registry.save(template_name, template_data)
+        except ValueError as e:
+            messagebox.showerror(" 错误 ", f" 模板无效 : {str(e)}")
+            return
+        except OSError as e:
+            messagebox.showerror(" 错误 ", f" 保存模板时出错 : {str(e)}")
+            return
+
+        # 刷新模板列表
+        self.load_templates_refresh()
+
+    def delete_template(self):
+        """ 删除当前选中的模板 """
+        template_name = self.template_combobox.get()
+        if template_name == " 选择模板 " or template_name == " 默认模板 ":
+            messagebox.showwarning(" 警告 ", " 请选择一个有效的模板进行删除。")
+            return
+
+        # 删除选中的模板
+        try:
+            self.registry.delete(template_name)
+        except OSError as e:
+            messagebox.showerror(" 错误 ", f" 删除模板时出错 : {str(e)}")
+            return
+
+        # 更新模板列表
+        self.load_templates_refresh()
+        self.template_combobox.set(" 选择模板 ")
+
+    def on_file_drop(self, event):
+        file_path = event.data
+        # 检查文件扩展名
+        if file_path.lower().endswith(SUBTITLE_EXTENSIONS + ARCHIVE_EXTENSIONS):
+            self.srt_file_entry.delete(0, tk.END)
+            self.srt_file_entry.insert(0, file_path)
+        else:
+            messagebox.showerror(" 错误 ", " 请拖入有效的 .srt、.ass 文件或 .zip 字幕包。")
+
+    def process_subtitles(self):
+        if self.worker is not None:
+            return
+
+        input_file = self.srt_file_entry.get().strip()
+
+        if not os.path.isfile(input_file):
+            messagebox.showerror(" 错误 ", " 请选择有效的字幕文件 ")
+            return
+
+        try:
+            pair_tolerance = int(self.pair_tolerance_entry.get().strip() or "0")
+        except ValueError:
+            pair_tolerance = -1
+        if pair_tolerance < 0:
+            messagebox.showerror(" 错误 ", " 配对误差必须是不小于 0 的整数（毫秒） ")
+            return
+
+        self.status_label.config(text=" 处理中 ...", fg="orange")
+
+        try:
+            chinese_font = self.chinese_font_entry.get().strip() or " 寒蝉端黑体 Compact"
+            english_font = self.english_font_entry.get().strip() or chinese_font
+            chinese_font_size = self.chinese_font_size_entry.get().strip() or "18"
+            english_font_size = self.english_font_size_entry.get().strip() or "12"
+            chinese_font_color = self.chinese_font_color_entry.get().strip() or "#C8C8C8"
+            english_font_color = self.english_font_color_entry.get().strip() or "#0F94CB"
+            chinese_bold = self.chinese_bold_var.get()
+            english_bold = self.english_bold_var.get()
+            chinese_italic = self.chinese_italic_var.get()
+            english_italic = self.english_italic_var.get()
+            chinese_blur = self.chinese_blur_var.get()
+            english_blur = self.english_blur_var.get()
+            shadow_opacity = self.shadow_opacity_entry.get().strip() or "255"
+    
+            # 创建基于输入文件名的输出文件名，扩展名为 .srt，勾选输出 ASS 文件时为 .ass
+            # 字幕包输出为同一目录下的新 zip，其中每个字幕的扩展名按同样的规则
+            base_name = os.path.splitext(os.path.basename(input_file))[0]
+            extension = ".ass" if self.output_ass_var.get() else ".srt"
+            is_archive = input_file.lower().endswith(ARCHIVE_EXTENSIONS)
+            output_file = os.path.join(os.path.dirname(input_file),
+                                      f"{chinese_font}_{english_font}_{base_name}{'.zip' if is_archive else extension}")
+        except Exception as e:
+            self.status_label.config(text=f" 处理过程中出现未知错误 : {str(e)}", fg="red")
+            return
+
+        # 在工作线程中处理，界面保持响应
+        self.cancel_event = threading.Event()
+        self.process_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar.config(mode="determinate", maximum=1, value=0)
+        self.profile_label.config(text="")
+        profile_callback = self.report_profile if self.show_profile_var.get() else None
+
+        if is_archive:
+            self.start_worker(lambda: add_styles_to_archive(
+                input_file, output_file, chinese_font, english_font, chinese_font_size,
+                english_font_size, chinese_font_color, english_font_color, chinese_bold,
+                english_bold, chinese_italic, english_italic, chinese_blur, english_blur,
+                shadow_opacity, output_format=extension[1:], progress_callback=self.report_progress,
+                cancel_event=self.cancel_event, pair_tolerance=pair_tolerance),
+                self.on_subtitles_processed)
+            return
+
+        self.start_worker(lambda: add_styles_to_subtitles(
+            input_file, output_file, chinese_font, english_font, chinese_font_size,
+            english_font_size, chinese_font_color, english_font_color, chinese_bold,
+            english_bold, chinese_italic, english_italic, chinese_blur, english_blur,
+            shadow_opacity, progress_callback=self.report_progress, cancel_event=self.cancel_event,
+            profile_callback=profile_callback, pair_tolerance=pair_tolerance),
+            self.on_subtitles_processed)
+
+    def on_subtitles_processed(self, result):
+        self.process_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+
+        if isinstance(result, Exception):
+            self.status_label.config(text=f" 处理过程中出现未知错误 : {str(result)}", fg="red")
+        elif result == CANCELLED_MESSAGE:
+            self.progress_bar.config(value=0)
+            self.status_label.config(text=" 已取消处理 ", fg="orange")
+        elif isinstance(result, str) and os.path.isfile(result):
+            self.status_label.config(text=f" 处理完成 : {result}", fg="green")
+        else:
+            # 显示详细错误信息
+            error_msg = result if isinstance(result, str) else " 未知错误 "
+            self.status_label.config(text=f" 处理失败 : {error_msg}", fg="red")
+            
+            # 如果是编码错误，提供更多帮助
+            if "codec can't decode" in error_msg or " 无法解码 " in error_msg:
+                messagebox.showinfo(" 编码错误 ", 
+                                 " 字幕文件编码格式无法识别。尝试以下解决方案 :\n\n"
+                                 "1. 使用记事本打开文件，另存为时选择 UTF-8 编码 \n"
+                                 "2. 尝试使用其他字幕处理工具先转换文件格式 \n"
+                                 "3. 如果是 ASS 文件，检查文件格式是否标准 ")
@@ -0,0 +1,53 @@
+""" srtFormat 的共享模块，供命令行版本、GUI 版本和其他程序共同使用 """
+from .cue import Cue, format_srt_time, format_srt_timestamp, parse_ass_time, parse_srt_timestamp
+from .encoding import decode_subtitle_bytes, detect_encoding, iter_text_lines, read_subtitle_text
+from .ass import iter_ass_document
+from .engine import (
+    OUTPUT_FORMATS,
+    iter_formatted_cues,
+    output_format_for,
+    parse_file,
+    parse_merged_files,
+    parse_text,
+    style_bytes,
+    style_file,
+    style_file_variants,
+    style_merged_files,
+    style_text,
+)
+from .errors import EncodingMismatch, ProcessingCancelled, SubtitleError
+from .manifest import MANIFEST_NAME, Manifest, style_hash
+from .merge import iter_merged_cues, merge_cues
+from .parser import detect_subtitle_format, iter_cues, sniff_subtitle_format
+from .retime import CueTimes, Retime, build_retime, retime_cues
+from .scanner import iter_buffer_cues, map_file, page_cues, probe_buffer
+from .selection import (
+    ARCHIVE_EXTENSIONS,
+    SUBTITLE_EXTENSIONS,
+    build_output_file,
+    build_variant_outputs,
+    episode_key,
+    expand_output_pattern,
+    get_file_priority,
+    is_archive_file,
+    is_subtitle_candidate,
+    language_tag,
+    output_prefixes,
+    safe_file_name,
+    select_best_file,
+    select_episode_files,
+    select_language_pair,
+    strip_language_tag,
+    variant_output_prefixes,
+)
+from .styler import iter_styled_cues
+from .templates import (
+    DEFAULT_TEMPLATES_PATH,
+    TemplateRegistry,
+    compile_style,
+    compile_template_styles,
+    get_registry,
+    validate_template,
+)
+from .timing import FileProfile, add_profile_hook, format_profile_table, remove_profile_hook
+from .writer import OUTPUT_ENCODINGS, OUTPUT_NEWLINES, AtomicOutput, write_styled, write_styled_variants
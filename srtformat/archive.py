@@ -0,0 +1,225 @@
+"""
+直接处理 zip 字幕包：用 zipfile 在内存中读取选出的字幕，不需要先解压到磁盘
+
+整季的字幕包中通常每一集有多个语言版本，每一集按 get_file_priority 选出一个文件（见 select_episode_files）。
+各个文件的解码、解析和添加样式与流水线相同，都由 render_file 完成，可以在进程池中并行；
+结果写到一个新的 zip（压缩包内的文件夹结构不变），或者写到一个文件夹中。
+导入本模块会导入 asyncio（render_file 所在的 pipeline 模块），srtformat 不默认导入它，需要时再导入：
+
+    from srtformat.archive import style_archive
+    results = style_archive("Season 1.zip", [("", "楷体", "Arial", chinese_style, english_style)])
+"""
+import collections
+import os
+import posixpath
+import zipfile
+
+from .errors import ProcessingCancelled, SubtitleError
+from .pipeline import render_file
+from .selection import build_output_file, build_variant_outputs, is_subtitle_candidate, select_episode_files
+from .writer import AtomicOutput, write_bytes_variants
+
+# 压缩包中不处理的文件夹，如 macOS 压缩时加入的资源分支
+_IGNORED_MEMBER_DIRS = ("__MACOSX/",)
+
+
+def _safe_member_name(member_name):
+    # 不能用于输出路径的成员名（绝对路径、含 ..）返回 None，防止写到输出位置之外
+    parts = member_name.replace("\\", "/").split("/")
+    if member_name.startswith(("/", "\\")) or ".." in parts or (parts and ":" in parts[0]):
+        return None
+    return "/".join(part for part in parts if part and part != ".")
+
+
+def list_archive_subtitles(archive, skip_prefixes=()):
+    """ 压缩包（路径或已打开的 ZipFile）中的字幕文件成员名，跳过文件夹、__MACOSX、._ 开头的文件和之前生成的输出文件 """
+    if not isinstance(archive, zipfile.ZipFile):
+        with open_archive(archive) as opened:
+            return list_archive_subtitles(opened, skip_prefixes)
+    names = []
+    for info in archive.infolist():
+        base_name = posixpath.basename(info.filename)
+        if info.is_dir() or info.filename.startswith(_IGNORED_MEMBER_DIRS) or base_name.startswith("._"):
+            continue
+        if is_subtitle_candidate(base_name, skip_prefixes):
+            names.append(info.filename)
+    return names
+
+
+def open_archive(archive_path):
+    """ 打开 zip 压缩包，不是有效的 zip 文件或读取失败时抛出 SubtitleError """
+    try:
+        return zipfile.ZipFile(archive_path)
+    except (OSError, zipfile.BadZipFile) as e:
+        raise SubtitleError(f" 无法读取压缩包 : {str(e)}")
+
+
+def default_archive_output(archive_path, variants):
+    """ 默认的输出位置：压缩包旁边的新 zip，文件名按第一个模板的字体加前缀，与 build_output_file 相同 """
+    directory, archive_name = os.path.split(archive_path)
+    _, chinese_font, english_font = variants[0][:3]
+    return build_output_file(directory, archive_name, chinese_font, english_font, os.path.splitext(archive_name)[1])
+
+
+def build_member_outputs(member_name, variants, extension=".srt"):
+    """ 一个成员在输出中的相对路径（用 / 分隔），每个模板一项，文件名规则与 build_variant_outputs 相同 """
+    directory, file_name = posixpath.split(member_name)
+    return [posixpath.join(directory, output_name)
+            for output_name in build_variant_outputs("", file_name, [variant[:3] for variant in variants], extension)]
+
+
+class _ZipOutput:
+    """ 写出到新的 zip：先写入同目录下的临时文件，全部写完后再替换目标文件 """
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.target = AtomicOutput(output_file)
+        self.archive = None
+
+    def open(self):
+        self.archive = zipfile.ZipFile(self.target.open(), "w", zipfile.ZIP_DEFLATED)
+
+    def write(self, relative_paths, contents):
+        if self.archive is None:
+            self.open()
+        for relative_path, data in zip(relative_paths, contents):
+            self.archive.writestr(relative_path, data)
+        return [os.path.join(self.output_file, relative_path) for relative_path in relative_paths]
+
+    def finish(self):
+        # 没有任何成功的文件时不生成 zip
+        if self.archive is None:
+            return
+        self.archive.close()
+        self.target.commit()
+
+    def discard(self):
+        self.target.discard()
+
+
+class _DirectoryOutput:
+    """ 写出到文件夹，压缩包内的文件夹结构不变 """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def write(self, relative_paths, contents):
+        output_files = [os.path.join(self.output_dir, *relative_path.split("/")) for relative_path in relative_paths]
+        for output_file in output_files:
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        write_bytes_variants(list(zip(output_files, contents)), fsync=False)
+        return output_files
+
+    def finish(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+def style_archive(archive_path, variants, output_path=None, members=None, workers=None, keep_empty_breaks=False,
+                  output_format="srt", output_encoding="utf-8", newline=None, retime=None, on_result=None,
+                  cancel_event=None, skip_prefixes=(), pair_tolerance=0):
+    """
+    处理 zip 中的字幕，返回 [(成员名, 输出文件列表, 错误信息), ...]，成功时错误信息为 None
+    :param variants: [(模板名, 中文字体, 英文字体, 中文样式前缀, 英文样式前缀), ...]，用于生成输出文件名和样式
+    :param output_path: 以 .zip 结尾时写到新的 zip，否则写到这个文件夹；None 表示 default_archive_output
+    :param members: 要处理的成员名，None 表示按 select_episode_files 每一集选一个
+    :param workers: 并行的进程数，None 表示 CPU 核心数；1 或只有一个文件时在当前进程中处理
+    :param output_format: "srt" 或 "ass"
+    :param on_result: on_result(成员名, 输出文件列表, 错误信息)，每个文件完成后按成员的顺序调用
+    :param cancel_event: 被设置后停止处理，已写出的临时 zip 删除，抛出 ProcessingCancelled
+    :param pair_tolerance: 分离格式配对时开始和结束时间允许的误差（毫秒）
+    写到 zip 时输出文件列表中的路径为 "输出.zip/成员路径"。压缩包不能读取时抛出 SubtitleError
+    """
+    variants = list(variants)
+    output_path = output_path or default_archive_output(archive_path, variants)
+    output = _ZipOutput(output_path) if output_path.lower().endswith(".zip") else _DirectoryOutput(output_path)
+    styles = [(output_format, chinese_style, english_style) for _, _, _, chinese_style, english_style in variants]
+    render_options = (keep_empty_breaks, output_encoding, newline, retime, pair_tolerance)
+    results = []
+
+    def finish(member_name, output_files, error=None):
+        results.append((member_name, output_files, error))
+        if on_result is not None:
+            on_result(member_name, output_files, error)
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise ProcessingCancelled(" 已取消 ")
+
+    with open_archive(archive_path) as archive:
+        if members is None:
+            members = select_episode_files(list_archive_subtitles(archive, skip_prefixes))
+        jobs = []
+        for member_name in members:
+            relative_name = _safe_member_name(member_name)
+            if relative_name is None:
+                finish(member_name, [], f" 压缩包中的路径无效 : {member_name}")
+                continue
+            jobs.append((member_name, build_member_outputs(relative_name, variants, "." + output_format)))
+
+        def read_member(member_name):
+            # 成员的路径放在压缩包路径后面，解码时按压缩包内的文件夹和发布组缓存检测出的编码
+            try:
+                return os.path.join(archive_path, member_name), archive.read(member_name)
+            except (OSError, KeyError, zipfile.BadZipFile, RuntimeError) as e:
+                raise SubtitleError(f" 读取文件时出错 : {str(e)}")
+
+        def write(member_name, relative_paths, contents):
+            try:
+                finish(member_name, output.write(relative_paths, contents))
+            except OSError as e:
+                finish(member_name, [], f" 写入输出文件时出错 : {str(e)}")
+
+        try:
+            if workers == 1 or len(jobs) <= 1:
+                for member_name, relative_paths in jobs:
+                    check_cancelled()
+                    # 与进程池中的情况相同，任何一个文件出错都只记录这个文件的错误，不影响其他文件
+                    try:
+                        contents = render_file(*read_member(member_name), styles, *render_options)
+                    except Exception as e:
+                        finish(member_name, [], str(e))
+                        continue
+                    write(member_name, relative_paths, contents)
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+                # 同时提交的文件最多为进程数的两倍，压缩包很大时不会把所有成员都读进内存
+                max_in_flight = 2 * (workers or os.cpu_count() or 1)
+                pending = iter(jobs)
+                in_flight = collections.deque()
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    try:
+                        # 按成员的顺序取结果，输出 zip 中的顺序与输入相同
+                        while True:
+                            for member_name, relative_paths in pending:
+                                try:
+                                    future = executor.submit(render_file, *read_member(member_name), styles,
+                                                             *render_options)
+                                except SubtitleError as e:
+                                    future = e
+                                in_flight.append((member_name, relative_paths, future))
+                                if len(in_flight) >= max_in_flight:
+                                    break
+                            if not in_flight:
+                                break
+                            member_name, relative_paths, future = in_flight.popleft()
+                            check_cancelled()
+                            if isinstance(future, SubtitleError):
+                                finish(member_name, [], str(future))
+                                continue
+                            try:
+                                contents = future.result()
+                            except Exception as e:
+                                finish(member_name, [], str(e))
+                                continue
+                            write(member_name, relative_paths, contents)
+                    except BaseException:
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        raise
+            output.finish()
+        except BaseException:
+            output.discard()
+            raise
+    return results
@@ -0,0 +1,147 @@
+"""
+输出原生的 ASS 字幕：中文和英文各定义一个 [V4+ Styles] 样式，事件只引用样式名
+
+SRT 输出在每一行前面都加上完整的样式标签，文件较大，播放器每个事件都要解析一遍标签。
+ASS 输出把样式前缀（compile_style 或 TemplateRegistry.styles 生成的 {\\fn..\\fs..\\1c..} 标签）转换为样式定义，
+事件中只在同一条字幕从中文切换到英文时写一个 {\\rEnglish}；样式定义中没有对应字段的标签（如 \\be1）才保留在行内。
+颜色和阴影透明度与行内标签的写法相同，显示效果与 SRT 输出一致。
+"""
+import re
+
+from .classify import is_chinese_line
+
+# 样式名
+CHINESE_STYLE_NAME = "Chinese"
+ENGLISH_STYLE_NAME = "English"
+
+# 画面参考分辨率，与播放器显示没有样式信息的 SRT 时使用的默认值相同，字号的显示大小因此与 SRT 输出一致
+PLAY_RES_X = 384
+PLAY_RES_Y = 288
+
+# 样式前缀中没有给出的字段使用的默认值；没有 \b 标签时播放器按加粗显示（模板的 chinese_bold 为 true 时不写 \b）
+DEFAULT_STYLE_FIELDS = {
+    "font": "Arial",
+    "size": "18",
+    "color": "FFFFFF",
+    "bold": True,
+    "italic": False,
+    "shadow_alpha": "00",
+}
+
+STYLE_FORMAT = ("Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+                "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+                "MarginL, MarginR, MarginV, Encoding")
+EVENT_FORMAT = "Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
+
+# SRT 中的 HTML 标签在 ASS 中不起作用，转换为对应的特效标签
+_HTML_TAGS = {"<i>": r"{\i1}", "</i>": r"{\i0}", "<b>": r"{\b1}", "</b>": r"{\b0}",
+              "<u>": r"{\u1}", "</u>": r"{\u0}", "<s>": r"{\s1}", "</s>": r"{\s0}"}
+_HTML_TAG_RE = re.compile(r'</?[ibus]>|</?font[^>]*>', re.IGNORECASE)
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_style_prefix(prefix):
+    """
+    把样式前缀（如 {\\fn字体\\fs18\\1c&HC8C8C8&\\b0\\4a&H00&}）转换为样式字段，返回 (字段字典, 其他标签)
+    样式定义中没有对应字段的标签（如 \\be1）原样放在其他标签中，由事件在行内使用
+    """
+    fields = dict(DEFAULT_STYLE_FIELDS)
+    extra = []
+    for block in re.findall(r'\{([^}]*)\}', prefix):
+        for tag in block.split('\\')[1:]:
+            if tag.startswith("fn"):
+                fields["font"] = tag[2:].replace(",", " ").strip() or fields["font"]
+            elif tag.startswith("fs") and _NUMBER_RE.fullmatch(tag[2:]):
+                fields["size"] = tag[2:]
+            elif tag.startswith(("1c&H", "c&H")):
+                fields["color"] = tag.split("&H", 1)[1].rstrip("&").upper().zfill(6)[-6:]
+            elif tag.startswith("4a&H"):
+                fields["shadow_alpha"] = tag[4:].rstrip("&").upper().zfill(2)[-2:]
+            elif tag in ("b0", "b1"):
+                fields["bold"] = tag == "b1"
+            elif tag in ("i0", "i1"):
+                fields["italic"] = tag == "i1"
+            elif tag:
+                extra.append("\\" + tag)
+    return fields, "".join(extra)
+
+
+def format_style_line(name, fields):
+    """ 生成 [V4+ Styles] 中的一行 """
+    return (f"Style: {name},{fields['font']},{fields['size']},&H00{fields['color']},&H000000FF,&H00000000,"
+            f"&H{fields['shadow_alpha']}000000,{-1 if fields['bold'] else 0},{-1 if fields['italic'] else 0},"
+            f"0,0,100,100,0,0,1,1,1,2,10,10,10,1")
+
+
+def format_ass_time(milliseconds):
+    """ 将毫秒数格式化为 ASS 时间（H:MM:SS.cc），四舍五入到百分之一秒 """
+    centiseconds = (milliseconds + 5) // 10
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    seconds, centiseconds = divmod(centiseconds, 100)
+    return "%d:%02d:%02d.%02d" % (hours, minutes, seconds, centiseconds)
+
+
+def convert_html_tags(line):
+    """ 把 SRT 中的 <i>、<b>、<u>、<s> 转换为 ASS 标签，去掉 <font> 标签 """
+    if "<" not in line:
+        return line
+    return _HTML_TAG_RE.sub(lambda match: _HTML_TAGS.get(match.group(0).lower(), ""), line)
+
+
+def ass_header(chinese_style, english_style):
+    """ 生成 [Script Info] 和 [V4+ Styles] 部分，返回 (文本, 中文行内标签, 英文行内标签) """
+    chinese_fields, chinese_extra = parse_style_prefix(chinese_style)
+    english_fields, english_extra = parse_style_prefix(english_style)
+    header = (
+        "[Script Info]\n"
+        "; Generated by srtFormat\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {PLAY_RES_X}\n"
+        f"PlayResY: {PLAY_RES_Y}\n"
+        "WrapStyle: 0\n"
+        "ScaledBorderAndShadow: yes\n"
+        "\n"
+        "[V4+ Styles]\n"
+        f"Format: {STYLE_FORMAT}\n"
+        f"{format_style_line(CHINESE_STYLE_NAME, chinese_fields)}\n"
+        f"{format_style_line(ENGLISH_STYLE_NAME, english_fields)}\n"
+        "\n"
+        "[Events]\n"
+        f"Format: {EVENT_FORMAT}\n"
+    )
+    return header, chinese_extra, english_extra
+
+
+def iter_ass_document(cues, chinese_style, english_style):
+    """
+    生成完整的 ASS 文件：先生成文件头，再每次生成一个字幕项的 Dialogue 行
+    每行按文字判断使用中文还是英文样式（与 SRT 输出相同），空行不输出，没有文字的字幕项不生成事件
+    """
+    header, chinese_extra, english_extra = ass_header(chinese_style, english_style)
+    yield header
+    chinese_open = "{" + chinese_extra + "}" if chinese_extra else ""
+    english_open = "{" + english_extra + "}" if english_extra else ""
+    chinese_switch = "{\\r" + CHINESE_STYLE_NAME + chinese_extra + "}"
+    english_switch = "{\\r" + ENGLISH_STYLE_NAME + english_extra + "}"
+    for cue in cues:
+        parts = []
+        first_style = style = None
+        for position, line in enumerate(cue.lines):
+            if not line:
+                continue
+            is_chinese = is_chinese_line(line, position)
+            line = convert_html_tags(line)
+            if style is None:
+                first_style = is_chinese
+                parts.append((chinese_open if is_chinese else english_open) + line)
+            elif is_chinese == style:
+                parts.append(line)
+            else:
+                parts.append((chinese_switch if is_chinese else english_switch) + line)
+            style = is_chinese
+        if not parts:
+            continue
+        event_style = CHINESE_STYLE_NAME if first_style else ENGLISH_STYLE_NAME
+        yield (f"Dialogue: 0,{format_ass_time(cue.start)},{format_ass_time(cue.end)},{event_style},,0,0,0,,"
+               + "\\N".join(parts) + "\n")
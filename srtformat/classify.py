@@ -0,0 +1,73 @@
+"""
+按字符判断每行字幕的语言：有中日韩文字的行使用中文样式，有拉丁等字母文字的行使用英文样式
+
+码位范围表在导入时编译成正则表达式的字符集，判断一行只需一两次 C 实现的查找。
+"""
+import re
+
+# 一行字幕的类型
+LINE_CJK = "cjk"
+LINE_LATIN = "latin"
+# 没有文字（只有数字、标点、音乐符号等），由所在位置决定样式
+LINE_NEUTRAL = "neutral"
+
+# 中日韩文字和全角标点的码位范围
+CJK_RANGES = (
+    (0x2E80, 0x2FDF),    # 部首
+    (0x3000, 0x303F),    # 中日韩符号和标点
+    (0x3040, 0x30FF),    # 平假名、片假名
+    (0x3100, 0x312F),    # 注音符号
+    (0x3130, 0x318F),    # 谚文兼容字母
+    (0x3190, 0x31FF),    # 汉文训读、注音扩展、笔画、片假名扩展
+    (0x3200, 0x33FF),    # 带圈字符、中日韩兼容字符
+    (0x3400, 0x4DBF),    # 扩展 A
+    (0x4E00, 0x9FFF),    # 基本汉字
+    (0xAC00, 0xD7AF),    # 谚文音节
+    (0xF900, 0xFAFF),    # 兼容汉字
+    (0xFE30, 0xFE4F),    # 竖排标点
+    (0xFF00, 0xFFEF),    # 全角字符
+    (0x20000, 0x3134F),  # 扩展 B 到 G
+)
+
+# 拉丁字母，以及同样使用英文样式的希腊字母和西里尔字母
+LATIN_RANGES = (
+    (0x0041, 0x005A),
+    (0x0061, 0x007A),
+    (0x00C0, 0x024F),
+    (0x0370, 0x03FF),
+    (0x0400, 0x04FF),
+    (0x1E00, 0x1EFF),
+)
+
+
+def _compile_ranges(ranges):
+    return re.compile("[" + "".join(f"{re.escape(chr(low))}-{re.escape(chr(high))}" for low, high in ranges) + "]")
+
+
+# 匹配任意一个中日韩字符、拉丁字母的正则表达式，批量处理时可以直接绑定 .search 使用
+CJK_PATTERN = _compile_ranges(CJK_RANGES)
+LATIN_PATTERN = _compile_ranges(LATIN_RANGES)
+
+
+def classify_line(line):
+    """ 返回一行文本的类型：LINE_CJK、LINE_LATIN 或 LINE_NEUTRAL；同时有中文和英文时按中文处理 """
+    if line.isascii():
+        # 纯 ASCII 的行不可能有中文，只需查找字母
+        return LINE_LATIN if LATIN_PATTERN.search(line) else LINE_NEUTRAL
+    if CJK_PATTERN.search(line):
+        return LINE_CJK
+    return LINE_LATIN if LATIN_PATTERN.search(line) else LINE_NEUTRAL
+
+
+def classify_lines(lines):
+    """ 批量判断多行文本的类型，返回列表 """
+    return list(map(classify_line, lines))
+
+
+def is_chinese_line(line, position=0):
+    """
+    该行是否使用中文样式
+    :param position: 在字幕项中的行号，没有文字的行第一行按中文、其余按英文处理（与原来按位置分配的结果相同）
+    """
+    line_type = classify_line(line)
+    return line_type == LINE_CJK or (line_type == LINE_NEUTRAL and position == 0)
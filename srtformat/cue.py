@@ -0,0 +1,103 @@
+""" 字幕项的紧凑表示和时间格式转换 """
+import re
+
+from .errors import SubtitleError
+
+# 毫秒部分可以省略，如 00:00:01 --> 00:00:02
+_SRT_TIMESTAMP_RE = re.compile(
+    r'(\d+):(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?')
+
+
+class Cue:
+    """
+    一条字幕：序号、开始和结束时间（整数毫秒）、文本行
+    文本行的数量不限，通常第一行是中文、第二行是英文，添加样式时按每行的文字判断使用哪种样式
+    使用 __slots__，大量字幕常驻内存时每条只占几十字节
+    """
+    __slots__ = ("index", "start", "end", "lines")
+
+    def __init__(self, index, start, end, lines=()):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.lines = tuple(lines)
+
+    @property
+    def timestamp(self):
+        """ SRT 格式的时间轴，如 00:00:01,000 --> 00:00:02,500 """
+        return format_srt_timestamp(self.start, self.end)
+
+    @property
+    def text(self):
+        """ 所有文本行，用换行符连接 """
+        return "\n".join(self.lines)
+
+    def __eq__(self, other):
+        if not isinstance(other, Cue):
+            return NotImplemented
+        return (self.index, self.start, self.end, self.lines) == (other.index, other.start, other.end, other.lines)
+
+    def __repr__(self):
+        return f"Cue({self.index!r}, {self.start!r}, {self.end!r}, {self.lines!r})"
+
+
+def format_srt_time(milliseconds):
+    """ 将毫秒数格式化为 SRT 时间（HH:MM:SS,mmm） """
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return "%02d:%02d:%02d,%03d" % (hours, minutes, seconds, milliseconds)
+
+
+# 两位和三位数字的字符串表，格式化时间轴时查表比格式化数字快
+_TWO_DIGITS = tuple('%02d' % i for i in range(100))
+_THREE_DIGITS = tuple('%03d' % i for i in range(1000))
+
+
+def format_srt_timestamp(start, end):
+    """ 将开始和结束毫秒数格式化为 SRT 时间轴，如 00:00:01,000 --> 00:00:02,500 """
+    start_hours, start = divmod(start, 3600000)
+    start_minutes, start = divmod(start, 60000)
+    start_seconds, start = divmod(start, 1000)
+    end_hours, end = divmod(end, 3600000)
+    end_minutes, end = divmod(end, 60000)
+    end_seconds, end = divmod(end, 1000)
+    if start_hours < 100 and end_hours < 100 and start >= 0 and end >= 0:
+        two, three = _TWO_DIGITS, _THREE_DIGITS
+        return f"{two[start_hours]}:{two[start_minutes]}:{two[start_seconds]},{three[start]} --> " \
+               f"{two[end_hours]}:{two[end_minutes]}:{two[end_seconds]},{three[end]}"
+    return "%02d:%02d:%02d,%03d --> %02d:%02d:%02d,%03d" % (
+        start_hours, start_minutes, start_seconds, start, end_hours, end_minutes, end_seconds, end)
+
+
+def _to_milliseconds(hours, minutes, seconds, fraction):
+    return int(hours) * 3600000 + int(minutes) * 60000 + int(seconds) * 1000 + int((fraction or '0').ljust(3, '0'))
+
+
+def parse_srt_timestamp(line):
+    """
+    解析 SRT 时间轴行，返回 (开始毫秒, 结束毫秒)，不是时间轴时返回 None
+    含有 --> 却无法解析时抛出 SubtitleError，不悄悄丢掉这条字幕
+    """
+    match = _SRT_TIMESTAMP_RE.search(line)
+    if match is None:
+        if '-->' in line:
+            raise SubtitleError(f" 无法解析时间轴 : {line.strip()}")
+        return None
+    groups = match.groups()
+    if groups[3] is not None and groups[7] is not None and len(groups[3]) == 3 and len(groups[7]) == 3:
+        # 常见的三位毫秒，直接计算
+        start_hours, start_minutes, start_seconds, start, end_hours, end_minutes, end_seconds, end = map(int, groups)
+        return (start_hours * 3600000 + start_minutes * 60000 + start_seconds * 1000 + start,
+                end_hours * 3600000 + end_minutes * 60000 + end_seconds * 1000 + end)
+    return _to_milliseconds(*groups[:4]), _to_milliseconds(*groups[4:])
+
+
+def parse_ass_time(value):
+    """ 将 ASS 时间（H:MM:SS.cc）转换为毫秒数，格式不对时抛出 SubtitleError """
+    try:
+        hours, minutes, seconds = value.strip().split(':')
+        seconds, _, fraction = seconds.partition('.')
+        return _to_milliseconds(hours, minutes, seconds, fraction[:3] or '0')
+    except ValueError:
+        raise SubtitleError(f" 无法解析 ASS 时间 : {value.strip()}")
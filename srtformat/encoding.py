@@ -0,0 +1,222 @@
+""" 字幕文件的编码检测和解码：只读一次磁盘，在内存中解码 """
+import codecs
+import os
+import re
+
+from .errors import SubtitleError
+from .timing import measure
+
+# 定义多种可能的编码
+FALLBACK_ENCODINGS = ['utf-8', 'utf-8-sig', 'gbk', 'big5', 'shift-jis', 'cp1252', 'latin-1', 'UTF-16']
+
+# 按 BOM 识别的编码，UTF-32 的 BOM 以 UTF-16 的 BOM 开头，需要先判断
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# chardet 只检测文件开头的这么多字节
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# chardet 在第一次需要时才导入（BOM、UTF-8 和缓存的编码都解码失败时），None 表示还没有尝试导入
+_chardet = None
+
+# 已检测出的编码，按（目录, 发布组）缓存，同一批文件只需检测一次
+_encoding_cache = {}
+
+# 只缓存这些多字节的传统编码：缓存只用来跳过 chardet，排在严格的 UTF-8 之后。
+# BOM 决定的编码只对有 BOM 的那个文件有效；cp1252、latin-1 等单字节编码能解码任何字节，
+# 缓存后同目录的 UTF-8 文件也会被它"成功"解码成乱码，所以都不缓存
+CACHEABLE_ENCODINGS = {'gbk', 'gb2312', 'gb18030', 'big5', 'big5hkscs', 'cp950', 'cp936',
+                       'shift_jis', 'cp932', 'euc_jp', 'euc_kr', 'cp949'}
+
+
+def get_release_group(file_name):
+    """ 从文件名中提取发布组，如 [Group]Name.srt 或 Name-Group.chs.srt """
+    base_name = os.path.basename(file_name)
+    match = re.match(r'^\[([^\]]+)\]', base_name)
+    if match:
+        return match.group(1).lower()
+    stem = base_name.split('.')[0] if base_name.count('.') > 1 else os.path.splitext(base_name)[0]
+    match = re.search(r'-([A-Za-z0-9]+)$', stem)
+    if match:
+        return match.group(1).lower()
+    return None
+
+
+def _encoding_cache_key(file_path):
+    return os.path.dirname(os.path.abspath(file_path)), get_release_group(file_path)
+
+
+def _cacheable_encoding(encoding):
+    try:
+        return codecs.lookup(encoding).name in CACHEABLE_ENCODINGS
+    except LookupError:
+        return False
+
+
+def sniff_bom(raw_data):
+    """ 根据 BOM 判断编码，没有 BOM 时返回 None """
+    for bom, encoding in BOM_ENCODINGS:
+        if raw_data.startswith(bom):
+            return encoding
+    return None
+
+
+def load_chardet():
+    """ 需要时才导入 chardet，没有安装时返回 False，只使用 BOM、UTF-8 和常见编码列表 """
+    global _chardet
+    if _chardet is None:
+        try:
+            import chardet
+        except ImportError:
+            chardet = False
+        _chardet = chardet
+    return _chardet
+
+
+def _chardet_encoding(raw_data, profile=None):
+    chardet = load_chardet()
+    if not chardet:
+        return None
+    sample = raw_data[:ENCODING_SAMPLE_SIZE]
+    with measure(profile, "chardet") as stats:
+        if stats is not None:
+            stats.bytes += len(sample)
+        return chardet.detect(sample)['encoding']
+
+
+def detect_encoding(raw_data):
+    """ 先识别 BOM，再用 chardet 检测开头的一部分字节 """
+    return sniff_bom(raw_data) or _chardet_encoding(raw_data)
+
+
+def _iter_candidate_encodings(raw_data, cached_encoding, profile=None):
+    """
+    按代价从低到高给出候选编码，chardet 只在前面的候选都失败时才调用
+    严格的 UTF-8 总是最先尝试，缓存的编码只用来代替 chardet，不会排在 UTF-8 前面
+    """
+    bom_encoding = sniff_bom(raw_data)
+    if bom_encoding:
+        yield bom_encoding
+        return
+    yield 'utf-8'
+    if cached_encoding:
+        yield cached_encoding
+    yield _chardet_encoding(raw_data, profile)
+    yield from FALLBACK_ENCODINGS
+
+
+def _decode_prefix(sample, encoding):
+    """ sample 是文件开头的一部分时，末尾不完整的多字节字符不算解码失败；返回解码出的文本，失败时返回 None """
+    try:
+        return codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+    except (UnicodeError, LookupError):
+        # 没有 BOM 时 UTF-16 的增量解码器抛出 UnicodeError 而不是 UnicodeDecodeError
+        return None
+
+
+def detect_sample_encoding(sample, file_path=None):
+    """
+    只根据文件开头的一部分字节确定编码，用于不把整个文件读入内存的情况
+    候选顺序与 decode_subtitle_bytes 相同；后面的内容不一定能解码，调用方需要处理解码失败
+    解码结果含有 \x00 时（如没有 BOM 的 UTF-16）不使用这个编码，都不行时返回 None，由调用方解码整个文件
+    """
+    cached_encoding = _encoding_cache.get(_encoding_cache_key(file_path)) if file_path else None
+    tried = []
+    for enc in _iter_candidate_encodings(sample, cached_encoding):
+        if enc is None or enc in tried:
+            continue
+        tried.append(enc)
+        text = _decode_prefix(sample, enc)
+        if text is not None and '\x00' not in text:
+            return enc
+    return None
+
+
+def _decoded(text, enc, cache_key, profile):
+    if profile is not None:
+        profile.info["encoding"] = enc
+    # 同一目录、同一发布组的文件下次 UTF-8 解码失败时直接使用该编码，不再调用 chardet
+    if cache_key and _cacheable_encoding(enc):
+        _encoding_cache[cache_key] = enc
+    return text, None
+
+
+def decode_subtitle_bytes(raw_data, file_path=None, profile=None):
+    """
+    在内存中解码已读取的字节，不再重复读取磁盘
+    :param raw_data: 文件内容
+    :param file_path: 文件路径，用于按目录和发布组缓存检测结果
+    :param profile: 可选的 FileProfile，统计解码（每尝试一种编码计一次）和 chardet 的耗时
+    :return: (文本, 错误信息)
+    """
+    cache_key = _encoding_cache_key(file_path) if file_path else None
+
+    tried = []
+    # 没有 BOM、以英文为主的 UTF-16 也是合法的 UTF-8（和 GBK、latin-1 等），但每隔一个字符就是 \x00：
+    # 解码结果含有 \x00 时继续尝试后面的编码（最后是 UTF-16），都不行时才使用第一个这样的结果
+    with_nul = None
+    for enc in _iter_candidate_encodings(raw_data, _encoding_cache.get(cache_key), profile):
+        if enc is None or enc in tried:
+            continue
+        tried.append(enc)
+        with measure(profile, "decode") as stats:
+            if stats is not None:
+                stats.bytes += len(raw_data)
+            try:
+                text = raw_data.decode(enc)
+            except (UnicodeDecodeError, LookupError):
+                continue
+        if '\x00' in text:
+            with_nul = with_nul or (text, enc)
+            continue
+        return _decoded(text, enc, cache_key, profile)
+
+    if with_nul is not None:
+        return _decoded(*with_nul, cache_key, profile)
+    return None, f" 无法解码文件，尝试了以下编码 : {', '.join(tried)}"
+
+
+def read_subtitle_text(file_path, profile=None):
+    """ 读取字幕文件并解码，返回 (文本, 错误信息) """
+    try:
+        with measure(profile, "read") as stats:
+            with open(file_path, 'rb') as f:
+                raw_data = f.read()
+            if stats is not None:
+                stats.bytes += len(raw_data)
+    except Exception as e:
+        return None, f" 读取文件时出错 : {str(e)}"
+    return decode_subtitle_bytes(raw_data, file_path, profile)
+
+
+def load_subtitle_text(file_path, profile=None):
+    """ 读取字幕文件并解码，失败时抛出 SubtitleError """
+    text, error = read_subtitle_text(file_path, profile)
+    if error:
+        raise SubtitleError(error)
+    return text
+
+
+# 按块切分文本时每块的大致字符数，块越大越快，但临时占用的内存越多
+TEXT_CHUNK_SIZE = 1 << 20
+
+
+def iter_text_lines(text, chunk_size=TEXT_CHUNK_SIZE):
+    """
+    按行切分已解码的文本，逐行生成；每次只切分一块，不会为整个文件建立行列表
+    兼容 \\r\\n、\\n 和只用 \\r 的换行，\\r\\n 换行时行尾保留 \\r，调用方需要 strip()
+    """
+    separator = '\n' if '\n' in text or '\r' not in text else '\r'
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find(separator, start + chunk_size)
+        if end == -1:
+            end = length
+        yield from text[start:end].split(separator)
+        start = end + 1
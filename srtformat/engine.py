@@ -0,0 +1,303 @@
+"""
+字幕处理的库接口：命令行版本、GUI 版本和其他程序共用，不依赖 Tk
+
+    from srtformat import get_registry, style_file
+    chinese_style, english_style = get_registry().styles(template_name)
+    style_file("input.srt", "output.srt", chinese_style, english_style)
+"""
+import itertools
+import os
+
+from .ass import iter_ass_document
+from .encoding import decode_subtitle_bytes, iter_text_lines, load_subtitle_text
+from .errors import EncodingMismatch, ProcessingCancelled, SubtitleError
+from .merge import iter_merged_cues
+from .parser import has_ass_events, iter_cues, iter_pysubs2_cues, load_pysubs2, pair_repeated_cues
+from .retime import retime_cues
+from .scanner import iter_buffer_cues, map_file, probe_buffer
+from .styler import iter_styled_cues
+from .timing import FileProfile, measure, profiling_enabled, publish_profile
+from .writer import write_styled_variants
+
+# 每处理这么多条字幕汇报一次进度、检查一次是否取消
+PROGRESS_INTERVAL = 500
+# 非 ASS 文件超过这个大小时先尝试内存映射扫描，不把整个文件解码到内存中
+MAPPED_SCAN_SIZE = 64 * 1024 * 1024
+
+
+# 可选的输出格式：srt 为每行带样式标签的 SRT，ass 为使用 [V4+ Styles] 的原生 ASS
+OUTPUT_FORMATS = ("srt", "ass")
+
+
+def is_ass_file(file_path):
+    return os.path.splitext(file_path)[1].lower() == '.ass'
+
+
+def output_format_for(output_file):
+    """ 按输出文件的扩展名决定输出格式：.ass 输出原生 ASS，其他输出 SRT """
+    return "ass" if is_ass_file(output_file) else "srt"
+
+
+def iter_formatted_cues(cues, chinese_style, english_style, output_format="srt", keep_empty_breaks=False):
+    """ 按输出格式生成文本：srt 见 iter_styled_cues，ass 见 ass.iter_ass_document（不使用 keep_empty_breaks） """
+    if output_format == "ass":
+        return iter_ass_document(cues, chinese_style, english_style)
+    return iter_styled_cues(cues, chinese_style, english_style, keep_empty_breaks=keep_empty_breaks)
+
+
+def parse_text(text, subtitle_format=None, detect_callback=None, pair_tolerance=0, profile=None):
+    """
+    解析已解码的字幕文本，逐条生成 Cue；subtitle_format 为 None 时自动检测
+    :param detect_callback: detect_callback(格式, 判定依据, 检测读取的行数)，自动检测格式后调用
+    :param pair_tolerance: 分离格式配对时开始和结束时间允许的误差（毫秒）
+    :param profile: 可选的 FileProfile，统计 pysubs2 加载的耗时
+    """
+    if subtitle_format == "ass" and not has_ass_events(text):
+        # 内置解析器只处理 [Events] 部分，其他情况交给 pysubs2 解析
+        pysubs2 = load_pysubs2()
+        if pysubs2 is None:
+            raise SubtitleError(" 未找到 ASS 字幕的 [Events] 部分，请安装 pysubs2 库后重试 : pip install pysubs2")
+        try:
+            with measure(profile, "pysubs2"):
+                subs = pysubs2.SSAFile.from_string(text)
+        except Exception as e:
+            raise SubtitleError(f" 无法加载字幕文件 : {str(e)}")
+        return pair_repeated_cues(iter_pysubs2_cues(subs), pair_tolerance)
+    return iter_cues(iter_text_lines(text), subtitle_format, detect_callback, pair_tolerance)
+
+
+def parse_file(input_file):
+    """ 读取并解析字幕文件，逐条生成 Cue；.ass 文件按 ASS 解析，其他文件自动检测格式 """
+    text = load_subtitle_text(input_file)
+    return parse_text(text, "ass" if is_ass_file(input_file) else None)
+
+
+def _load_merge_inputs(chinese_file, english_file, profile=None):
+    """ 读取两个单语字幕文件，返回 [(文本, 格式), ...] """
+    return [(load_subtitle_text(input_file, profile), "ass" if is_ass_file(input_file) else None)
+            for input_file in (chinese_file, english_file)]
+
+
+def parse_merged_files(chinese_file, english_file, tolerance=0, profile=None):
+    """
+    读取中文和英文两个单语字幕文件（如 movie.chs.srt 和 movie.eng.srt），按时间区间的重叠合并，逐条生成双语 Cue
+    :param tolerance: 两条字幕之间允许的间隔（毫秒），见 merge.iter_merged_cues
+    """
+    (chinese_text, chinese_format), (english_text, english_format) = _load_merge_inputs(chinese_file, english_file,
+                                                                                        profile)
+    return iter_merged_cues(parse_text(chinese_text, chinese_format, profile=profile),
+                            parse_text(english_text, english_format, profile=profile), tolerance)
+
+
+def estimate_cue_count(text, is_ass=False):
+    """ 估计字幕条数，用于显示确定的进度 """
+    if is_ass:
+        return text.count('\nDialogue:') + text.startswith('Dialogue:')
+    return text.count(' --> ')
+
+
+def iter_with_progress(styled, total, progress_callback=None, cancel_event=None):
+    """ 透传已添加样式的字幕，定期汇报进度，取消时抛出 ProcessingCancelled """
+    done = 0
+    for text in styled:
+        yield text
+        done += 1
+        if done % PROGRESS_INTERVAL == 0:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ProcessingCancelled(" 已取消 ")
+            if progress_callback:
+                progress_callback(done, max(total, done))
+    if progress_callback:
+        progress_callback(done, max(done, 1))
+
+
+def style_text(text, chinese_style, english_style, subtitle_format=None, keep_empty_breaks=False, retime=None,
+               output_format="srt", pair_tolerance=0):
+    """
+    为已解码的字幕文本添加样式，返回 SRT（或 output_format 为 "ass" 时返回 ASS）文本，适合在服务中直接调用
+    retime 为可选的 Retime，同时调整时间；pair_tolerance 为分离格式配对时允许的误差（毫秒）
+    """
+    cues = retime_cues(parse_text(text, subtitle_format, pair_tolerance=pair_tolerance), retime)
+    return "".join(iter_formatted_cues(cues, chinese_style, english_style, output_format, keep_empty_breaks))
+
+
+def style_bytes(raw_data, chinese_style, english_style, subtitle_format=None, keep_empty_breaks=False,
+                file_path=None, retime=None, output_format="srt", pair_tolerance=0):
+    """
+    为未解码的字幕内容（如从标准输入读取的字节）添加样式，逐条生成 SRT（或 ASS）文本，调用方决定写到哪里
+    :param file_path: 来源文件的路径，用于按目录缓存编码；没有时为 None
+    :param retime: 可选的 Retime，添加样式的同时调整时间
+    :param pair_tolerance: 分离格式配对时开始和结束时间允许的误差（毫秒）
+    无法解码时立即抛出 SubtitleError
+    """
+    text, error = decode_subtitle_bytes(raw_data, file_path)
+    if error:
+        raise SubtitleError(error)
+    cues = retime_cues(parse_text(text, subtitle_format, pair_tolerance=pair_tolerance), retime)
+    return iter_formatted_cues(cues, chinese_style, english_style, output_format, keep_empty_breaks)
+
+
+def _write_variants(cues, variants, keep_empty_breaks, total, progress_callback, cancel_event, output_options,
+                    profile=None, retime=None):
+    """
+    调整时间、添加样式并写出所有变体，返回每个文件写入的字节数
+    字幕流只解析一次，用 itertools.tee 复制给每个变体；取消或出错时所有已有的输出文件都保持原样
+    """
+    if profile is not None:
+        cues = profile.timed_iter(cues, "parse")
+    # 在复制之前调整时间，每条字幕只调整一次
+    cues = retime_cues(cues, retime, profile)
+    if progress_callback or cancel_event:
+        cues = iter_with_progress(cues, total, progress_callback, cancel_event)
+    streams = itertools.tee(cues, len(variants)) if len(variants) > 1 else (cues,)
+    outputs = []
+    for (output_file, chinese_style, english_style), stream in zip(variants, streams):
+        styled = iter_formatted_cues(stream, chinese_style, english_style, output_format_for(output_file),
+                                     keep_empty_breaks)
+        if profile is not None:
+            styled = profile.timed_iter(styled, "style")
+        outputs.append((output_file, styled))
+
+    try:
+        with measure(profile, "write") as stats:
+            byte_counts = write_styled_variants(outputs, **output_options)
+            if stats is not None:
+                stats.bytes += sum(byte_counts)
+        return byte_counts
+    except OSError as write_error:
+        raise SubtitleError(f" 写入输出文件时出错 : {str(write_error)}")
+
+
+def _style_mapped_file(input_file, variants, keep_empty_breaks, progress_callback, cancel_event, detect_callback,
+                       output_options, profile=None, retime=None, pair_tolerance=0):
+    """ 用内存映射扫描处理大的标准格式文件，不能扫描时返回 False """
+    with map_file(input_file) as buffer:
+        with measure(profile, "detect"):
+            probe = probe_buffer(buffer, input_file, pair_tolerance=pair_tolerance)
+        if probe is None:
+            return False
+        encoding, start, decided_by, lines_read, estimated_count = probe
+        if profile is not None:
+            # 映射的文件按需从磁盘读入，读取的时间包含在解析中
+            profile.stats("read").bytes += len(buffer)
+            profile.info.update(encoding=encoding, format="standard", decided_by=decided_by,
+                                detect_lines=lines_read, mapped=True)
+        if detect_callback:
+            detect_callback("standard", decided_by, lines_read)
+        cues = iter_buffer_cues(buffer, encoding, start)
+        _write_variants(cues, variants, keep_empty_breaks, estimated_count, progress_callback, cancel_event,
+                        output_options, profile, retime)
+    return True
+
+
+def _style_file_variants(input_file, variants, keep_empty_breaks, progress_callback, cancel_event, detect_callback,
+                         output_options, profile, retime, pair_tolerance):
+    is_ass = is_ass_file(input_file)
+    if not is_ass and os.path.getsize(input_file) >= MAPPED_SCAN_SIZE:
+        try:
+            if _style_mapped_file(input_file, variants, keep_empty_breaks, progress_callback, cancel_event,
+                                  detect_callback, output_options, profile, retime, pair_tolerance):
+                return
+        except EncodingMismatch:
+            # 后面的内容不能用开头检测出的编码解码，读取整个文件重新检测
+            pass
+        except OSError as map_error:
+            raise SubtitleError(f" 读取文件时出错 : {str(map_error)}")
+
+    text = load_subtitle_text(input_file, profile)
+    if profile is not None:
+        detect_callback = profile.wrap_detect_callback(detect_callback)
+    cues = parse_text(text, "ass" if is_ass else None, detect_callback, pair_tolerance, profile)
+    _write_variants(cues, variants, keep_empty_breaks, estimate_cue_count(text, is_ass), progress_callback,
+                    cancel_event, output_options, profile, retime)
+
+
+def style_file_variants(input_file, variants, keep_empty_breaks=False, progress_callback=None, cancel_event=None,
+                        detect_callback=None, output_encoding="utf-8", newline=None, profile_callback=None,
+                        retime=None, pair_tolerance=0):
+    """
+    读取并解析字幕文件一次，按多种样式分别写出，返回输出文件路径列表
+    :param variants: [(输出文件, 中文样式前缀, 英文样式前缀), ...]，如每个模板一项
+    其他参数与 style_file 相同；进度按字幕条数汇报，与变体的数量无关
+    失败时抛出 SubtitleError，取消时抛出 ProcessingCancelled
+    """
+    variants = list(variants)
+    if not variants:
+        return []
+    output_options = {"encoding": output_encoding, "newline": newline}
+    profile = FileProfile(input_file) if profiling_enabled(profile_callback) else None
+    status = "error"
+    try:
+        _style_file_variants(input_file, variants, keep_empty_breaks, progress_callback, cancel_event,
+                             detect_callback, output_options, profile, retime, pair_tolerance)
+        status = "ok"
+    except ProcessingCancelled:
+        status = "cancelled"
+        raise
+    finally:
+        if profile is not None:
+            publish_profile(profile.finish(status), profile_callback)
+    return [output_file for output_file, _, _ in variants]
+
+
+def style_file(input_file, output_file, chinese_style, english_style, keep_empty_breaks=False,
+               progress_callback=None, cancel_event=None, detect_callback=None, output_encoding="utf-8",
+               newline=None, profile_callback=None, retime=None, pair_tolerance=0):
+    """
+    读取字幕文件、添加样式并写出，返回输出文件路径
+    输出先写入同目录下的临时文件，完成后再替换 output_file，失败或取消时原来的 output_file 保持不变
+    output_file 的扩展名为 .ass 时输出使用 [V4+ Styles] 的原生 ASS 文件（见 srtformat.ass），否则输出 SRT
+    :param chinese_style: 中文样式前缀，可由 compile_style 或 TemplateRegistry.styles 生成
+    :param english_style: 英文样式前缀
+    :param keep_empty_breaks: 空行也输出换行符（命令行版本的行为）
+    :param progress_callback: progress_callback(已处理字幕数, 估计总数)，定期调用
+    :param cancel_event: threading.Event 等带 is_set() 的对象，被设置后停止处理
+    :param detect_callback: detect_callback(格式, 判定依据, 检测读取的行数)，自动检测格式后调用
+    :param output_encoding: "utf-8" 或带 BOM 的 "utf-8-sig"
+    :param newline: 输出的换行符，如 "\\r\\n"；None 表示系统默认
+    :param profile_callback: profile_callback(FileProfile)，处理结束后调用，包含各阶段的耗时、字节数和字幕条数；
+                             也可以用 add_profile_hook 注册对所有文件生效的钩子
+    :param retime: 可选的 Retime（见 srtformat.retime），在添加样式的同一遍中平移、缩放或按同步点校正时间
+    :param pair_tolerance: 分离格式的中文和英文开始、结束时间允许的误差（毫秒），格式检测和配对都使用它
+    失败时抛出 SubtitleError，取消时抛出 ProcessingCancelled
+    """
+    style_file_variants(input_file, [(output_file, chinese_style, english_style)], keep_empty_breaks,
+                        progress_callback, cancel_event, detect_callback, output_encoding, newline,
+                        profile_callback, retime, pair_tolerance)
+    return output_file
+
+
+def style_merged_files(chinese_file, english_file, variants, tolerance=0, keep_empty_breaks=False,
+                       progress_callback=None, cancel_event=None, output_encoding="utf-8", newline=None,
+                       profile_callback=None, retime=None):
+    """
+    合并中文和英文两个单语字幕文件并添加样式，两个文件各读取、解析一次，合并后直接写出，返回输出文件路径列表
+    :param variants: [(输出文件, 中文样式前缀, 英文样式前缀), ...]
+    :param tolerance: 两条字幕之间允许的间隔（毫秒），0 表示时间区间必须重叠
+    其他参数与 style_file_variants 相同；统计结果中的解析包括合并的时间
+    失败时抛出 SubtitleError，取消时抛出 ProcessingCancelled
+    """
+    variants = list(variants)
+    if not variants:
+        return []
+    output_options = {"encoding": output_encoding, "newline": newline}
+    profile = FileProfile(chinese_file) if profiling_enabled(profile_callback) else None
+    status = "error"
+    try:
+        inputs = _load_merge_inputs(chinese_file, english_file, profile)
+        if profile is not None:
+            profile.info.update(merged_with=english_file, tolerance=tolerance)
+        # 合并后的条数介于两者中较多的一个和两者之和之间
+        total = max(estimate_cue_count(text, subtitle_format == "ass") for text, subtitle_format in inputs)
+        cues = iter_merged_cues(*[parse_text(text, subtitle_format, profile=profile)
+                                  for text, subtitle_format in inputs], tolerance)
+        _write_variants(cues, variants, keep_empty_breaks, total, progress_callback, cancel_event, output_options,
+                        profile, retime)
+        status = "ok"
+    except ProcessingCancelled:
+        status = "cancelled"
+        raise
+    finally:
+        if profile is not None:
+            publish_profile(profile.finish(status), profile_callback)
+    return [output_file for output_file, _, _ in variants]
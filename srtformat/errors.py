@@ -0,0 +1,13 @@
+""" 字幕处理中的异常 """
+
+
+class SubtitleError(Exception):
+    """ 字幕处理失败，异常消息可以直接显示给用户 """
+
+
+class ProcessingCancelled(SubtitleError):
+    """ 用户取消了处理 """
+
+
+class EncodingMismatch(SubtitleError):
+    """ 按文件开头检测出的编码无法解码后面的内容，需要读取整个文件重新检测 """
@@ -0,0 +1,125 @@
+""" 增量处理清单：记录输入文件的大小、修改时间、内容哈希和所用样式的哈希，跳过没有变化的文件 """
+import os
+
+# hashlib、json 和 tempfile 在用到时才导入，不使用增量处理时不增加命令行的启动时间
+
+# 批量处理时默认保存在根目录下的清单文件名
+MANIFEST_NAME = ".srtformat-manifest.json"
+# 输出格式有变化时增加版本号，旧清单中的记录全部作废
+MANIFEST_VERSION = 2
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def hash_file(path):
+    """ 分块计算文件内容的 SHA-256 """
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _output_paths(output_files):
+    """ 输出文件可以是一个路径或路径列表，统一为绝对路径的列表 """
+    if isinstance(output_files, (str, os.PathLike)):
+        output_files = [output_files]
+    return [os.path.abspath(output_file) for output_file in output_files]
+
+
+def style_hash(*parts):
+    """ 计算样式的哈希，参数为决定输出内容的所有值，如中英文样式前缀 """
+    import hashlib
+    import json
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    """
+    增量处理清单，以 JSON 保存：输入文件绝对路径 -> 大小、修改时间、内容哈希、样式哈希、输出文件列表
+    大小和修改时间都没变时不读取文件；只有修改时间变了时比较内容哈希
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = self._load()
+        self._dirty = False
+
+    def _load(self):
+        import json
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return {}
+        entries = data.get("files")
+        return entries if isinstance(entries, dict) else {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_current(self, input_file, output_files, styles_hash):
+        """ 输入文件和样式都没有变化、所有输出文件仍然存在时返回 True，output_files 为一个路径或路径列表 """
+        entry = self._entries.get(os.path.abspath(input_file))
+        output_files = _output_paths(output_files)
+        if not entry or entry.get("template") != styles_hash or entry.get("outputs") != output_files:
+            return False
+        if not all(os.path.exists(output_file) for output_file in output_files):
+            return False
+        try:
+            stat = os.stat(input_file)
+        except OSError:
+            return False
+        if stat.st_size != entry.get("size"):
+            return False
+        if stat.st_mtime_ns == entry.get("mtime_ns"):
+            return True
+
+        # 修改时间变了（如重新下载、复制）但内容可能相同
+        try:
+            if hash_file(input_file) != entry.get("hash"):
+                return False
+        except OSError:
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        self._dirty = True
+        return True
+
+    def record(self, input_file, output_files, styles_hash):
+        """ 记录处理成功的文件 """
+        stat = os.stat(input_file)
+        self._entries[os.path.abspath(input_file)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": hash_file(input_file),
+            "template": styles_hash,
+            "outputs": _output_paths(output_files),
+        }
+        self._dirty = True
+
+    def forget(self, input_file):
+        """ 删除文件的记录，下次一定会重新处理 """
+        if self._entries.pop(os.path.abspath(input_file), None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """ 有变化时先写入同目录下的临时文件，再替换原文件 """
+        if not self._dirty:
+            return
+        import json
+        import tempfile
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".manifest-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump({"version": MANIFEST_VERSION, "files": self._entries}, file, ensure_ascii=False, indent=1)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._dirty = False
@@ -0,0 +1,77 @@
+"""
+合并中文和英文两个单语字幕：按时间区间的重叠做一遍线性的归并连接，生成双语字幕项
+
+两个输入都按文件中的顺序逐条读取（字幕文件通常已按开始时间排列），每次只比较两边当前的字幕和下一条字幕，
+不需要把整个文件读入内存，也不需要先用其他工具合并成一个文件再处理。
+"""
+from .cue import Cue
+
+
+def overlap(first, second):
+    """ 两条字幕时间区间重叠的毫秒数，不重叠时为负数（两者之间的间隔） """
+    return min(first.end, second.end) - max(first.start, second.start)
+
+
+def _text_lines(cue):
+    # 单语字幕只有一种语言，空行（如标准格式中补出的第二行）去掉
+    lines = cue.lines
+    if "" in lines:
+        return [line for line in lines if line]
+    return list(lines)
+
+
+def iter_merged_cues(chinese_cues, english_cues, tolerance=0):
+    """
+    按时间合并两个单语字幕流，逐条生成 Cue，序号从 1 重新编号
+    :param tolerance: 允许的间隔（毫秒）：两条字幕重叠，或者间隔不超过 tolerance 时可以配对
+    时间区间重叠的中文和英文字幕合并为一条，中文行在前，时间取两者的并集；
+    下一条字幕与对方重叠更多时，当前这条单独输出，一条字幕最多与一条配对；没有配对的字幕单独输出，缺少的一行留空
+    """
+    chinese_cues = iter(chinese_cues)
+    english_cues = iter(english_cues)
+    chinese = next(chinese_cues, None)
+    english = next(english_cues, None)
+    next_chinese = next(chinese_cues, None)
+    next_english = next(english_cues, None)
+    index = 0
+    while chinese is not None and english is not None:
+        index += 1
+        # 与 overlap() 相同，在循环中直接计算省去函数调用
+        shared = min(chinese.end, english.end) - max(chinese.start, english.start)
+        if shared + tolerance <= 0:
+            # 不能配对，先输出开始较早的一条
+            if chinese.start <= english.start:
+                yield Cue(index, chinese.start, chinese.end, _text_lines(chinese) + [""])
+                chinese, next_chinese = next_chinese, next(chinese_cues, None)
+            else:
+                yield Cue(index, english.start, english.end, [""] + _text_lines(english))
+                english, next_english = next_english, next(english_cues, None)
+        elif (next_chinese is not None
+              and min(next_chinese.end, english.end) - max(next_chinese.start, english.start) > shared):
+            # 英文字幕与下一条中文重叠更多，当前中文单独输出
+            yield Cue(index, chinese.start, chinese.end, _text_lines(chinese) + [""])
+            chinese, next_chinese = next_chinese, next(chinese_cues, None)
+        elif (next_english is not None
+              and min(chinese.end, next_english.end) - max(chinese.start, next_english.start) > shared):
+            yield Cue(index, english.start, english.end, [""] + _text_lines(english))
+            english, next_english = next_english, next(english_cues, None)
+        else:
+            yield Cue(index, min(chinese.start, english.start), max(chinese.end, english.end),
+                      (_text_lines(chinese) or [""]) + (_text_lines(english) or [""]))
+            chinese, next_chinese = next_chinese, next(chinese_cues, None)
+            english, next_english = next_english, next(english_cues, None)
+
+    # 一边已经结束，另一边剩下的字幕单独输出
+    while chinese is not None:
+        index += 1
+        yield Cue(index, chinese.start, chinese.end, _text_lines(chinese) + [""])
+        chinese, next_chinese = next_chinese, next(chinese_cues, None)
+    while english is not None:
+        index += 1
+        yield Cue(index, english.start, english.end, [""] + _text_lines(english))
+        english, next_english = next_english, next(english_cues, None)
+
+
+def merge_cues(chinese_cues, english_cues, tolerance=0):
+    """ 合并两个单语字幕，返回列表 """
+    return list(iter_merged_cues(chinese_cues, english_cues, tolerance))
@@ -0,0 +1,398 @@
+""" 字幕解析：格式检测，以及标准 SRT、分离格式 SRT 和 ASS 的流式读取 """
+import collections
+import itertools
+import re
+
+from .classify import LINE_CJK, classify_line
+from .cue import Cue, parse_ass_time, parse_srt_timestamp
+
+# 只在文件开头这么多行内查找 ASS 文件头
+ASS_HEADER_LINES = 20
+# 超过这个比例的时间戳有重复时认为是分离格式
+SEPARATED_DUPLICATE_RATIO = 0.3
+# 格式检测按时间戳抽样：至少看这么多个才下结论，之后每次翻倍，最多抽样这么多个
+DETECT_MIN_TIMESTAMPS = 32
+DETECT_SAMPLE_TIMESTAMPS = 256
+# 重复比例与阈值相差不到这么多时认为抽样结果不确定，继续扫描整个文件
+DETECT_MARGIN = 0.1
+
+
+def _is_ass_header(line):
+    return line.startswith('[Script Info]') or '[V4+ Styles]' in line or '[Events]' in line
+
+
+def _duplicate_verdict(duplicate_count, timestamp_count):
+    if duplicate_count > timestamp_count * SEPARATED_DUPLICATE_RATIO:
+        return "separated"
+    return "standard"
+
+
+def sniff_subtitle_format(lines, tolerance=0):
+    """
+    从文件开头检测字幕格式，结论确定后立即停止读取
+    tolerance 为分离格式配对时允许的误差（毫秒），开始和结束时间都相差不超过它的时间戳算作重复
+    返回 (格式, 判定依据, 已读取的行)，已读取的行需要放回剩余行的前面再解析
+    判定依据："ass-header" 开头有 ASS 文件头；"sample" 抽样的时间戳已足够下结论；
+    "full-scan" 抽样结果不确定或文件较短，统计了整个文件的时间戳
+    """
+    head = []
+    seen = {}
+    timestamp_count = duplicate_count = 0
+    checkpoint = DETECT_MIN_TIMESTAMPS
+    previous_is_number = False
+    # 时间戳之后的文本行数，以及只有一行文本的块数
+    block_text_lines = None
+    single_line_blocks = 0
+
+    for line in lines:
+        head.append(line)
+        line = line.strip()
+        if len(head) <= ASS_HEADER_LINES and _is_ass_header(line):
+            return "ass", "ass-header", head
+
+        if block_text_lines is not None:
+            if line:
+                block_text_lines += 1
+            else:
+                single_line_blocks += block_text_lines == 1
+                block_text_lines = None
+
+        # 序号后面的时间戳才计数
+        if previous_is_number and " --> " in line:
+            timestamp_count += 1
+            key = parse_srt_timestamp(line) if tolerance else line
+            if key is not None and _count_time(seen, key, tolerance) == 2:
+                duplicate_count += 1
+            block_text_lines = 0
+
+        elif checkpoint and timestamp_count >= checkpoint and block_text_lines is None:
+            # 在块结束后检查抽样结果，此时最后一个块的行数已统计完
+            ratio = duplicate_count / timestamp_count
+            verdict = _duplicate_verdict(duplicate_count, timestamp_count)
+            # 块大多只有一行文本却没有重复时间戳，可能是按语言排序导出的分离格式，需要看完整个文件
+            sorted_by_language = verdict == "standard" and single_line_blocks * 2 > timestamp_count
+            if abs(ratio - SEPARATED_DUPLICATE_RATIO) >= DETECT_MARGIN and not sorted_by_language:
+                return verdict, "sample", head
+            # 不确定时扩大抽样，超过上限后不再检查，一直统计到文件末尾
+            checkpoint = checkpoint * 2 if checkpoint < DETECT_SAMPLE_TIMESTAMPS else 0
+        previous_is_number = line.isdigit()
+
+    return _duplicate_verdict(duplicate_count, timestamp_count), "full-scan", head
+
+
+def detect_subtitle_format(lines, tolerance=0):
+    """ 检测字幕格式类型 """
+    return sniff_subtitle_format(lines, tolerance)[0]
+
+
+def iter_cues(lines, subtitle_format=None, detect_callback=None, pair_tolerance=0):
+    """
+    流式解析字幕，逐条生成 Cue；未指定格式时根据开头的一部分行检测
+    :param detect_callback: detect_callback(格式, 判定依据, 检测读取的行数)，自动检测格式后调用
+    :param pair_tolerance: 分离格式配对时开始和结束时间允许的误差（毫秒）
+    """
+    lines = iter(lines)
+    if subtitle_format is None:
+        # 检测时读过的行缓存下来，之后与剩余的行拼接继续流式处理
+        subtitle_format, decided_by, head = sniff_subtitle_format(lines, pair_tolerance)
+        if detect_callback:
+            detect_callback(subtitle_format, decided_by, len(head))
+        lines = itertools.chain(head, lines)
+
+    if subtitle_format == "ass":
+        # ASS 格式：直接读取 [Events] 部分的对话行，中英文是时间相同的两个事件时配对
+        return pair_repeated_cues(iter_ass_cues(lines), pair_tolerance)
+    elif subtitle_format == "separated":
+        # 分离格式：时间戳相同的中文块和英文块
+        return iter_separated_format(lines, pair_tolerance)
+    else:
+        # 标准格式：一个时间戳后跟中英文
+        return iter_standard_format(lines)
+
+
+def iter_standard_format(lines):
+    """ 流式处理标准格式：一个时间戳后跟中英文（也可以有更多行），逐个生成字幕项 """
+    lines = iter(lines)
+    line = next(lines, None)
+    while line is not None:
+        subtitle_num = line.strip()
+        line = next(lines, None)
+        if not subtitle_num.isdigit() or line is None:
+            continue
+        # 序号后面不是时间轴时，说明这只是一行数字文本，从下一行继续查找
+        times = parse_srt_timestamp(line)
+        if times is None:
+            continue
+        chinese_line = next(lines, "").strip()
+        english_line = next(lines, "").strip()
+        text_lines = [chinese_line, english_line]
+        line = next(lines, None)
+        # 超过两行的字幕：继续读取文本行，直到空行或下一个序号
+        if chinese_line and english_line:
+            while line is not None:
+                text = line.strip()
+                if not text or text.isdigit():
+                    break
+                text_lines.append(text)
+                line = next(lines, None)
+
+        yield Cue(int(subtitle_num), times[0], times[1], text_lines)
+
+
+def process_standard_format(lines):
+    """ 处理标准格式：一个时间戳后跟中英文 """
+    return list(iter_standard_format(lines))
+
+
+def iter_subtitle_blocks(lines):
+    """ 按空行切分字幕块，逐个生成 """
+    current_block = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if current_block:
+                yield current_block
+                current_block = []
+        else:
+            current_block.append(line)
+
+    if current_block:
+        yield current_block
+
+
+def _block_times(block):
+    """ 返回字幕块的 (开始毫秒, 结束毫秒)，格式不对时返回 None """
+    if len(block) < 2 or not block[0].isdigit():
+        return None
+    return parse_srt_timestamp(block[1])
+
+
+def _single_block_cue(block, times):
+    """ 时间戳不同的块按标准格式处理 """
+    if len(block) < 3 or times is None:
+        return None
+    return Cue(int(block[0]), times[0], times[1], block[2:])
+
+
+def _is_chinese_block(block):
+    """ 字幕块的第一行文本中是否有中日韩文字 """
+    return len(block) > 2 and classify_line(block[2]) == LINE_CJK
+
+
+def _pair_cue(first, second):
+    """ 把配对的两个块合并为一条字幕，中文块的行在前，序号和时间取先出现的块 """
+    first_block, first_times = first
+    second_block = second[0]
+    chinese_lines = first_block[2:] or [""]
+    english_lines = second_block[2:] or [""]
+
+    first_is_chinese = _is_chinese_block(first_block)
+    if first_is_chinese != _is_chinese_block(second_block):
+        # 只有一个块有中文时按内容区分，块的先后顺序不重要
+        if not first_is_chinese:
+            chinese_lines, english_lines = english_lines, chinese_lines
+    elif chinese_lines[0].startswith('"') and chinese_lines[0].endswith('"'):
+        # 检查是否英文在引号中，这通常表示英文
+        chinese_lines, english_lines = english_lines, chinese_lines
+
+    return Cue(int(first_block[0]), first_times[0], first_times[1], chinese_lines + english_lines)
+
+
+def _time_buckets(times, tolerance):
+    """ 允许误差时，返回可能与 times 匹配的所有桶 """
+    if not tolerance:
+        return (times,)
+    start_bucket, end_bucket = times[0] // tolerance, times[1] // tolerance
+    return [(start_bucket + i, end_bucket + j) for i in (-1, 0, 1) for j in (-1, 0, 1)]
+
+
+def _count_time(seen, times, tolerance):
+    """
+    记录一个时间，返回与它相同的时间（包括它自己）已出现的次数
+    tolerance 为 0 时 times 可以是任意可哈希的值（如时间戳行）；否则为 (开始, 结束)，都相差不超过 tolerance 的算作相同
+    """
+    if not tolerance:
+        count = seen.get(times, 0) + 1
+        seen[times] = count
+        return count
+    for bucket in _time_buckets(times, tolerance):
+        for entry in seen.get(bucket, ()):
+            if abs(entry[0][0] - times[0]) <= tolerance and abs(entry[0][1] - times[1]) <= tolerance:
+                entry[1] += 1
+                return entry[1]
+    seen.setdefault((times[0] // tolerance, times[1] // tolerance), []).append([times, 1])
+    return 1
+
+
+def _take_partner(waiting, times, is_chinese, previous_index, tolerance):
+    """ 从等待配对的块中取出与 times 匹配的块的位置，没有时返回 None """
+    # 优先配对另一种语言中最早出现的块
+    for bucket in _time_buckets(times, tolerance):
+        queue = waiting.get((bucket, not is_chinese))
+        if not queue:
+            continue
+        for k, (index, (start, end)) in enumerate(queue):
+            if abs(start - times[0]) <= tolerance and abs(end - times[1]) <= tolerance:
+                del queue[k]
+                return index
+
+    # 语言相同时只与紧挨着的前一个块配对（原来的相邻配对规则）
+    bucket = times if not tolerance else (times[0] // tolerance, times[1] // tolerance)
+    queue = waiting.get((bucket, is_chinese))
+    if queue and queue[-1][0] == previous_index:
+        start, end = queue[-1][1]
+        if abs(start - times[0]) <= tolerance and abs(end - times[1]) <= tolerance:
+            return queue.pop()[0]
+    return None
+
+
+def _iter_paired_blocks(entries, tolerance):
+    """ 按 (开始, 结束) 时间建立索引，一遍完成配对，按块原来的顺序逐个生成字幕项；entries 为 (块, 时间) """
+    blocks = []
+    # (时间桶, 是否中文) -> 等待配对的 (块位置, 时间)
+    waiting = {}
+    # 块位置 -> 与它配对的后面的块位置；后面的块位置 -> -1
+    partners = {}
+    for index, (block, times) in enumerate(entries):
+        blocks.append((block, times))
+        if times is None:
+            continue
+
+        is_chinese = _is_chinese_block(block)
+        partner = _take_partner(waiting, times, is_chinese, index - 1, tolerance)
+        if partner is None:
+            bucket = times if not tolerance else (times[0] // tolerance, times[1] // tolerance)
+            waiting.setdefault((bucket, is_chinese), collections.deque()).append((index, times))
+        else:
+            partners[partner] = index
+            partners[index] = -1
+
+    for index, (block, times) in enumerate(blocks):
+        partner = partners.get(index)
+        if partner is None:
+            # 没有配对的块按标准格式处理
+            cue = _single_block_cue(block, times)
+        elif partner >= 0:
+            cue = _pair_cue(blocks[index], blocks[partner])
+        else:
+            continue
+        if cue:
+            yield cue
+
+
+def iter_separated_format(lines, tolerance=0):
+    """
+    处理分离格式：中文块和英文块的时间戳相同，不要求相邻（例如先全部中文再全部英文）
+    :param tolerance: 开始和结束时间允许的误差（毫秒），0 表示必须相同
+    """
+    return _iter_paired_blocks(((block, _block_times(block)) for block in iter_subtitle_blocks(lines)), tolerance)
+
+
+def process_separated_format(lines, tolerance=0):
+    """ 处理分离格式：相同时间戳的中文块和英文块 """
+    return list(iter_separated_format(lines, tolerance))
+
+
+# ASS 的 [Events] 部分未给出 Format 行时使用的默认字段顺序
+ASS_DEFAULT_EVENT_FORMAT = ['layer', 'start', 'end', 'style', 'name', 'marginl', 'marginr', 'marginv', 'effect', 'text']
+
+_ASS_EVENTS_RE = re.compile(r'^\s*\[events\]', re.IGNORECASE | re.MULTILINE)
+_ASS_OVERRIDE_RE = re.compile(r'\{[^}]*\}')
+_ASS_DRAWING_RE = re.compile(r'\{[^}]*\\p[1-9][^}]*\}')
+_ASS_LINE_BREAK_RE = re.compile(r'\\[Nn]')
+
+
+def has_ass_events(text):
+    """ 检查文本中是否有 ASS 的 [Events] 部分 """
+    return _ASS_EVENTS_RE.search(text) is not None
+
+
+def split_ass_text(text):
+    """ 去除 ASS 特效标签，按 \\N 拆分为多行 """
+    text = _ASS_OVERRIDE_RE.sub('', text).replace('\\h', ' ')
+    return [line.strip() for line in _ASS_LINE_BREAK_RE.split(text)]
+
+
+def _ass_event_layout(fields):
+    """ 根据 Format 行返回 (字段数, 开始时间位置, 结束时间位置)，格式不可用时返回 None """
+    if not fields or fields[-1] != 'text' or 'start' not in fields or 'end' not in fields:
+        return None
+    return len(fields), fields.index('start'), fields.index('end')
+
+
+def iter_ass_cues(lines):
+    """ 流式读取 ASS 的 [Events] 部分，逐个生成字幕项，文本按 \\N 拆分为多行 """
+    in_events = False
+    layout = _ass_event_layout(ASS_DEFAULT_EVENT_FORMAT)
+    subtitle_num = 0
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            in_events = line.lower() == '[events]'
+            continue
+        if not in_events:
+            continue
+
+        key, sep, value = line.partition(':')
+        if not sep:
+            continue
+        key = key.strip().lower()
+        if key == 'format':
+            layout = _ass_event_layout([field.strip().lower() for field in value.split(',')])
+            continue
+        if key != 'dialogue' or layout is None:
+            continue
+
+        field_count, start_index, end_index = layout
+        values = value.split(',', field_count - 1)
+        if len(values) < field_count:
+            continue
+        text = values[-1]
+        # 跳过绘图事件
+        if _ASS_DRAWING_RE.search(text):
+            continue
+        text_lines = split_ass_text(text)
+        if not any(text_lines):
+            continue
+
+        subtitle_num += 1
+        yield Cue(subtitle_num, parse_ass_time(values[start_index]), parse_ass_time(values[end_index]), text_lines)
+
+
+def pair_repeated_cues(cues, tolerance=0):
+    """
+    双语 ASS 常把中文和英文放在时间相同的两个事件中。开头抽样的字幕中重复时间（允许 tolerance 毫秒的误差）的比例
+    与分离格式的判定相同，超过 SEPARATED_DUPLICATE_RATIO 时按分离格式配对，否则原样逐条生成
+    """
+    cues = iter(cues)
+    head = list(itertools.islice(cues, DETECT_SAMPLE_TIMESTAMPS))
+    seen = {}
+    duplicate_count = sum(_count_time(seen, (cue.start, cue.end), tolerance) == 2 for cue in head)
+    cues = itertools.chain(head, cues)
+    if _duplicate_verdict(duplicate_count, len(head)) != "separated":
+        return cues
+    # 转换为与 SRT 字幕块相同的形式：序号、时间轴（不使用）、文本行
+    return _iter_paired_blocks((([cue.index, None, *cue.lines], (cue.start, cue.end)) for cue in cues), tolerance)
+
+
+def load_pysubs2():
+    """ 需要时才导入 pysubs2，没有安装时返回 None """
+    try:
+        import pysubs2
+    except ImportError:
+        return None
+    return pysubs2
+
+
+def iter_pysubs2_cues(subs):
+    """ 从 pysubs2 解析结果中逐个生成字幕项，用于内置解析器无法处理的文件 """
+    subtitle_num = 0
+    for event in subs:
+        if event.is_comment:
+            continue
+        text_lines = [line.strip() for line in event.plaintext.split('\n')]
+        if not any(text_lines):
+            continue
+
+        subtitle_num += 1
+        yield Cue(subtitle_num, event.start, event.end, text_lines)
@@ -0,0 +1,240 @@
+"""
+异步流水线：读取、添加样式和写出三个阶段同时进行，适合处理网络挂载（NFS、SMB）上的字幕库
+
+按文件依次处理时，读取和写出网络上的文件要等待很久，这段时间 CPU 空闲；添加样式时磁盘和网络又空闲。
+流水线中读取和写出在线程中进行，各自限制并发数；添加样式在进程池（或线程池）中进行。
+阶段之间用有界队列连接，写出跟不上时添加样式暂停，添加样式跟不上时读取暂停，内存中最多只有几个队列长度的文件。
+
+每个文件整个读入内存后再处理，不使用内存映射扫描；非常大的文件用普通的批量模式处理更合适。
+导入本模块会导入 asyncio，srtformat 不默认导入它，需要时再导入：
+
+    from srtformat.pipeline import process_files
+    report = process_files(jobs, read_concurrency=16)
+    print(report.summary())
+"""
+import asyncio
+import concurrent.futures
+import os
+import time
+
+from .encoding import decode_subtitle_bytes
+from .engine import is_ass_file, iter_formatted_cues, output_format_for, parse_text
+from .errors import SubtitleError
+from .retime import retime_cues
+from .writer import encode_styled, write_bytes_variants
+
+# 默认的并发数和队列长度
+DEFAULT_READ_CONCURRENCY = 8
+DEFAULT_WRITE_CONCURRENCY = 4
+DEFAULT_QUEUE_SIZE = 16
+# 添加样式可以使用的执行器：进程池可以用满多个 CPU 核心，线程池没有传递数据的开销
+STYLE_EXECUTORS = ("process", "thread")
+
+# 各阶段的显示名称
+PIPELINE_STAGES = {"read": "读取", "style": "样式", "write": "写出"}
+
+
+def read_input(input_file):
+    with open(input_file, 'rb') as file:
+        return file.read()
+
+
+def render_file(input_file, raw_data, styles, keep_empty_breaks=False, output_encoding="utf-8", newline=None,
+                retime=None, pair_tolerance=0):
+    """
+    解码、解析一次，按每组样式生成已编码的输出内容，返回字节串列表；在执行器中调用，参数和返回值都可以在进程之间传递
+    :param styles: [(输出格式, 中文样式前缀, 英文样式前缀), ...]，输出格式为 "srt" 或 "ass"
+    失败时抛出 SubtitleError
+    """
+    text, error = decode_subtitle_bytes(raw_data, input_file)
+    if error:
+        raise SubtitleError(error)
+    cues = parse_text(text, "ass" if is_ass_file(input_file) else None, pair_tolerance=pair_tolerance)
+    if len(styles) > 1:
+        cues = list(cues)
+    cues = retime_cues(cues, retime)
+    return [encode_styled(iter_formatted_cues(cues, chinese_style, english_style, output_format, keep_empty_breaks),
+                          output_encoding, newline)
+            for output_format, chinese_style, english_style in styles]
+
+
+class PipelineReport:
+    """
+    流水线的吞吐量统计
+    :ivar busy: 阶段名 -> 该阶段所有任务的耗时之和（秒），超过 elapsed 说明该阶段在并发执行
+    :ivar max_depth: 队列名 -> 运行中达到的最大积压，经常等于 queue_size 说明下游阶段是瓶颈
+    :ivar limits: 本次使用的并发数和队列长度
+    """
+
+    def __init__(self, limits=None):
+        self.files = 0
+        self.failed = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.elapsed = 0.0
+        self.busy = {name: 0.0 for name in PIPELINE_STAGES}
+        self.max_depth = {"read": 0, "write": 0}
+        self.limits = dict(limits or {})
+
+    def files_per_second(self):
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    def read_mb_per_second(self):
+        return self.bytes_read / self.elapsed / (1 << 20) if self.elapsed else 0.0
+
+    def as_dict(self):
+        """ 可以直接用 json.dumps 输出的字典 """
+        return {
+            "files": self.files,
+            "failed": self.failed,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "elapsed": self.elapsed,
+            "files_per_second": self.files_per_second(),
+            "read_mb_per_second": self.read_mb_per_second(),
+            "busy": dict(self.busy),
+            "max_depth": dict(self.max_depth),
+            "limits": dict(self.limits),
+        }
+
+    def summary(self):
+        """ 单行摘要，如 "120 个文件（失败 0 个），用时 3.2s，37.5 个/s，读取 12.0MB（3.8MB/s）..." """
+        busy = "，".join(f"{PIPELINE_STAGES[name]} {seconds:.2f}s" for name, seconds in self.busy.items())
+        queue_size = self.limits.get("queue_size", "-")
+        return (f"{self.files} 个文件（失败 {self.failed} 个），用时 {self.elapsed:.2f}s，"
+                f"{self.files_per_second():.1f} 个/s，读取 {self.bytes_read / (1 << 20):.1f}MB"
+                f"（{self.read_mb_per_second():.1f}MB/s），写出 {self.bytes_written / (1 << 20):.1f}MB；"
+                f"各阶段累计 {busy}；队列最大积压 读取 {self.max_depth['read']}/{queue_size}，"
+                f"写出 {self.max_depth['write']}/{queue_size}")
+
+
+async def run_pipeline(jobs, read_concurrency=DEFAULT_READ_CONCURRENCY, style_workers=None,
+                       write_concurrency=DEFAULT_WRITE_CONCURRENCY, queue_size=DEFAULT_QUEUE_SIZE,
+                       style_executor="process", keep_empty_breaks=False, output_encoding="utf-8", newline=None,
+                       fsync=True, on_result=None, retime=None, pair_tolerance=0, after_write=None):
+    """
+    处理 [(输入文件, [(输出文件, 中文样式前缀, 英文样式前缀), ...]), ...]，返回 PipelineReport
+    :param read_concurrency: 同时读取的文件数
+    :param style_workers: 添加样式的进程（或线程）数，None 表示 CPU 核心数
+    :param write_concurrency: 同时写出的文件数
+    :param queue_size: 读取和写出队列的长度，决定内存中最多缓存多少个文件
+    :param style_executor: "process" 或 "thread"
+    :param on_result: on_result(输入文件, 输出文件列表, 错误信息)，每个文件完成或失败后在事件循环中调用，成功时错误信息为 None
+    :param retime: 可选的 Retime，添加样式时同时调整时间
+    :param pair_tolerance: 分离格式配对时开始和结束时间允许的误差（毫秒）
+    :param after_write: after_write(输入文件, 输出文件列表)，每个文件写完后在读写线程池中调用，
+        用于记录增量清单等会读取文件的操作，不阻塞事件循环；抛出 OSError 时这个文件按失败处理
+    同一个文件的多个输出全部写完后才替换目标文件，任何一个出错时都保持原样
+    """
+    if style_executor not in STYLE_EXECUTORS:
+        raise ValueError(f"未知的执行器：{style_executor}")
+    style_workers = style_workers or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    report = PipelineReport({"read_concurrency": read_concurrency, "style_workers": style_workers,
+                             "write_concurrency": write_concurrency, "queue_size": queue_size,
+                             "style_executor": style_executor})
+    pending = iter(jobs)
+    read_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+
+    def finish(input_file, outputs, error=None):
+        report.files += 1
+        if error:
+            report.failed += 1
+        if on_result is not None:
+            on_result(input_file, [output_file for output_file, _, _ in outputs], error)
+
+    async def timed(stage, executor, function, *args):
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, function, *args)
+        finally:
+            report.busy[stage] += time.perf_counter() - start
+
+    async def put(queue, name, item):
+        await queue.put(item)
+        report.max_depth[name] = max(report.max_depth[name], queue.qsize())
+
+    async def read_worker():
+        # 各个读取任务共用同一个迭代器，事件循环是单线程的，不需要加锁
+        for input_file, outputs in pending:
+            try:
+                raw_data = await timed("read", io_pool, read_input, input_file)
+            except OSError as e:
+                finish(input_file, outputs, f" 读取文件时出错 : {str(e)}")
+                continue
+            report.bytes_read += len(raw_data)
+            await put(read_queue, "read", (input_file, outputs, raw_data))
+
+    async def style_worker():
+        while True:
+            item = await read_queue.get()
+            if item is None:
+                return
+            input_file, outputs, raw_data = item
+            styles = [(output_format_for(output_file), chinese_style, english_style)
+                      for output_file, chinese_style, english_style in outputs]
+            try:
+                contents = await timed("style", style_pool, render_file, input_file, raw_data, styles,
+                                       keep_empty_breaks, output_encoding, newline, retime, pair_tolerance)
+            except Exception as e:
+                finish(input_file, outputs, str(e))
+                continue
+            await put(write_queue, "write", (input_file, outputs, contents))
+
+    async def write_worker():
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                return
+            input_file, outputs, contents = item
+            try:
+                byte_counts = await timed("write", io_pool, write_bytes_variants,
+                                          [(output_file, data) for (output_file, _, _), data in zip(outputs, contents)],
+                                          fsync)
+            except OSError as e:
+                finish(input_file, outputs, f" 写入输出文件时出错 : {str(e)}")
+                continue
+            report.bytes_written += sum(byte_counts)
+            if after_write is not None:
+                try:
+                    await timed("write", io_pool, after_write, input_file,
+                                [output_file for output_file, _, _ in outputs])
+                except OSError as e:
+                    finish(input_file, outputs, f" 写出后处理时出错 : {str(e)}")
+                    continue
+            finish(input_file, outputs)
+
+    io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=read_concurrency + write_concurrency)
+    if style_executor == "process":
+        style_pool = concurrent.futures.ProcessPoolExecutor(max_workers=style_workers)
+    else:
+        style_pool = concurrent.futures.ThreadPoolExecutor(max_workers=style_workers)
+    start = time.perf_counter()
+    tasks = []
+    try:
+        readers = [asyncio.create_task(read_worker()) for _ in range(read_concurrency)]
+        stylers = [asyncio.create_task(style_worker()) for _ in range(style_workers)]
+        writers = [asyncio.create_task(write_worker()) for _ in range(write_concurrency)]
+        tasks = readers + stylers + writers
+        # 上游阶段全部结束后，给下游的每个任务放一个 None 表示没有更多文件
+        await asyncio.gather(*readers)
+        for _ in stylers:
+            await read_queue.put(None)
+        await asyncio.gather(*stylers)
+        for _ in writers:
+            await write_queue.put(None)
+        await asyncio.gather(*writers)
+    finally:
+        # 中途出错或被取消时停止所有阶段，未开始的任务不再执行
+        for task in tasks:
+            task.cancel()
+        style_pool.shutdown(wait=True, cancel_futures=True)
+        io_pool.shutdown(wait=True, cancel_futures=True)
+        report.elapsed = time.perf_counter() - start
+    return report
+
+
+def process_files(jobs, **options):
+    """ 在新的事件循环中运行 run_pipeline，参数与 run_pipeline 相同，返回 PipelineReport """
+    return asyncio.run(run_pipeline(jobs, **options))
@@ -0,0 +1,302 @@
+"""
+调整字幕时间：整体平移、按帧率缩放（如 23.976 fps 和 25 fps 之间转换）、按两个同步点线性校正
+
+调整在添加样式的同一遍中完成，不需要先用其他工具处理再解析一次。
+流式处理时每条字幕只做一次乘加；所有字幕已经在内存中（或同步点引用了第几条字幕）时，
+先把开始和结束时间放进 array('q') 列中批量计算，安装了 NumPy 时用 NumPy 计算。
+
+    retime, error = build_retime(shift="-00:00:01,500", fps="23.976:25")
+    style_file("input.srt", "output.srt", chinese_style, english_style, retime=retime)
+"""
+import re
+from array import array
+
+from .errors import SubtitleError
+from .timing import measure
+
+# 常见帧率的名称对应的精确值，23.976 实际是 24000/1001
+NAMED_FRAMERATES = {
+    "23.976": 24000 / 1001,
+    "23.98": 24000 / 1001,
+    "29.97": 30000 / 1001,
+    "47.952": 48000 / 1001,
+    "59.94": 60000 / 1001,
+}
+
+# 时间值：可选的正负号，H:MM:SS,mmm、MM:SS.mmm，或者只有毫秒数
+_TIME_VALUE_RE = re.compile(r'([+-]?)(?:(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?|(\d+))')
+# 同步点中表示第几条字幕的写法，如 #12
+_CUE_NUMBER_RE = re.compile(r'#(\d+)')
+
+_numpy = None
+
+
+def load_numpy():
+    """ 需要时才导入 NumPy，没有安装时返回 False，使用 array 逐项计算 """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy
+
+
+def parse_time_value(text):
+    """ 解析时间值，如 "01:02:03,500"、"-00:00:01.5"、"1500"（毫秒），返回毫秒数；格式不对时抛出 ValueError """
+    match = _TIME_VALUE_RE.fullmatch(text.strip())
+    if match is None:
+        raise ValueError(f"无法识别的时间：{text}")
+    sign, hours, minutes, seconds, fraction, milliseconds = match.groups()
+    if milliseconds is not None:
+        value = int(milliseconds)
+    else:
+        value = (int(hours or 0) * 3600000 + int(minutes) * 60000 + int(seconds) * 1000
+                 + int((fraction or "0").ljust(3, '0')))
+    return -value if sign == "-" else value
+
+
+def parse_framerate(text):
+    """ 解析帧率，如 "25"、"23.976"（按 24000/1001 计算）；格式不对时抛出 ValueError """
+    text = text.strip()
+    value = NAMED_FRAMERATES.get(text)
+    if value is None:
+        value = float(text)
+    if value <= 0:
+        raise ValueError(f"帧率必须大于 0：{text}")
+    return value
+
+
+class Retime:
+    """
+    线性调整时间：新时间 = 原时间 × scale + offset（毫秒，四舍五入，小于 0 时取 0）
+    scale 必须大于 0，调整后各条字幕的先后顺序和开始、结束的关系不变
+    :ivar sync_points: 还没有确定的同步点 [(原时间或 "#第几条", 新时间), ...]，需要所有字幕的时间才能求出 scale 和 offset
+    """
+
+    def __init__(self, scale=1.0, offset=0, sync_points=()):
+        if scale <= 0:
+            raise SubtitleError(" 时间缩放比例必须大于 0 ")
+        self.scale = scale
+        self.offset = offset
+        self.sync_points = tuple(sync_points)
+
+    @classmethod
+    def shift(cls, offset):
+        """ 整体平移 offset 毫秒，负数表示提前 """
+        return cls(offset=offset)
+
+    @classmethod
+    def framerate(cls, source_fps, target_fps):
+        """ 把按 source_fps 的视频制作的字幕转换到 target_fps 的视频，如 23.976 -> 25 时所有时间乘以 23.976/25 """
+        return cls(scale=source_fps / target_fps)
+
+    @classmethod
+    def two_point(cls, source_a, target_a, source_b, target_b):
+        """ 原时间 source_a、source_b 分别对应新时间 target_a、target_b，其他时间按比例计算 """
+        if source_a == source_b:
+            raise SubtitleError(" 两个同步点的原时间不能相同 ")
+        scale = (target_b - target_a) / (source_b - source_a)
+        return cls(scale, target_a - source_a * scale)
+
+    @classmethod
+    def sync(cls, point_a, point_b):
+        """
+        按两个同步点校正，每个同步点为 (原时间, 新时间)；原时间可以是毫秒数，也可以是 "#12" 表示第 12 条字幕的开始时间
+        引用了第几条字幕时，要等所有字幕解析完成后用 resolve 求出比例
+        """
+        if any(isinstance(source, str) for source, _ in (point_a, point_b)):
+            return cls(sync_points=(point_a, point_b))
+        return cls.two_point(point_a[0], point_a[1], point_b[0], point_b[1])
+
+    def then(self, other):
+        """ 先按本对象调整，再按 other 调整 """
+        if self.sync_points or other.sync_points:
+            return ChainedRetime(self, other)
+        return Retime(self.scale * other.scale, self.offset * other.scale + other.offset)
+
+    def needs_cue_times(self):
+        """ 是否需要所有字幕的时间才能确定调整方式 """
+        return bool(self.sync_points)
+
+    def resolve(self, times=None):
+        """ 返回确定了 scale 和 offset 的 Retime；引用了第几条字幕时 times 为 CueTimes """
+        if not self.sync_points:
+            return self
+        (source_a, target_a), (source_b, target_b) = [
+            (times.cue_start(source) if isinstance(source, str) else source, target)
+            for source, target in self.sync_points]
+        return Retime.two_point(source_a, target_a, source_b, target_b)
+
+    def is_identity(self):
+        return not self.sync_points and self.scale == 1 and self.offset == 0
+
+    def apply(self, milliseconds):
+        value = round(milliseconds * self.scale + self.offset)
+        return value if value > 0 else 0
+
+    def as_dict(self):
+        """ 可以直接用 json.dumps 输出的字典，用于计算增量处理的样式哈希 """
+        return {"scale": self.scale, "offset": self.offset, "sync": [list(point) for point in self.sync_points]}
+
+    def __repr__(self):
+        if self.sync_points:
+            return f"Retime(sync_points={self.sync_points!r})"
+        return f"Retime({self.scale!r}, {self.offset!r})"
+
+
+class ChainedRetime(Retime):
+    """ 依次进行的两次调整，其中有需要所有字幕的时间才能确定的同步点 """
+
+    def __init__(self, first, second):
+        super().__init__()
+        self.first = first
+        self.second = second
+        self.sync_points = first.sync_points + second.sync_points
+
+    def then(self, other):
+        return ChainedRetime(self, other)
+
+    def resolve(self, times=None):
+        # 两次调整中 "#12" 这样的同步点都按解析出的原始时间求出，通常同步点校正放在第一步
+        return self.first.resolve(times).then(self.second.resolve(times))
+
+    def as_dict(self):
+        return {"chain": [self.first.as_dict(), self.second.as_dict()]}
+
+    def __repr__(self):
+        return f"ChainedRetime({self.first!r}, {self.second!r})"
+
+
+class CueTimes:
+    """
+    所有字幕的开始和结束时间（毫秒），按列保存在两个 array('q') 中，每个时间只占 8 字节
+    批量调整时安装了 NumPy 就直接在 array 的缓冲区上计算，不复制数据
+    """
+
+    def __init__(self, starts=None, ends=None):
+        self.starts = starts if starts is not None else array('q')
+        self.ends = ends if ends is not None else array('q')
+
+    @classmethod
+    def from_cues(cls, cues):
+        times = cls()
+        append_start, append_end = times.starts.append, times.ends.append
+        for cue in cues:
+            append_start(cue.start)
+            append_end(cue.end)
+        return times
+
+    def __len__(self):
+        return len(self.starts)
+
+    def cue_start(self, reference):
+        """ 第几条字幕（从 1 开始，按文件中的顺序）的开始时间，reference 为数字或 "#12" """
+        if isinstance(reference, str):
+            match = _CUE_NUMBER_RE.fullmatch(reference.strip())
+            if match is None:
+                raise SubtitleError(f" 无法识别的字幕编号 : {reference}")
+            reference = int(match.group(1))
+        if not 1 <= reference <= len(self.starts):
+            raise SubtitleError(f" 同步点引用的第 {reference} 条字幕不存在，共 {len(self.starts)} 条 ")
+        return self.starts[reference - 1]
+
+    def apply(self, retime):
+        """ 按已确定的 Retime 就地调整所有时间 """
+        if retime.is_identity() or not self.starts:
+            return
+        numpy = load_numpy()
+        for column in (self.starts, self.ends):
+            if numpy:
+                values = numpy.frombuffer(column, dtype=numpy.int64)
+                adjusted = numpy.rint(values * retime.scale + retime.offset)
+                numpy.maximum(adjusted, 0, out=adjusted)
+                values[:] = adjusted
+            elif retime.scale == 1 and retime.offset == int(retime.offset):
+                # 只平移整数毫秒时不需要浮点运算
+                offset = int(retime.offset)
+                column[:] = array('q', [value + offset if value + offset > 0 else 0 for value in column])
+            else:
+                column[:] = array('q', map(retime.apply, column))
+
+    def store(self, cues):
+        """ 把调整后的时间写回 cues（与 from_cues 时的顺序相同） """
+        for cue, start, end in zip(cues, self.starts, self.ends):
+            cue.start = start
+            cue.end = end
+
+
+def _iter_retimed(cues, retime):
+    if retime.scale == 1 and retime.offset == int(retime.offset):
+        offset = int(retime.offset)
+        for cue in cues:
+            start, end = cue.start + offset, cue.end + offset
+            cue.start = start if start > 0 else 0
+            cue.end = end if end > 0 else 0
+            yield cue
+        return
+    apply = retime.apply
+    for cue in cues:
+        cue.start = apply(cue.start)
+        cue.end = apply(cue.end)
+        yield cue
+
+
+def retime_cues(cues, retime, profile=None):
+    """
+    调整字幕的时间，返回字幕的可迭代对象；直接修改传入的 Cue，不复制
+    cues 是列表或者同步点引用了第几条字幕时，先放进 CueTimes 批量计算；否则在迭代时逐条调整，不占用额外内存
+    """
+    if retime is None or retime.is_identity():
+        return cues
+    if isinstance(cues, list) or retime.needs_cue_times():
+        cues = list(cues)
+        with measure(profile, "retime") as stats:
+            times = CueTimes.from_cues(cues)
+            times.apply(retime.resolve(times))
+            times.store(cues)
+            if stats is not None:
+                stats.cues += len(cues)
+        return cues
+    if profile is not None:
+        return profile.timed_iter(_iter_retimed(cues, retime), "retime")
+    return _iter_retimed(cues, retime)
+
+
+def build_retime(shift=None, fps=None, sync=None):
+    """
+    按命令行参数生成 Retime，依次进行同步点校正、帧率转换、平移；返回 (Retime 或 None, 错误信息)
+    :param shift: 平移的时间，如 "-1500"、"00:00:02,000"
+    :param fps: "原帧率:新帧率"，如 "23.976:25"
+    :param sync: 两个 "原时间=新时间"，原时间可以写成 "#12" 表示第 12 条字幕的开始时间
+    """
+    steps = []
+    try:
+        if sync:
+            if len(sync) != 2:
+                return None, "同步点必须正好给出两个。"
+            points = []
+            for point in sync:
+                source, separator, target = point.partition("=")
+                if not separator:
+                    return None, f"同步点的格式应为 原时间=新时间：{point}"
+                source = source.strip()
+                source = source if _CUE_NUMBER_RE.fullmatch(source) else parse_time_value(source)
+                points.append((source, parse_time_value(target)))
+            steps.append(Retime.sync(*points))
+        if fps:
+            source_fps, separator, target_fps = fps.partition(":")
+            if not separator:
+                return None, f"帧率的格式应为 原帧率:新帧率：{fps}"
+            steps.append(Retime.framerate(parse_framerate(source_fps), parse_framerate(target_fps)))
+        if shift:
+            steps.append(Retime.shift(parse_time_value(shift)))
+    except (ValueError, SubtitleError) as e:
+        return None, str(e).strip()
+    if not steps:
+        return None, None
+    retime = steps[0]
+    for step in steps[1:]:
+        retime = retime.then(step)
+    return retime, None
@@ -0,0 +1,170 @@
+"""
+内存映射的字幕扫描：用于几百 MB 的标准格式 SRT，不把整个文件解码到内存中
+
+文件通过 mmap 映射，按块在字节上切分行，序号行和时间轴行直接在字节上判断，只有中英文文本才解码。
+只支持换行符、数字和 " --> " 按 ASCII 编码的编码（UTF-8、GBK、Big5 等），生成的字幕项与
+parser.iter_standard_format 完全相同。
+"""
+import codecs
+import contextlib
+import itertools
+import mmap
+import re
+
+from .cue import Cue, parse_srt_timestamp
+from .encoding import detect_sample_encoding, iter_text_lines
+from .errors import EncodingMismatch
+from .parser import sniff_subtitle_format
+
+# 按块切分字节时每块的大致字节数
+BYTE_CHUNK_SIZE = 1 << 20
+# 检测编码和格式时读取的文件开头的字节数
+SCAN_SAMPLE_SIZE = 1 << 20
+
+# 换行符、数字、空白和 " --> " 与 ASCII 相同，且多字节字符中不会出现换行符的编码
+_ASCII_COMPATIBLE_PREFIXES = ("cp125", "iso8859-", "mac-")
+_ASCII_COMPATIBLE_ENCODINGS = {
+    "ascii", "utf-8", "utf-8-sig", "gbk", "gb2312", "gb18030", "big5", "big5hkscs", "cp950",
+    "shift_jis", "cp932", "euc_jp", "euc_kr", "cp949", "latin-1",
+}
+
+# 与 str.strip() 在 ASCII 范围内去掉的字符相同
+_ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+_SRT_TIMESTAMP_BYTES_RE = re.compile(
+    rb'(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})')
+
+
+def is_ascii_compatible(encoding):
+    """ 编码能否在字节上直接查找换行符、序号和时间轴 """
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    return name in _ASCII_COMPATIBLE_ENCODINGS or name.startswith(_ASCII_COMPATIBLE_PREFIXES)
+
+
+def iter_byte_lines(buffer, start=0, chunk_size=BYTE_CHUNK_SIZE):
+    """ 按块切分 buffer[start:] 为字节行，与 encoding.iter_text_lines 的换行规则相同 """
+    separator = b'\n' if buffer.find(b'\n', start) != -1 or buffer.find(b'\r', start) == -1 else b'\r'
+    length = len(buffer)
+    while start < length:
+        end = buffer.find(separator, start + chunk_size)
+        if end == -1:
+            end = length
+        yield from buffer[start:end].split(separator)
+        start = end + 1
+
+
+def _byte_line_timestamp(line, encoding):
+    """ 在字节上解析时间轴行；含有非 ASCII 字节时解码后按文本解析，保证结果一致 """
+    if not line.isascii():
+        return parse_srt_timestamp(line.decode(encoding, 'replace'))
+    match = _SRT_TIMESTAMP_BYTES_RE.search(line)
+    if match is None:
+        # 省略了毫秒的时间轴，或者含有 --> 却无法解析（抛出 SubtitleError），按文本处理
+        return parse_srt_timestamp(line.decode('ascii'))
+    groups = match.groups()
+    if len(groups[3]) == 3 and len(groups[7]) == 3:
+        start_hours, start_minutes, start_seconds, start, end_hours, end_minutes, end_seconds, end = map(int, groups)
+        return (start_hours * 3600000 + start_minutes * 60000 + start_seconds * 1000 + start,
+                end_hours * 3600000 + end_minutes * 60000 + end_seconds * 1000 + end)
+    return parse_srt_timestamp(line.decode('ascii'))
+
+
+def _byte_line_number(line, encoding):
+    """ 序号行的数字，不是序号行时返回 None """
+    number = line.strip(_ASCII_WHITESPACE)
+    if number.isascii():
+        return number if number.isdigit() else None
+    # 全角数字、全角空格等非 ASCII 字符，解码后按文本判断
+    number = line.decode(encoding, 'replace').strip()
+    return number if number.isdigit() else None
+
+
+def iter_buffer_cues(buffer, encoding, start=0):
+    """
+    在字节缓冲区（mmap、bytes）中查找标准格式的字幕项，逐个生成 Cue，只解码中英文文本
+    :param start: 开始查找的字节位置，用于跳过 BOM 或从文件中间开始浏览
+    文本无法用 encoding 解码时抛出 EncodingMismatch
+    """
+    if encoding == 'utf-8-sig':
+        encoding = 'utf-8'
+    decode = codecs.getdecoder(encoding)
+    lines = iter_byte_lines(buffer, start)
+    line = next(lines, None)
+    try:
+        while line is not None:
+            subtitle_num = _byte_line_number(line, encoding)
+            line = next(lines, None)
+            if subtitle_num is None or line is None:
+                continue
+            # 序号后面不是时间轴时，说明这只是一行数字文本，从下一行继续查找
+            times = _byte_line_timestamp(line, encoding)
+            if times is None:
+                continue
+            chinese_line = decode(next(lines, b""))[0].strip()
+            english_line = decode(next(lines, b""))[0].strip()
+            text_lines = [chinese_line, english_line]
+            line = next(lines, None)
+            # 超过两行的字幕：继续读取文本行，直到空行或下一个序号
+            if chinese_line and english_line:
+                while line is not None and line.strip(_ASCII_WHITESPACE):
+                    text = decode(line)[0].strip()
+                    if not text or text.isdigit():
+                        break
+                    text_lines.append(text)
+                    line = next(lines, None)
+
+            yield Cue(int(subtitle_num), times[0], times[1], text_lines)
+    except UnicodeDecodeError as e:
+        raise EncodingMismatch(f" 文件内容无法用 {encoding} 解码 : {str(e)}")
+
+
+@contextlib.contextmanager
+def map_file(file_path):
+    """ 只读映射整个文件，空文件返回 b'' """
+    with open(file_path, 'rb') as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            yield b''
+            return
+        with mapped:
+            yield mapped
+
+
+def probe_buffer(buffer, file_path=None, sample_size=SCAN_SAMPLE_SIZE, pair_tolerance=0):
+    """
+    根据开头的一部分字节判断能否在字节上扫描；pair_tolerance 与格式检测使用的分离格式配对误差相同
+    返回 (编码, 开始位置, 格式判定依据, 检测读取的行数, 估计的字幕条数)；ASS、分离格式、编码不兼容或格式不确定时返回 None
+    """
+    sample = bytes(buffer[:sample_size])
+    encoding = detect_sample_encoding(sample, file_path)
+    if encoding is None or not is_ascii_compatible(encoding):
+        return None
+    text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+    subtitle_format, decided_by, head = sniff_subtitle_format(iter_text_lines(text), pair_tolerance)
+    if subtitle_format != "standard":
+        return None
+    # 抽样没能下结论时需要统计整个文件，只有开头的样本就是整个文件时才可以
+    if decided_by != "sample" and len(sample) < len(buffer):
+        return None
+
+    start = len(codecs.BOM_UTF8) if encoding == 'utf-8-sig' and sample.startswith(codecs.BOM_UTF8) else 0
+    estimated_count = sample.count(b' --> ') * len(buffer) // max(len(sample), 1)
+    return encoding, start, decided_by, len(head), estimated_count
+
+
+def iter_mapped_cues(file_path, encoding, start=0):
+    """ 映射文件并逐个生成 Cue，生成器结束或关闭时解除映射 """
+    with map_file(file_path) as buffer:
+        yield from iter_buffer_cues(buffer, encoding, start)
+
+
+def page_cues(file_path, encoding, start=0, count=100):
+    """ 从字节位置 start 所在行的下一行开始读取最多 count 个字幕项，用于浏览大文件的一部分 """
+    with map_file(file_path) as buffer:
+        if start > 0:
+            start = buffer.find(b'\n', start - 1) + 1 or len(buffer)
+        return list(itertools.islice(iter_buffer_cues(buffer, encoding, start), count))
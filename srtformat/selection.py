@@ -0,0 +1,150 @@
+""" 字幕文件的选择：按文件名判断优先级、生成输出文件名，命令行的批量模式和监视模式共用 """
+import collections
+import os
+import re
+
+# 支持的输入文件扩展名
+SUBTITLE_EXTENSIONS = (".srt", ".ass")
+# 可以直接读取其中字幕的压缩包扩展名
+ARCHIVE_EXTENSIONS = (".zip",)
+
+
+# 判断文件名中是否包含指定的标识符
+def get_file_priority(file_name):
+    file_name = file_name.lower()  # 转小写方便判断
+    # 定义优先级，越靠前优先级越高
+    if 'chseng' in file_name:
+        return 3
+    elif 'chs' in file_name:
+        return 2
+    elif 'ch' in file_name:
+        return 1
+    else:
+        return 0
+
+
+def select_best_file(srt_files):
+    # 按优先级选出最有可能的文件，优先级相同时取排在前面的文件
+    return max(srt_files, key=get_file_priority)
+
+
+# 文件名末尾表示语言的标记，如 movie.chs.srt、movie.eng.srt
+CHINESE_LANGUAGE_TAGS = ("chs", "cht", "chi", "zho", "zh", "sc", "tc")
+ENGLISH_LANGUAGE_TAGS = ("eng", "en")
+
+
+def language_tag(file_name):
+    # 文件名中扩展名前面的语言标记（小写），没有时返回空字符串
+    stem, tag = os.path.splitext(os.path.splitext(file_name)[0])
+    tag = tag[1:].lower()
+    return tag if stem and tag in CHINESE_LANGUAGE_TAGS + ENGLISH_LANGUAGE_TAGS else ""
+
+
+def strip_language_tag(file_name):
+    # 去掉文件名中的语言标记，如 movie.chs.srt -> movie.srt，用于合并后的输出文件名
+    tag = language_tag(file_name)
+    if not tag:
+        return file_name
+    stem, ext = os.path.splitext(file_name)
+    return stem[:-len(tag) - 1] + ext
+
+
+def select_language_pair(srt_files):
+    # 从同一文件夹的字幕中选出单语的中文和英文字幕，用于合并；返回 (中文文件, 英文文件)，找不到时为 None
+    # 都按语言标记判断（双语的 movie.chseng.srt 没有语言标记），有多个中文字幕时按文件名优先级选择（chs 优先于 cht）
+    chinese_files = [name for name in srt_files if language_tag(name) in CHINESE_LANGUAGE_TAGS]
+    english_files = [name for name in srt_files if language_tag(name) in ENGLISH_LANGUAGE_TAGS]
+    if not chinese_files or not english_files:
+        return None
+    return select_best_file(chinese_files), english_files[0]
+
+
+def output_prefixes(chinese_font, english_font):
+    # 输出文件名的前缀，用于跳过之前生成的输出文件
+    return (f"{chinese_font}_", f"{english_font}_")
+
+
+def is_subtitle_candidate(file_name, skip_prefixes=()):
+    # 是否是待处理的字幕文件：扩展名正确，且不是之前生成的输出文件
+    return file_name.lower().endswith(SUBTITLE_EXTENSIONS) and not file_name.startswith(tuple(skip_prefixes))
+
+
+def is_archive_file(file_name, skip_prefixes=()):
+    # 是否是待处理的字幕压缩包，跳过之前生成的输出压缩包
+    return file_name.lower().endswith(ARCHIVE_EXTENSIONS) and not file_name.startswith(tuple(skip_prefixes))
+
+
+# 文件名中的集数，如 S01E02、EP02、E02、Episode 2、第2集
+_EPISODE_RE = re.compile(r'(?i)s\d{1,2}\s*e\d{1,4}|(?<![a-z])(?:episode|ep?)\s*\d{1,4}(?!\d)|第\s*\d+\s*[集话話]')
+
+
+def episode_key(file_name):
+    # 文件名中表示集数的部分（小写、去掉空格），没有时返回空字符串
+    match = _EPISODE_RE.search(os.path.basename(file_name))
+    return re.sub(r'\s+', '', match.group(0)).lower() if match else ""
+
+
+def select_episode_files(srt_files):
+    """
+    整季的字幕包中每一集选出一个文件：按文件名中的集数分组，每组按 get_file_priority 选择（与 select_best_file 相同）
+    没有集数的文件按所在的文件夹分组，与批量模式中每个文件夹选一个文件相同；返回选出的文件名，顺序与输入相同
+    """
+    groups = {}
+    for name in srt_files:
+        key = episode_key(name) or ("", os.path.dirname(name))
+        groups.setdefault(key, []).append(name)
+    selected = {select_best_file(names) for names in groups.values()}
+    return [name for name in srt_files if name in selected]
+
+
+def build_output_file(directory, selected_file, chinese_font, english_font, extension=".srt"):
+    # 设置输出文件路径（在同一目录下），默认输出 .srt 文件，extension 为 ".ass" 时输出原生 ASS
+    selected_file = os.path.splitext(selected_file)[0] + extension
+    if chinese_font == english_font:
+        return os.path.join(directory, f"{chinese_font}_{selected_file}")
+    return os.path.join(directory, f"{chinese_font}_{english_font}_{selected_file}")
+
+
+def expand_output_pattern(pattern, input_file, chinese_font, english_font, template_name=""):
+    """
+    按输出路径模板生成输出文件路径，可用的占位符：
+    {dir} 输入文件所在目录，{name} 不含扩展名的文件名，{ext} 输入文件的扩展名（如 .ass），
+    {prefix} 默认的字体名前缀（与 build_output_file 相同），{chinese_font}、{english_font}、{template} 模板名
+    模板中有未知的占位符时抛出 KeyError
+    """
+    directory, file_name = os.path.split(input_file)
+    name, ext = os.path.splitext(file_name)
+    prefix = f"{chinese_font}_" if chinese_font == english_font else f"{chinese_font}_{english_font}_"
+    return pattern.format(dir=directory or ".", name=name, ext=ext, prefix=prefix, chinese_font=chinese_font,
+                          english_font=english_font, template=safe_file_name(template_name))
+
+
+# 文件名中不能使用的字符
+_UNSAFE_FILE_NAME_RE = re.compile(r'[\\/:*?"<>|]')
+
+
+def safe_file_name(name):
+    # 把名称中不能用于文件名的字符替换为下划线
+    return _UNSAFE_FILE_NAME_RE.sub("_", name).strip()
+
+
+def build_variant_outputs(directory, selected_file, variants, extension=".srt"):
+    # 为多个模板生成输出文件路径，variants 为 [(模板名, 中文字体, 英文字体), ...]
+    # 字体相同的模板输出文件名会重复，这些模板改用模板名作为前缀
+    outputs = [build_output_file(directory, selected_file, chinese_font, english_font, extension)
+               for _, chinese_font, english_font in variants]
+    counts = collections.Counter(outputs)
+    stem = os.path.splitext(selected_file)[0]
+    return [os.path.join(directory, f"{safe_file_name(name)}_{stem}{extension}") if counts[output_file] > 1
+            else output_file
+            for (name, _, _), output_file in zip(variants, outputs)]
+
+
+def variant_output_prefixes(variants):
+    # 多个模板的输出文件名可能使用的所有前缀
+    prefixes = set()
+    for name, chinese_font, english_font in variants:
+        prefixes.update(output_prefixes(chinese_font, english_font))
+        if name:
+            prefixes.add(f"{safe_file_name(name)}_")
+    return tuple(sorted(prefixes))
@@ -0,0 +1,55 @@
+""" 为字幕项添加样式前缀，生成 SRT 文本 """
+from .classify import CJK_PATTERN, LATIN_PATTERN, is_chinese_line
+from .cue import format_srt_timestamp
+
+# 中文行末尾的换行符，英文行不加
+CHINESE_LINE_BREAK = r"{\r}"
+ENGLISH_LINE_BREAK = ""
+
+
+def iter_styled_cues(cues, chinese_style, english_style, chinese_line_break=CHINESE_LINE_BREAK,
+                     english_line_break=ENGLISH_LINE_BREAK, keep_empty_breaks=False):
+    """
+    为每个字幕项添加样式，每次生成一个完整字幕项的文本
+    每行按文字判断使用中文还是英文样式（与 classify.is_chinese_line 相同），每条字幕至少输出两行（中文行和英文行）
+    keep_empty_breaks 为 True 时，空行也输出换行符（命令行版本的行为），否则输出空行
+    """
+    chinese_empty = chinese_line_break if keep_empty_breaks else ""
+    english_empty = english_line_break if keep_empty_breaks else ""
+    cjk_search = CJK_PATTERN.search
+    latin_search = LATIN_PATTERN.search
+    empty = True
+    for cue in cues:
+        empty = False
+        lines = cue.lines
+        if len(lines) == 2:
+            # 最常见的两行字幕单独处理，省去列表和 join
+            first, second = lines
+            if not first:
+                first_text = chinese_empty
+            elif cjk_search(first) is not None or latin_search(first) is None:
+                first_text = f"{chinese_style}{first}{chinese_line_break}"
+            else:
+                first_text = f"{english_style}{first}{english_line_break}"
+            if not second:
+                second_text = english_empty
+            elif not second.isascii() and cjk_search(second) is not None:
+                second_text = f"{chinese_style}{second}{chinese_line_break}"
+            else:
+                second_text = f"{english_style}{second}{english_line_break}"
+            yield f"{cue.index}\n{format_srt_timestamp(cue.start, cue.end)}\n{first_text}\n{second_text}\n\n"
+            continue
+
+        texts = []
+        for position, line in enumerate(lines):
+            if not line:
+                texts.append(english_empty if position else chinese_empty)
+            elif is_chinese_line(line, position):
+                texts.append(f"{chinese_style}{line}{chinese_line_break}")
+            else:
+                texts.append(f"{english_style}{line}{english_line_break}")
+        if len(texts) < 2:
+            texts += (chinese_empty, english_empty)[len(texts):]
+        yield f"{cue.index}\n{format_srt_timestamp(cue.start, cue.end)}\n" + "\n".join(texts) + "\n\n"
+    if empty:
+        yield "\n"
@@ -0,0 +1,202 @@
+""" 模板管理：加载、校验、缓存和保存 templates.json 中的样式模板 """
+import functools
+import os
+import re
+
+# json 和 tempfile 在第一次读取、保存模板时才导入，不使用模板时不增加命令行的启动时间
+
+# 项目根目录下的模板文件
+DEFAULT_TEMPLATES_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "templates.json"))
+
+# 模板中的字段及其类型
+TEMPLATE_TEXT_FIELDS = ("chinese_font", "english_font")
+TEMPLATE_SIZE_FIELDS = ("chinese_font_size", "english_font_size")
+TEMPLATE_COLOR_FIELDS = ("chinese_font_color", "english_font_color")
+TEMPLATE_FLAG_FIELDS = ("chinese_bold", "english_bold", "chinese_italic", "english_italic", "chinese_blur", "english_blur")
+TEMPLATE_FIELDS = TEMPLATE_TEXT_FIELDS + TEMPLATE_SIZE_FIELDS + TEMPLATE_COLOR_FIELDS + TEMPLATE_FLAG_FIELDS + ("shadow_opacity",)
+
+_COLOR_RE = re.compile(r'^#?[0-9A-Fa-f]{6}$')
+
+
+def validate_template(template):
+    """ 校验模板数据，返回错误信息列表，为空表示模板有效 """
+    if not isinstance(template, dict):
+        return [" 模板必须是 JSON 对象 "]
+
+    errors = []
+    missing = [field for field in TEMPLATE_FIELDS if field not in template]
+    if missing:
+        errors.append(f" 缺少字段 : {', '.join(missing)}")
+
+    for field in TEMPLATE_TEXT_FIELDS:
+        if field in template and (not isinstance(template[field], str) or not template[field].strip()):
+            errors.append(f" {field} 必须是非空字符串 ")
+    for field in TEMPLATE_SIZE_FIELDS:
+        if field in template:
+            try:
+                if float(template[field]) <= 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                errors.append(f" {field} 必须是正数 ")
+    for field in TEMPLATE_COLOR_FIELDS:
+        if field in template and not (isinstance(template[field], str) and _COLOR_RE.match(template[field])):
+            errors.append(f" {field} 必须是 #RRGGBB 格式的颜色 ")
+    for field in TEMPLATE_FLAG_FIELDS:
+        if field in template and not isinstance(template[field], bool):
+            errors.append(f" {field} 必须是 true 或 false")
+    if "shadow_opacity" in template:
+        try:
+            if not 0 <= int(template["shadow_opacity"]) <= 255:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append(" shadow_opacity 必须是 0 到 255 之间的整数 ")
+    return errors
+
+
+@functools.lru_cache(maxsize=256)
+def compile_style(font, font_size, font_color, bold, italic, blur, shadow_opacity):
+    """ 生成一种语言的样式前缀，如 {\\fn字体\\fs18\\1c&HC8C8C8&\\4a&H00&}，相同参数只生成一次 """
+    return r"{{\fn{font}\fs{font_size}\1c&H{font_color}&{bold}{italic}{blur}\4a&H{shadow_opacity}&}}".format(
+        font=font,
+        font_size=font_size,
+        font_color=font_color.lstrip('#'),
+        bold="" if bold else r"\b0",
+        italic=r"\i1" if italic else "",
+        blur=r"\be1" if blur else "",
+        shadow_opacity=format(int(shadow_opacity), '02X')
+    )
+
+
+def compile_template_styles(template):
+    """ 生成模板的 (中文样式前缀, 英文样式前缀) """
+    chinese_style = compile_style(template["chinese_font"], template["chinese_font_size"], template["chinese_font_color"],
+                                  template["chinese_bold"], template["chinese_italic"], template["chinese_blur"],
+                                  template["shadow_opacity"])
+    english_style = compile_style(template["english_font"], template["english_font_size"], template["english_font_color"],
+                                  template["english_bold"], template["english_italic"], template["english_blur"],
+                                  template["shadow_opacity"])
+    return chinese_style, english_style
+
+
+class TemplateRegistry:
+    """
+    模板注册表：只在 templates.json 修改时间变化时才重新加载，
+    缓存每个模板编译好的样式前缀，保存时原子地写回文件
+    """
+
+    def __init__(self, path=DEFAULT_TEMPLATES_PATH):
+        self.path = path
+        self.errors = {}  # 无效模板及其错误信息
+        self._data = {}  # 文件中的原始数据，写回时保留无效模板
+        self._templates = {}
+        self._styles = {}
+        self._stamp = None
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """ 文件有变化时重新加载模板 """
+        stamp = self._file_stamp()
+        if stamp == self._stamp and self._stamp is not None:
+            return
+        import json
+        templates, errors = {}, {}
+        data = {}
+        if stamp is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                data = {}
+                errors[self.path] = str(e)
+            if not isinstance(data, dict):
+                errors[self.path] = " 模板文件必须是 JSON 对象 "
+                data = {}
+            for name, template in data.items():
+                template_errors = validate_template(template)
+                if template_errors:
+                    errors[name] = template_errors
+                else:
+                    templates[name] = template
+        self._data = data
+        self._templates = templates
+        self.errors = errors
+        self._styles = {}
+        self._stamp = stamp
+
+    def names(self):
+        """ 返回所有有效模板的名称 """
+        self._refresh()
+        return list(self._templates)
+
+    def __contains__(self, name):
+        self._refresh()
+        return name in self._templates
+
+    def get(self, name):
+        """ 返回模板数据的副本，模板不存在时返回 None """
+        self._refresh()
+        template = self._templates.get(name)
+        return dict(template) if template is not None else None
+
+    def styles(self, name):
+        """ 返回模板的 (中文样式前缀, 英文样式前缀)，结果会被缓存 """
+        self._refresh()
+        if name not in self._styles:
+            self._styles[name] = compile_template_styles(self._templates[name])
+        return self._styles[name]
+
+    def save(self, name, template):
+        """ 添加或更新模板，模板无效时抛出 ValueError """
+        errors = validate_template(template)
+        if errors:
+            raise ValueError("；".join(errors))
+        self._refresh()
+        data = dict(self._data)
+        data[name] = dict(template)
+        self._write(data)
+
+    def delete(self, name):
+        """ 删除模板，返回是否删除成功 """
+        self._refresh()
+        if name not in self._templates:
+            return False
+        data = dict(self._data)
+        del data[name]
+        self._write(data)
+        return True
+
+    def _write(self, data):
+        """ 先写入同目录下的临时文件，再替换原文件，避免写到一半时文件损坏 """
+        import json
+        import tempfile
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".templates-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._stamp = None
+        self._refresh()
+
+
+_registries = {}
+
+
+def get_registry(path=DEFAULT_TEMPLATES_PATH):
+    """ 返回指定模板文件的共享注册表，同一进程中多次调用只创建一次 """
+    path = os.path.abspath(path)
+    if path not in _registries:
+        _registries[path] = TemplateRegistry(path)
+    return _registries[path]
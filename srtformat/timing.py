@@ -0,0 +1,213 @@
+"""
+按阶段统计处理单个文件的耗时、字节数和字幕条数，用于判断时间花在了哪里
+
+阶段可以嵌套，每个阶段只统计自己的时间，不包括嵌套在其中的阶段。流式处理时解析、添加样式和写出交替进行，
+用 FileProfile.timed_iter 包装生成器后，每次取下一项的时间记到对应的阶段。
+没有传入 profile_callback、也没有注册钩子时不创建 FileProfile，处理过程没有额外开销。
+
+    from srtformat import add_profile_hook
+    add_profile_hook(lambda profile: print(profile.summary()))
+"""
+import contextlib
+import time
+
+# 各阶段的显示顺序和名称
+STAGE_NAMES = {
+    "read": "读取",
+    "chardet": "chardet",
+    "decode": "解码",
+    "detect": "格式检测",
+    "pysubs2": "pysubs2",
+    "parse": "解析",
+    "retime": "调整时间",
+    "style": "样式",
+    "write": "写出",
+}
+
+# 所有文件处理完成后都会调用的钩子
+_profile_hooks = []
+
+
+def add_profile_hook(callback):
+    """ 注册钩子，每个文件处理结束（包括失败和取消）后调用 callback(FileProfile) """
+    if callback not in _profile_hooks:
+        _profile_hooks.append(callback)
+
+
+def remove_profile_hook(callback):
+    if callback in _profile_hooks:
+        _profile_hooks.remove(callback)
+
+
+def profiling_enabled(profile_callback=None):
+    return profile_callback is not None or bool(_profile_hooks)
+
+
+def publish_profile(profile, profile_callback=None):
+    """ 把统计结果交给 profile_callback 和所有钩子 """
+    if profile_callback is not None:
+        profile_callback(profile)
+    for hook in list(_profile_hooks):
+        hook(profile)
+
+
+def measure(profile, name):
+    """ 统计一个阶段的耗时，profile 为 None 时什么也不做 """
+    if profile is None:
+        return contextlib.nullcontext()
+    return profile.stage(name)
+
+
+class StageStats:
+    """ 一个阶段的累计值：耗时（秒）、调用次数、字节数、字幕条数 """
+    __slots__ = ("seconds", "calls", "bytes", "cues")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.bytes = 0
+        self.cues = 0
+
+    def as_dict(self):
+        return {"seconds": self.seconds, "calls": self.calls, "bytes": self.bytes, "cues": self.cues}
+
+
+class FileProfile:
+    """
+    单个文件的统计结果
+    :ivar stages: 阶段名 -> StageStats，按第一次出现的顺序
+    :ivar info: 其他信息，如检测出的编码、格式
+    :ivar status: "ok"、"error" 或 "cancelled"
+    :ivar total: 从开始处理到结束的总耗时（秒）
+    """
+
+    def __init__(self, input_file):
+        self.input_file = input_file
+        self.stages = {}
+        self.info = {}
+        self.status = "ok"
+        self.total = 0.0
+        self._stack = []
+        self._started = self._mark = time.perf_counter()
+
+    def stats(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def _enter(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self.stats(self._stack[-1]).seconds += now - self._mark
+        self._stack.append(name)
+        self._mark = now
+
+    def _exit(self):
+        now = time.perf_counter()
+        self.stats(self._stack.pop()).seconds += now - self._mark
+        self._mark = now
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """ 统计 with 块中的时间，返回该阶段的 StageStats，调用方可以累加字节数 """
+        stats = self.stats(name)
+        stats.calls += 1
+        self._enter(name)
+        try:
+            yield stats
+        finally:
+            self._exit()
+
+    def split(self, name):
+        """ 把当前阶段从开始（或上一次切分）到现在的时间改记到 name，用于在生成器内部划分阶段 """
+        now = time.perf_counter()
+        stats = self.stats(name)
+        stats.seconds += now - self._mark
+        stats.calls += 1
+        self._mark = now
+
+    def timed_iter(self, iterable, name):
+        """ 逐项透传 iterable，取每一项的时间记到 name，并统计项数 """
+        stats = self.stats(name)
+        stats.calls += 1
+        iterator = iter(iterable)
+        enter, exit_ = self._enter, self._exit
+        while True:
+            enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                exit_()
+            stats.cues += 1
+            yield item
+
+    def wrap_detect_callback(self, detect_callback=None):
+        """ 格式检测完成时把已用的解析时间改记为格式检测，并记录结果 """
+        def on_detect(subtitle_format, decided_by, lines_read):
+            self.split("detect")
+            self.info.update(format=subtitle_format, decided_by=decided_by, detect_lines=lines_read)
+            if detect_callback:
+                detect_callback(subtitle_format, decided_by, lines_read)
+        return on_detect
+
+    def finish(self, status="ok"):
+        self.status = status
+        self.total = time.perf_counter() - self._started
+        return self
+
+    def as_dict(self):
+        """ 可以直接用 json.dumps 输出的字典，也可以在进程之间传递 """
+        return {
+            "file": self.input_file,
+            "status": self.status,
+            "total": self.total,
+            "info": dict(self.info),
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+        }
+
+    def summary(self):
+        """ 单行摘要，如 "共 120.3ms：读取 1.2ms，解码 3.4ms，解析 50.1ms（1234 条）..." """
+        order = list(STAGE_NAMES)
+        parts = []
+        for name, stats in sorted(self.stages.items(),
+                                  key=lambda item: order.index(item[0]) if item[0] in order else len(order)):
+            part = f"{STAGE_NAMES.get(name, name)} {stats.seconds * 1000:.1f}ms"
+            if name in ("parse", "style") and stats.cues:
+                part += f"（{stats.cues} 条）"
+            parts.append(part)
+        return f"共 {self.total * 1000:.1f}ms：" + "，".join(parts)
+
+
+def format_profile_table(profiles):
+    """
+    把多个文件的统计结果（FileProfile.as_dict() 的返回值）排成文本表格，单位为毫秒，最后一行为合计
+    """
+    names = [name for name in STAGE_NAMES if any(name in profile["stages"] for profile in profiles)]
+    names += sorted({name for profile in profiles for name in profile["stages"]} - set(names))
+    header = ["文件", "总计"] + [STAGE_NAMES.get(name, name) for name in names] + ["字幕条数", "输入字节", "输出字节"]
+
+    def row(label, total, stages):
+        cells = [label, f"{total * 1000:.1f}"]
+        cells += [f"{stages[name]['seconds'] * 1000:.1f}" if name in stages else "-" for name in names]
+        cells += [str(stages.get("parse", {}).get("cues", 0)), str(stages.get("read", {}).get("bytes", 0)),
+                  str(stages.get("write", {}).get("bytes", 0))]
+        return cells
+
+    rows = [row(profile["file"], profile["total"], profile["stages"]) for profile in profiles]
+    totals = {}
+    for profile in profiles:
+        for name, stats in profile["stages"].items():
+            total = totals.setdefault(name, {"seconds": 0.0, "calls": 0, "bytes": 0, "cues": 0})
+            for key in total:
+                total[key] += stats[key]
+    if len(profiles) > 1:
+        rows.append(row("合计", sum(profile["total"] for profile in profiles), totals))
+
+    widths = [max(len(cells[i]) for cells in [header] + rows) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                       for i, (cell, width) in enumerate(zip(cells, widths)))
+             for cells in [header] + rows]
+    return "\n".join(lines)
@@ -0,0 +1,330 @@
+"""
+监视文件夹：有新的字幕文件写入时自动添加样式
+
+在 Linux 上用 inotify（通过 ctypes 调用，无需额外安装），其他系统或 inotify 不可用时定期扫描目录。
+文件夹在一段时间内没有新的变化后才处理（避免处理写到一半的文件），每个文件夹按 get_file_priority
+选出最合适的字幕，放入有界队列由工作线程处理。自己生成的输出文件带有字体名前缀，不会再次触发。
+"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+
+from .selection import build_output_file, is_subtitle_candidate, output_prefixes, select_best_file
+
+# 文件夹最后一次变化后等待这么多秒再处理
+DEFAULT_SETTLE_SECONDS = 2.0
+# 定期扫描的间隔（秒）
+DEFAULT_POLL_INTERVAL = 1.0
+# 等待处理的文件数上限，队列满时暂停分发
+DEFAULT_QUEUE_SIZE = 16
+# 增量处理清单有变化时最多隔这么多秒保存一次，进程被强制结束时最多丢失这段时间内的记录
+MANIFEST_SAVE_INTERVAL = 5.0
+
+# inotify 事件，见 <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingBackend:
+    """ 定期扫描目录树，比较字幕文件的大小和修改时间，返回有变化的文件夹；initial 为开始时已有字幕文件的文件夹 """
+    name = "polling"
+
+    def __init__(self, roots, is_candidate, interval=DEFAULT_POLL_INTERVAL):
+        self.roots = roots
+        self.is_candidate = is_candidate
+        self.interval = interval
+        self._snapshot = self._scan()
+        self.initial = {os.path.dirname(path) for path in self._snapshot}
+
+    def _scan(self):
+        snapshot = {}
+        for root in self.roots:
+            for directory, _, file_names in os.walk(root):
+                for name in file_names:
+                    if not self.is_candidate(name):
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout):
+        """ 最多等待 timeout 秒，返回有变化的文件夹集合 """
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {path for path, stamp in snapshot.items() if self._snapshot.get(path) != stamp}
+        changed.update(path for path in self._snapshot if path not in snapshot)
+        self._snapshot = snapshot
+        return {os.path.dirname(path) for path in changed}
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """ 用 inotify 递归监视目录树，返回有变化的文件夹；initial 为开始时已有字幕文件的文件夹 """
+    name = "inotify"
+
+    def __init__(self, roots, is_candidate):
+        self.roots = roots
+        self.is_candidate = is_candidate
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._directories = {}
+        self.initial = set()
+        try:
+            for root in roots:
+                self.initial.update(self._add_tree(root))
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), INOTIFY_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"无法监视 {directory}：{os.strerror(errno)}")
+        self._directories[wd] = directory
+
+    def _add_tree(self, root):
+        """ 监视 root 及其所有子文件夹，返回其中有字幕文件的文件夹 """
+        found = set()
+        for directory, _, file_names in os.walk(root):
+            self._add_watch(directory)
+            if any(self.is_candidate(name) for name in file_names):
+                found.add(directory)
+        return found
+
+    def wait(self, timeout):
+        """ 最多等待 timeout 秒，返回有变化的文件夹集合 """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # 内核的事件队列溢出（wd 为 -1），之后的事件已经丢失：重新扫描整个目录树，有字幕文件的文件夹都检查一遍
+                for root in self.roots:
+                    try:
+                        changed.update(self._add_tree(root))
+                    except OSError:
+                        pass
+                continue
+            directory = self._directories.get(wd)
+            if mask & IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+            if directory is None:
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # 新建或移入的文件夹：开始监视，其中已有的字幕文件也要处理
+                    try:
+                        changed.update(self._add_tree(os.path.join(directory, name)))
+                    except OSError:
+                        pass
+                continue
+            if name and self.is_candidate(name):
+                changed.add(directory)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_backend(roots, is_candidate, use_inotify=None, poll_interval=DEFAULT_POLL_INTERVAL):
+    """ 选择监视方式：use_inotify 为 None 时在 Linux 上优先尝试 inotify，失败时改为定期扫描 """
+    if use_inotify is None:
+        use_inotify = sys.platform.startswith("linux")
+    if use_inotify:
+        try:
+            return InotifyBackend(roots, is_candidate)
+        except (OSError, AttributeError):
+            pass
+    return PollingBackend(roots, is_candidate, poll_interval)
+
+
+class FolderWatcher:
+    """
+    监视一个或多个目录树，新的字幕文件写完后自动添加样式，输出文件与 --batch 模式相同
+    :param process: process(输入文件, 输出文件)，在工作线程中调用，失败时抛出异常
+    :param manifest: 可选的 Manifest，输入文件和样式都没有变化时跳过
+    :param styles_hash: 记录到 manifest 中的样式哈希
+    :param log: 输出日志的函数，默认为 print
+    :param extension: 输出文件的扩展名，".ass" 时输出原生 ASS
+    """
+
+    def __init__(self, roots, chinese_font, english_font, process, workers=2, queue_size=DEFAULT_QUEUE_SIZE,
+                 settle=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=None,
+                 manifest=None, styles_hash=None, log=print, extension=".srt"):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.chinese_font = chinese_font
+        self.english_font = english_font
+        self.process = process
+        self.workers = max(1, workers)
+        self.settle = settle
+        self.manifest = manifest
+        self.styles_hash = styles_hash
+        self.log = log
+        self.extension = extension
+        self.skip_prefixes = output_prefixes(chinese_font, english_font)
+        self.backend = create_backend(self.roots, self.is_candidate, use_inotify, poll_interval)
+        self._jobs = queue.Queue(maxsize=queue_size)
+        # 文件夹 -> (第一次发现变化的时间, 最后一次变化的时间)
+        self._pending = {}
+        # 已处理的输入文件 -> (大小, 修改时间)，避免同一个文件因无关的变化重复处理
+        self._done = {}
+        self._lock = threading.Lock()
+
+    def is_candidate(self, file_name):
+        return is_subtitle_candidate(file_name, self.skip_prefixes)
+
+    def run(self, stop_event=None):
+        """ 开始监视，直到 stop_event 被设置（或 KeyboardInterrupt） """
+        stop_event = stop_event or threading.Event()
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        self.log(f"正在监视（{self.backend.name}）：{', '.join(self.roots)}")
+
+        # 开始时已有的字幕也要处理，没有变化的文件由 _select 按清单跳过
+        now = time.monotonic()
+        for directory in self.backend.initial:
+            self._pending[directory] = (now, now)
+        last_save = time.monotonic()
+        try:
+            while not stop_event.is_set():
+                now = time.monotonic()
+                timeout = self.settle
+                if self._pending:
+                    timeout = max(0.05, min(last for _, last in self._pending.values()) + self.settle - now)
+                for directory in self.backend.wait(min(timeout, 1.0)):
+                    first_seen = self._pending.get(directory, (time.monotonic(),))[0]
+                    self._pending[directory] = (first_seen, time.monotonic())
+                self._dispatch_settled()
+                if time.monotonic() - last_save >= MANIFEST_SAVE_INTERVAL:
+                    self._save_manifest()
+                    last_save = time.monotonic()
+        finally:
+            # 停止时丢弃还没开始的文件，只等待正在处理的文件完成
+            while True:
+                try:
+                    self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in threads:
+                self._jobs.put(None)
+            for thread in threads:
+                thread.join()
+            self.backend.close()
+            self._save_manifest()
+
+    def _save_manifest(self):
+        """ 保存增量处理清单（没有变化时不写入），失败时只输出日志，监视继续 """
+        if self.manifest is None:
+            return
+        with self._lock:
+            try:
+                self.manifest.save()
+            except OSError as e:
+                self.log(f"[警告] 无法保存增量处理清单 {self.manifest.path}：{e}")
+
+    def _dispatch_settled(self):
+        """ 把已经静止 settle 秒的文件夹交给工作线程 """
+        now = time.monotonic()
+        for directory, (first_seen, last_change) in list(self._pending.items()):
+            if now - last_change < self.settle:
+                continue
+            # 队列满时不等待，剩下的文件夹留在 _pending 中下一轮再分发，主循环继续读取事件，避免内核的事件队列溢出
+            # 只有主线程放入任务，检查时不满就一定放得进去
+            if self._jobs.full():
+                return
+            del self._pending[directory]
+            job = self._select(directory)
+            if job is not None:
+                self._jobs.put_nowait(job + (first_seen,))
+
+    def _select(self, directory):
+        """ 选出文件夹中最合适的字幕文件，返回 (输入文件, 输出文件, 大小和修改时间)，不需要处理时返回 None """
+        try:
+            srt_files = sorted(name for name in os.listdir(directory) if self.is_candidate(name))
+        except OSError:
+            return None
+        if not srt_files:
+            return None
+        selected_file = select_best_file(srt_files)
+        input_file = os.path.join(directory, selected_file)
+        output_file = build_output_file(directory, selected_file, self.chinese_font, self.english_font,
+                                        self.extension)
+        try:
+            stat = os.stat(input_file)
+        except OSError:
+            return None
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if self._done.get(input_file) == stamp and os.path.exists(output_file):
+                return None
+            if self.manifest is not None and self.manifest.is_current(input_file, output_file, self.styles_hash):
+                self._done[input_file] = stamp
+                return None
+        return input_file, output_file, stamp
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            input_file, output_file, stamp, first_seen = job
+            started = time.monotonic()
+            try:
+                self.process(input_file, output_file)
+            except Exception as e:
+                self.log(f"[失败] {input_file}：{e}")
+                continue
+            finished = time.monotonic()
+            with self._lock:
+                self._done[input_file] = stamp
+                if self.manifest is not None:
+                    # 输入文件在处理后被删除或移走时不能记录，只输出日志，工作线程继续处理后面的文件
+                    try:
+                        self.manifest.record(input_file, output_file, self.styles_hash)
+                    except OSError as e:
+                        self.log(f"[警告] {input_file}：无法记录到增量处理清单：{e}")
+            self.log(f"[完成] {input_file} -> {output_file}"
+                     f"（处理 {finished - started:.2f} 秒，从发现到完成 {finished - first_seen:.2f} 秒）")
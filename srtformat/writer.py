@@ -0,0 +1,181 @@
+""" 输出带样式的字幕文件：先写入同目录下的临时文件，写完后再替换目标文件 """
+import contextlib
+import itertools
+import os
+
+# 写文件的缓冲区大小
+WRITE_BUFFER_SIZE = 1 << 20
+# 可选的输出编码，utf-8-sig 会在文件开头写入 BOM
+OUTPUT_ENCODINGS = ("utf-8", "utf-8-sig")
+# 可选的换行符，None 表示使用系统默认的换行符（与之前的行为相同）
+OUTPUT_NEWLINES = {"lf": "\n", "crlf": "\r\n", "native": None}
+
+# 生成临时文件名时最多尝试的次数
+TEMP_NAME_ATTEMPTS = 100
+
+
+def _create_temp(directory, prefix, suffix):
+    """
+    与 tempfile.mkstemp 相同：在 directory 中独占创建新文件，返回 (文件描述符, 路径)
+    权限与普通新建的文件相同（0o666 由内核按 umask 去掉相应的位），替换后就是输出文件的权限，不需要修改进程的 umask；
+    不导入 tempfile（它会导入 shutil 和 random），按文件调用命令行版本时启动更快
+    """
+    flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_BINARY", 0)
+    for _ in range(TEMP_NAME_ATTEMPTS):
+        temp_path = os.path.join(directory, f"{prefix}{os.urandom(6).hex()}{suffix}")
+        try:
+            return os.open(temp_path, flags, 0o666), temp_path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"无法在 {directory} 中创建临时文件")
+
+
+def _open_temp(output_file, encoding, newline):
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, temp_path = _create_temp(directory, f".{os.path.basename(output_file)}.", ".tmp")
+    return open(fd, 'w', encoding=encoding, newline=newline, buffering=WRITE_BUFFER_SIZE), temp_path
+
+
+def _finish_temp(file, fsync):
+    """ 写完临时文件并关闭，返回文件的字节数 """
+    file.flush()
+    if fsync:
+        os.fsync(file.fileno())
+    byte_count = os.fstat(file.fileno()).st_size
+    file.close()
+    return byte_count
+
+
+def _replace_output(temp_path, output_file):
+    # 替换已有的文件时保留它的权限，新文件使用创建临时文件时按 umask 得到的权限
+    try:
+        mode = os.stat(output_file).st_mode & 0o7777
+    except OSError:
+        mode = None
+    if mode is not None:
+        os.chmod(temp_path, mode)
+    os.replace(temp_path, output_file)
+
+
+class AtomicOutput:
+    """
+    逐步写出的二进制输出文件（如逐个成员写入的 zip）：open 在同目录下创建临时文件，
+    commit 时再替换目标文件（保留已有文件的权限），discard 删除临时文件，目标文件保持原样
+    """
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.file = None
+        self.temp_path = None
+
+    def open(self):
+        """ 创建临时文件（输出目录不存在时先创建），返回以二进制写入方式打开的文件对象 """
+        directory = os.path.dirname(os.path.abspath(self.output_file))
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp_path = _create_temp(directory, f".{os.path.basename(self.output_file)}.", ".tmp")
+        self.file = open(fd, 'wb', buffering=WRITE_BUFFER_SIZE)
+        return self.file
+
+    def commit(self, fsync=False):
+        """ 关闭临时文件并替换目标文件，返回文件的字节数 """
+        byte_count = _finish_temp(self.file, fsync)
+        _replace_output(self.temp_path, self.output_file)
+        self.file = self.temp_path = None
+        return byte_count
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+        if self.temp_path and os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+        self.file = self.temp_path = None
+
+
+def write_styled(output_file, styled, encoding="utf-8", newline=None, fsync=True):
+    """
+    逐条写出已添加样式的字幕文本，返回写入的字节数
+    写到一半出错或被取消时删除临时文件，目标文件保持原样，读取方不会看到写了一半的文件
+    :param styled: 字幕文本的可迭代对象，换行使用 \\n
+    :param encoding: 输出编码，"utf-8-sig" 表示带 BOM 的 UTF-8
+    :param newline: 输出的换行符，如 "\\r\\n"；None 表示系统默认
+    :param fsync: 替换前把临时文件写入磁盘，断电时也不会留下不完整的文件
+    """
+    return write_styled_variants([(output_file, styled)], encoding, newline, fsync)[0]
+
+
+def write_styled_variants(outputs, encoding="utf-8", newline=None, fsync=True):
+    """
+    同时写出多个文件，outputs 为 [(输出文件, 字幕文本的可迭代对象), ...]，返回每个文件写入的字节数
+    各个可迭代对象每次同时前进一条（可以共享同一个用 itertools.tee 复制的字幕流），
+    先结束的停止写入，其余的继续写完（ASS 比 SRT 多出文件头，文本的条数不同），
+    全部写完后才替换目标文件，任何一个出错时所有目标文件都保持原样
+    """
+    temp_paths = []
+    try:
+        with contextlib.ExitStack() as stack:
+            files = []
+            for output_file, _ in outputs:
+                file, temp_path = _open_temp(output_file, encoding, newline)
+                temp_paths.append(temp_path)
+                files.append(stack.enter_context(file))
+
+            if len(files) == 1:
+                files[0].writelines(outputs[0][1])
+            else:
+                writes = [file.write for file in files]
+                for texts in itertools.zip_longest(*(styled for _, styled in outputs), fillvalue=""):
+                    for write, text in zip(writes, texts):
+                        write(text)
+            byte_counts = [_finish_temp(file, fsync) for file in files]
+
+        for (output_file, _), temp_path in zip(outputs, temp_paths):
+            _replace_output(temp_path, output_file)
+    except BaseException:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        raise
+    return byte_counts
+
+
+def encode_styled(styled, encoding="utf-8", newline=None):
+    """ 把已添加样式的字幕文本一次编码为字节，换行规则与 write_styled 相同，用于先在内存中生成再写出的情况 """
+    text = "".join(styled)
+    if newline is None:
+        newline = os.linesep
+    if newline != "\n":
+        text = text.replace("\n", newline)
+    return text.encode(encoding)
+
+
+def write_bytes(output_file, data, fsync=True):
+    """ 原子地写出已编码的内容，返回写入的字节数 """
+    return write_bytes_variants([(output_file, data)], fsync)[0]
+
+
+def write_bytes_variants(outputs, fsync=True):
+    """
+    写出多个已编码的文件，outputs 为 [(输出文件, 字节串), ...]，返回每个文件写入的字节数
+    与 write_styled_variants 相同，全部写完后才替换目标文件，任何一个出错时所有目标文件都保持原样
+    """
+    temp_paths = []
+    try:
+        for output_file, data in outputs:
+            directory = os.path.dirname(os.path.abspath(output_file))
+            fd, temp_path = _create_temp(directory, f".{os.path.basename(output_file)}.", ".tmp")
+            temp_paths.append(temp_path)
+            with open(fd, 'wb', buffering=0) as file:
+                view = memoryview(data)
+                while view:
+                    view = view[file.write(view):]
+                if fsync:
+                    os.fsync(file.fileno())
+
+        for (output_file, _), temp_path in zip(outputs, temp_paths):
+            _replace_output(temp_path, output_file)
+    except BaseException:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        raise
+    return [len(data) for _, data in outputs]